@@ -0,0 +1,422 @@
+# 性能基准：Gerber转换、爬虫、下载器和功率计算，结果写入JSON便于不同提交之间比较
+import argparse
+import asyncio
+import contextlib
+import csv
+import datetime
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GROUPS = ('gerber', 'crawler', 'downloader', 'images', 'calculators')
+
+def load_module(relative_path, name):
+    """按路径导入仓库中的脚本（文件名不是合法模块名时也可以），并把脚本所在目录加入 sys.path"""
+    path = os.path.join(ROOT, relative_path)
+    folder = os.path.dirname(path)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def quiet():
+    """丢弃被测代码的输出"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def measure(name, func, repeat, items=None, setup=None, **info):
+    """
+    运行 repeat 次并记录最短耗时；给出 setup 时每次运行前调用，其返回值作为 func 的参数（不计时）
+
+    被测函数的输出会被丢弃。items 为每次运行处理的数量，用于计算吞吐率。
+    """
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with quiet():
+            start = time.perf_counter()
+            func(state) if setup else func()
+            runs.append(time.perf_counter() - start)
+    result = {'name': name, 'seconds': min(runs), 'runs': runs}
+    if items:
+        result['items'] = items
+        result['items_per_second'] = items / min(runs)
+    result.update(info)
+    print(f"{name:<48} {min(runs):>9.4f} s" + (f" {items / min(runs):>14.1f} /s" if items else ''))
+    return result
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    本地替身服务器：标准页面、PDF、图库页面和图片，每个请求先等待 latency 秒
+
+    所有响应带 ETag，支持 If-None-Match（返回304）。
+    """
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    pages = 50  # /standard/1..pages.html 和 /gallery/0..pages-1.html
+    pdf_size = 64 * 1024
+    image_size = 32 * 1024
+    images_per_page = 4
+    sample_page = None  # 生成标准页面的函数
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = urlsplit(self.path).path
+        m = re.fullmatch(r'/standard/(\d+)\.html', path)
+        if m and 1 <= int(m.group(1)) <= self.pages:
+            return self.send_body(200, self.sample_page(int(m.group(1))).encode('utf-8'), 'text/html; charset=utf-8')
+        m = re.fullmatch(r'/uploadfile/file/(\d+)\.pdf', path)
+        if m:
+            return self.send_body(200, synthetic_bytes(b'%PDF-1.4\n', m.group(1), self.pdf_size), 'application/pdf')
+        m = re.fullmatch(r'/gallery/(\d+)\.html', path)
+        if m and int(m.group(1)) < self.pages:
+            n = int(m.group(1))
+            links = ''.join(f'<a href="/gallery/{k}.html">{k}</a>' for k in (2 * n + 1, 2 * n + 2) if k < self.pages)
+            images = ''.join(f'<img src="/images/{n}_{k}.jpg">' for k in range(self.images_per_page))
+            return self.send_body(200, f'<html><body>{links}{images}</body></html>'.encode('utf-8'), 'text/html')
+        m = re.fullmatch(r'/images/([\d_]+)\.jpg', path)
+        if m:
+            return self.send_body(200, synthetic_bytes(b'\xff\xd8\xff\xe0', m.group(1), self.image_size), 'image/jpeg')
+        self.send_body(404, b'not found', 'text/plain')
+
+def synthetic_bytes(magic, key, size):
+    """以 magic 开头、内容随 key 不同的 size 字节"""
+    block = hashlib.sha256(key.encode('utf-8')).digest()
+    return (magic + block * (size // len(block) + 1))[:size]
+
+@contextlib.contextmanager
+def stand_in_server(latency, pages):
+    """在后台线程中启动替身服务器，返回其地址"""
+    parse_bench = load_module('download_form_yiqifuwu/benchmark_parse.py', 'benchmark_parse')
+    handler = type('Handler', (StandInHandler,), {
+        'latency': latency,
+        'pages': pages,
+        'sample_page': staticmethod(parse_bench.make_sample_page),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def make_gerber_set(folder, board, copper_layers, lines, rng):
+    """
+    按 GerberX2.json 中 KiCad 的命名生成一块板子的 Gerber 文件
+
+    铜层为顶层、底层加 copper_layers-2 个内层，另有丝印、钢网、阻焊、外形和钻孔层；每层 lines 行绘图指令。
+    """
+    with open(os.path.join(ROOT, 'kicad_ad2jlc_gerber', 'GerberX2.json'), encoding='utf-8') as f:
+        json_data = json.load(f)
+    inner = [f"inner_layer_{n}" for n in range(1, copper_layers - 1)]
+    os.makedirs(folder, exist_ok=True)
+    for layer, config in json_data.items():
+        if layer.startswith('inner_layer_') and layer not in inner:
+            continue
+        pattern = config['kicad_GerberX2_Protel']
+        with open(os.path.join(folder, f"{board}-{pattern.lstrip('_')}"), 'w', encoding='utf-8') as f:
+            f.write('%FSLAX46Y46*%\n%MOMM*%\n%ADD10C,0.250000*%\nD10*\n')
+            f.writelines(f"X{rng.randrange(10 ** 8)}Y{rng.randrange(10 ** 8)}D0{rng.choice('12')}*\n" for _ in range(lines))
+            f.write('M02*\n')
+
+def bench_gerber(args, base_url, workdir):
+    """
+    2jlc.py 命令行批量转换：单进程/多进程、冷缓存/热缓存
+
+    2jlc.py 和 GerberX2.json 复制到临时目录中运行，转换缓存不会写进仓库。
+    """
+    tool_dir = os.path.join(workdir, 'jlc')
+    os.makedirs(tool_dir)
+    for name in ('2jlc.py', 'GerberX2.json'):
+        shutil.copy(os.path.join(ROOT, 'kicad_ad2jlc_gerber', name), tool_dir)
+
+    rng = random.Random(args.seed)
+    folders = [os.path.join(workdir, 'boards', f"board{n}") for n in range(args.boards)]
+    for n, folder in enumerate(folders):
+        make_gerber_set(folder, f"board{n}", args.layers, args.gerber_lines, rng)
+    layers = len(os.listdir(folders[0]))
+    size = sum(os.path.getsize(os.path.join(folder, name)) for folder in folders for name in os.listdir(folder))
+
+    def convert(*options):
+        output = tempfile.mkdtemp(dir=workdir)
+        subprocess.run(
+            [sys.executable, os.path.join(tool_dir, '2jlc.py'), *folders, '--output', output, *options],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+
+    info = {'boards': args.boards, 'layers_per_board': layers, 'bytes': size}
+    items = args.boards * layers
+    results = [
+        measure('gerber/convert jobs=1', lambda: convert('--jobs', '1'), args.repeat, items, **info),
+    ]
+    if args.jobs > 1:
+        results.append(measure(f'gerber/convert jobs={args.jobs}',
+                               lambda: convert('--jobs', str(args.jobs)), args.repeat, items, **info))
+    results.append(
+        measure('gerber/convert cache cold', lambda _: convert('--jobs', str(args.jobs), '--cache'), args.repeat,
+                items, setup=lambda: shutil.rmtree(os.path.join(tool_dir, '.jlc_cache'), ignore_errors=True), **info))
+    convert('--jobs', str(args.jobs), '--cache')  # 热缓存
+    results.append(measure('gerber/convert cache warm', lambda: convert('--jobs', str(args.jobs), '--cache'),
+                           args.repeat, items, **info))
+    return results
+
+def bench_crawler(args, base_url, workdir):
+    """download_form_yiqifuwu.py：页面解析，以及同步/异步/带HTTP缓存的抓取"""
+    crawler = load_module('download_form_yiqifuwu/download_form_yiqifuwu.py', 'download_form_yiqifuwu')
+    parse_bench = load_module('download_form_yiqifuwu/benchmark_parse.py', 'benchmark_parse')
+    crawler.REQUEST_DELAY = 0  # 替身服务器不需要防封延迟
+    crawler.MAX_ERRORS = 5  # 页面抓完后的 404 只请求几次
+
+    pages = [parse_bench.make_sample_page(n) for n in range(1, 21)]
+    results = [
+        measure('crawler/parse fast', lambda: [crawler.extract_title_and_viewer(html) for html in pages],
+                args.repeat, len(pages)),
+        measure('crawler/parse bs4', lambda: [crawler.extract_title_and_viewer_bs4(html) for html in pages],
+                args.repeat, len(pages)),
+    ]
+
+    output = os.path.join(workdir, 'viewer_urls.csv')
+
+    def crawl_sync(cache=None):
+        sink = crawler.CsvAppender(output)
+        crawler.crawl(sink.plan(), sink, base_url, cache)
+        sink.save()
+
+    def crawl_async(cache=None):
+        sink = crawler.CsvAppender(output)
+        asyncio.run(crawler.crawl_async(sink.plan(), sink, args.concurrency, 1e6, base_url, cache))
+        sink.save()
+
+    results.append(measure('crawler/crawl sync', crawl_sync, args.repeat, args.pages))
+    results.append(measure(f'crawler/crawl async concurrency={args.concurrency}', crawl_async, args.repeat, args.pages))
+
+    http_cache = load_module('download_form_yiqifuwu/http_cache.py', 'http_cache')
+    cache = http_cache.HttpCache(os.path.join(workdir, 'http_cache'))
+    with quiet():
+        crawl_async(cache)  # 先填充缓存，之后的请求都是 304
+    results.append(measure('crawler/crawl async http-cache warm', lambda: crawl_async(cache), args.repeat, args.pages))
+    cache.close()
+    return results
+
+def bench_downloader(args, base_url, workdir):
+    """download_form_csv.py：按CSV并发下载PDF"""
+    downloader = load_module('download_form_yiqifuwu/download_form_csv.py', 'download_form_csv')
+    csv_path = os.path.join(workdir, 'pdfs.csv')
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['page_num', 'page_url', 'viewer_url', 'title', 'status'])
+        writer.writeheader()
+        for n in range(1, args.files + 1):
+            writer.writerow({
+                'page_num': n,
+                'page_url': f"{base_url}/standard/{n}.html",
+                'viewer_url': f"{base_url}/statics/js/pdf/web/viewer.html?file=/uploadfile/file/{n}.pdf",
+                'title': f"GB/T {n}-2020 示例标准",
+                'status': 'success',
+            })
+
+    def download(output_folder, workers):
+        downloader.download_pdfs_from_csv(csv_path, output_folder, workers=workers, rate=1e6)
+
+    info = {'bytes': args.files * StandInHandler.pdf_size}
+    return [
+        measure(f'downloader/pdfs workers={workers}', lambda folder, workers=workers: download(folder, workers),
+                args.repeat, args.files, setup=lambda: tempfile.mkdtemp(dir=workdir), **info)
+        for workers in (1, downloader.WORKERS)
+    ]
+
+def bench_images(args, base_url, workdir):
+    """get-url-image.py 多页抓取和 git_image.py 并发下载图片"""
+    results = []
+    get_url_image = load_module('get-url-image/get-url-image.py', 'get_url_image')
+
+    def crawl(folder):
+        get_url_image.crawl(f"{base_url}/gallery/0.html", max_depth=args.pages, max_pages=args.pages,
+                            workers=args.concurrency, filename=os.path.join(folder, 'images.csv'))
+
+    results.append(measure(f'images/crawl workers={args.concurrency}', crawl, args.repeat, args.pages,
+                           setup=lambda: tempfile.mkdtemp(dir=workdir)))
+
+    git_image = load_module('get-url-image/git_image.py', 'git_image')
+
+    def image_csv():
+        folder = tempfile.mkdtemp(dir=workdir)
+        csv_path = os.path.join(folder, 'images.csv')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Image_URL'])
+            writer.writerows([f"{base_url}/images/{n}_0.jpg"] for n in range(args.files))
+        return csv_path
+
+    info = {'bytes': args.files * StandInHandler.image_size}
+    for workers in (1, git_image.WORKERS):
+        results.append(measure(f'images/download workers={workers}',
+                               lambda csv_path, workers=workers: git_image.download_images_from_csv(csv_path, workers),
+                               args.repeat, args.files, setup=image_csv, **info))
+    return results
+
+def bench_calculators(args, base_url, workdir):
+    """功率计算：逐点 Decimal 与 NumPy 批量计算的吞吐率，SEPIC扫描、选型和蒙特卡洛"""
+    import numpy as np
+
+    buck = load_module('power-cal/buck降压电感计算.py', 'buck降压电感计算')
+    boost = load_module('power-cal/BOOST升压电感计算.py', 'BOOST升压电感计算')
+    sepic = load_module('power-cal/SEPIC主要参数设计.py', 'SEPIC主要参数设计')
+    parts_catalog = load_module('power-cal/parts_catalog.py', 'parts_catalog')
+    monte_carlo = load_module('power-cal/monte_carlo.py', 'monte_carlo')
+
+    rng = np.random.default_rng(args.seed)
+    n, m = args.scalar_points, args.batch_points
+    buck_points = (rng.uniform(5, 24, m), rng.uniform(0.8, 3.3, m), rng.uniform(0.1, 3, m), rng.uniform(0.2, 3, m))
+    boost_points = (rng.uniform(2.5, 5, m), rng.uniform(5.5, 12, m), rng.uniform(0.1, 3, m), rng.uniform(0.2, 3, m))
+    sepic_points = (rng.uniform(4, 6, m), rng.uniform(8, 10, m), rng.uniform(5, 15, m), rng.uniform(0.1, 2, m),
+                    rng.uniform(100, 1000, m), rng.uniform(4.7, 47, m))
+
+    def scalar(func, points, convert=float):
+        for point in zip(*(column[:n].tolist() for column in points)):
+            func(*map(convert, point))
+
+    def sepic_scalar(vin_min, vin_max, vout, iout, fsw_khz, cs_uf):
+        sepic.calculate_sepic_parameters(vin_min, vin_min, vin_max, vout, iout, fsw_khz, cs_uf)
+
+    results = [
+        measure('calculators/buck scalar', lambda: scalar(buck.calculate_buck_inductance, buck_points), args.repeat, n),
+        measure('calculators/buck batch', lambda: buck.calculate_buck_inductance_batch(*buck_points), args.repeat, m),
+        measure('calculators/boost scalar', lambda: scalar(boost.calculate_boost_inductance, boost_points),
+                args.repeat, n),
+        measure('calculators/boost batch', lambda: boost.calculate_boost_inductance_batch(*boost_points),
+                args.repeat, m),
+        measure('calculators/sepic scalar', lambda: scalar(sepic_scalar, sepic_points, lambda x: Decimal(str(x))),
+                args.repeat, n),
+        measure('calculators/sepic batch', lambda: sepic.calculate_sepic_parameters_batch(*sepic_points),
+                args.repeat, m),
+    ]
+
+    sweep = dict(vin_min=5, vin_max=8.4, vout=12, iout=0.5, fsw_khz=np.linspace(100, 1000, 91), cs_uf=[4.7, 10, 22],
+                 ripple_ratio=np.linspace(0.2, 0.6, 21), rds_on=[0.05, 0.11, 0.2], qgd=[0.000004, 0.000008, 0.000012])
+    designs = sepic.sweep_sepic_designs(**sweep)
+    results.append(measure('calculators/sepic sweep + pareto',
+                           lambda: sepic.pareto_front(sepic.sweep_sepic_designs(**sweep)), args.repeat, len(designs)))
+
+    def select_parts():
+        catalog = parts_catalog.load_catalog(parts_catalog.EXAMPLE_DIR)  # 每次新建目录，包含冷缓存
+        for row in designs[:10000]:
+            parts_catalog.select_sepic_parts(row, catalog)
+
+    results.append(measure('calculators/parts selection', select_parts, args.repeat, min(len(designs), 10000)))
+
+    params = dict(vin=monte_carlo.uniform(5, 8.4), vin_max=8.4, vout=12, iout=0.5,
+                  fsw_khz=monte_carlo.tolerance(400, 0.05), cs_uf=monte_carlo.tolerance(22, 0.2),
+                  l_uh=monte_carlo.tolerance(22, 0.2), vd=monte_carlo.normal(0.35, 0.03),
+                  rds_on=monte_carlo.uniform(0.11, 0.176), qgd=monte_carlo.tolerance(0.000012, 0.1),
+                  igate=monte_carlo.tolerance(0.2, 0.1))
+    results.append(measure('calculators/sepic monte carlo workers=1',
+                           lambda: monte_carlo.run_monte_carlo('sepic', params, args.samples, args.seed, workers=1),
+                           args.repeat, args.samples))
+    return results
+
+BENCHMARKS = {
+    'gerber': bench_gerber,
+    'crawler': bench_crawler,
+    'downloader': bench_downloader,
+    'images': bench_images,
+    'calculators': bench_calculators,
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous_path, results):
+    """与之前保存的结果比较，>1 表示变快"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    before = {r['name']: r['seconds'] for r in previous['results'] if 'seconds' in r}
+    print(f"\n与 {previous_path}（{previous.get('commit')}）比较:")
+    for r in results:
+        if r['name'] in before and 'seconds' in r:
+            print(f"{r['name']:<48} {before[r['name']]:>9.4f} s -> {r['seconds']:>9.4f} s  "
+                  f"{before[r['name']] / r['seconds']:>6.2f}x")
+
+def main(args):
+    report = {
+        'commit': git_commit(),
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'options': {name: value for name, value in vars(args).items() if name not in ('output', 'compare')},
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as workdir, stand_in_server(args.latency, args.pages) as base_url:
+        for group in args.only or GROUPS:
+            try:
+                report['results'].extend(BENCHMARKS[group](args, base_url, tempfile.mkdtemp(dir=workdir)))
+            except ImportError as e:  # 缺少某个工具的依赖时跳过这一组
+                print(f"{group}: 跳过 - {e}")
+                report['results'].append({'name': group, 'skipped': str(e)})
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {args.output}")
+    if args.compare:
+        compare(args.compare, report['results'])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the converters, crawlers, downloaders and calculators')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, help='只运行这些组（默认全部）')
+    parser.add_argument('--output', default='benchmark_results.json', help='结果JSON文件')
+    parser.add_argument('--compare', help='与之前保存的结果JSON比较')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最短耗时')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据的随机种子')
+    parser.add_argument('--latency', type=float, default=0.01, help='替身服务器每个请求的延迟(秒)')
+    parser.add_argument('--pages', type=int, default=50, help='标准页面/图库页面数')
+    parser.add_argument('--files', type=int, default=40, help='下载的PDF/图片数')
+    parser.add_argument('--concurrency', type=int, default=8, help='异步抓取并发数、图库抓取线程数')
+    parser.add_argument('--boards', type=int, default=8, help='合成的Gerber板子数')
+    parser.add_argument('--layers', type=int, default=4, choices=range(2, 9), metavar='2-8', help='每块板子的铜层数')
+    parser.add_argument('--gerber-lines', type=int, default=20000, help='每层Gerber文件的绘图指令行数')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Gerber转换的并行进程数')
+    parser.add_argument('--scalar-points', type=int, default=2000, help='逐点计算的工作点数')
+    parser.add_argument('--batch-points', type=int, default=1_000_000, help='批量计算的工作点数')
+    parser.add_argument('--samples', type=int, default=1_000_000, help='蒙特卡洛抽样数')
+    main(parser.parse_args())
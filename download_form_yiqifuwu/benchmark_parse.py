@@ -0,0 +1,62 @@
+# 比较标准页面两种解析方式的耗时
+import argparse
+import glob
+import os
+import sys
+import time
+
+from download_form_yiqifuwu import extract_title_and_viewer, extract_title_and_viewer_bs4
+
+def make_sample_page(page_num, body_blocks=400):
+    """生成与标准页面结构类似的示例页面（没有保存的页面时使用）"""
+    filler = '<div class="item"><a href="/standard/1.html">GB/T 1094.1-2013 电力变压器</a></div>' * body_blocks
+    return (
+        f'<html><head><meta charset="utf-8"><title>GB/T {page_num}-2020 示例标准-宜器服务网</title></head>'
+        f'<body><div class="nav">{filler}</div>'
+        f'<iframe src="/statics/js/pdf/web/viewer.html?file=/uploadfile/file/{page_num}.pdf"></iframe>'
+        f'<div class="footer">{filler}</div></body></html>'
+    )
+
+def load_pages(folder):
+    """读取保存的页面，文件夹为空或未给出时使用示例页面"""
+    pages = []
+    if folder:
+        for path in sorted(glob.glob(os.path.join(folder, '*.html'))):
+            with open(path, mode='r', encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+    return pages or [make_sample_page(n) for n in range(1, 21)]
+
+def benchmark(func, pages, repeat):
+    """返回每页平均耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark standard page parsing')
+    parser.add_argument('folder', nargs='?', help='保存的标准页面(*.html)所在文件夹')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    args = parser.parse_args()
+
+    pages = load_pages(args.folder)
+
+    # 两种方式结果必须一致
+    mismatches = 0
+    for html in pages:
+        fast = extract_title_and_viewer(html)
+        full = extract_title_and_viewer_bs4(html)
+        if fast != full:
+            mismatches += 1
+            print(f"Mismatch: fast={fast} bs4={full}")
+
+    fast_ms = benchmark(extract_title_and_viewer, pages, args.repeat)
+    bs4_ms = benchmark(extract_title_and_viewer_bs4, pages, args.repeat)
+    print(f"Pages: {len(pages)}, repeat: {args.repeat}")
+    print(f"fast: {fast_ms:.3f} ms/page")
+    print(f"bs4:  {bs4_ms:.3f} ms/page")
+    print(f"speedup: {bs4_ms / fast_ms:.1f}x")
+
+    if mismatches:
+        sys.exit(f"{mismatches} 个页面两种解析方式的结果不一致")
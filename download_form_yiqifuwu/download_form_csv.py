@@ -4,8 +4,60 @@ import re
 import argparse
 import time
 import random
+import threading
+import hashlib
+import json
+import shutil
+import heapq
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urljoin, urlparse, parse_qs
+from urllib3.exceptions import ProtocolError
+
+WORKERS = 4  # 同时下载的文件数
+REQUESTS_PER_SECOND = 0.25  # 每个站点平均每秒请求数，防止被封
+CHUNK_SIZE = 64 * 1024  # 流式下载的块大小(字节)
+MIN_PDF_SIZE = 1024  # 小于该大小的文件视为错误页面
+MAX_RETRIES = 5  # 可重试错误的最多重试次数
+BACKOFF_BASE = 2  # 指数退避的基础等待(秒)
+BACKOFF_MAX = 120  # 单次退避的最长等待(秒)
+STORE_DIR = '.store'  # 输出文件夹下按内容哈希保存PDF的目录
+STORE_INDEX = 'store_index.json'  # 真实PDF URL -> 内容哈希
+
+class RetryableError(Exception):
+    """可以稍后重试的错误（429、5xx、超时、连接中断等）"""
+
+    def __init__(self, message, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retry_after = retry_after  # 服务器要求的等待秒数
+        self.throttled = throttled  # 服务器在限流，需要降速
+
+class PermanentError(Exception):
+    """重试也不会成功的错误（返回HTML页面、404等），直接记入失败列表"""
+
+def classify_error(e):
+    """把下载中出现的异常归为 RetryableError 或 PermanentError"""
+    if isinstance(e, (RetryableError, PermanentError)):
+        return e
+    if isinstance(e, (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                      requests.exceptions.ContentDecodingError, ProtocolError)):
+        return RetryableError(f"网络错误: {e}")
+    return PermanentError(str(e))
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（只支持秒数）"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None):
+    """第 attempt 次重试前的等待时间：指数退避 + 全抖动，服务器给出 Retry-After 时以它为下限"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
 
 def sanitize_filename(filename):
     filename = re.sub(r'[\\/*?:"<>|]', "_", filename)
@@ -24,12 +76,381 @@ def extract_real_pdf_url(viewer_url):
         return urljoin(f"{parsed.scheme}://{parsed.netloc}", query['file'][0])
     return None
 
-def download_pdfs_from_csv(csv_path, output_folder=None):
+class HostRateLimiter:
+    """
+    按站点限速：同一站点两次请求之间至少间隔 interval 秒，另加随机抖动
+
+    服务器限流时间隔加倍（最多 max_slowdown 倍），之后每次成功逐步恢复到 1/rate。
+    """
+
+    def __init__(self, rate, jitter=0.5, max_slowdown=16):
+        self.base_interval = 1 / rate
+        self.jitter = jitter
+        self.max_slowdown = max_slowdown
+        self.intervals = {}
+        self.next_time = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time.get(host, now))
+            interval = self.intervals.get(host, self.base_interval)
+            self.next_time[host] = start + interval * (1 + random.random() * self.jitter)
+        time.sleep(start - now)
+
+    def slow_down(self, url):
+        """服务器限流：该站点请求间隔加倍"""
+        host = urlparse(url).netloc
+        with self.lock:
+            interval = self.intervals.get(host, self.base_interval)
+            self.intervals[host] = min(interval * 2, self.base_interval * self.max_slowdown)
+
+    def speed_up(self, url):
+        """请求成功：该站点请求间隔逐步恢复"""
+        host = urlparse(url).netloc
+        with self.lock:
+            interval = self.intervals.get(host, self.base_interval)
+            self.intervals[host] = max(self.base_interval, interval * 0.9)
+
+def create_session(workers):
+    """创建所有下载线程共用的会话，连接池大小与线程数一致"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def load_part_meta(part_path):
+    """读取 .part 文件旁边记录的服务器文件信息（ETag/Last-Modified/总长度），没有时返回 None"""
+    try:
+        with open(part_path + '.json', mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_part_meta(part_path, headers):
+    """
+    开始下载新文件时记录服务器文件的校验信息，续传时用来确认服务器上还是同一个文件
+
+    内容经过压缩传输(Content-Encoding)时偏移无法对应，不记录，之后也不续传。
+    """
+    if headers.get('Content-Encoding', 'identity') != 'identity':
+        return
+    meta = {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'length': headers.get('Content-Length'),
+    }
+    with open(part_path + '.json', mode='w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def remove_part(part_path):
+    """删除未完成的文件和它的校验信息"""
+    for path in (part_path, part_path + '.json'):
+        if os.path.exists(path):
+            os.remove(path)
+
+def if_range_value(meta):
+    """If-Range 只能使用强 ETag，没有时用 Last-Modified"""
+    etag = meta.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return meta.get('last_modified')
+
+def content_range_matches(value, offset, meta):
+    """206 响应的 Content-Range 必须从 offset 开始，且总长度与开始下载时的 Content-Length 相同"""
+    match = re.fullmatch(r'bytes (\d+)-\d+/(\d+|\*)', (value or '').strip())
+    if not match or int(match.group(1)) != offset:
+        return False
+    total, length = match.group(2), meta.get('length')
+    return total == '*' or not length or total == length
+
+def read_chunks(response):
+    """
+    逐块读取响应内容
+
+    读取途中连接中断、内容被截断（ChunkedEncodingError、ContentDecodingError、底层 OSError 等）
+    都转为 RetryableError，下次从 .part 断点继续；写文件的错误不经过这里，不会被当成可重试。
+    """
+    try:
+        yield from response.iter_content(CHUNK_SIZE)
+    except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError,
+            requests.ConnectionError, ProtocolError, OSError) as e:
+        raise RetryableError(f"读取中断: {e}") from e
+
+def read_head(chunks, size=1024):
+    """从分块迭代器中读出开头至少 size 字节（不足时读到结束），用于检查文件类型"""
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head
+
+def download_pdf(session, limiter, viewer_url, save_path):
+    """
+    流式下载单个PDF，失败时抛出异常
+
+    先写入 save_path + '.part'，开头不是 %PDF 时立即中止；下载完成后才重命名为正式文件。
+    已有 .part 文件时用 Range 请求从断点继续，并带上 If-Range（开始下载时记录的 ETag/Last-Modified）：
+    服务器上的文件变了会返回完整的新文件；Content-Range 的总长度与原来不同时删除 .part 重新下载。
+    """
+    # 提取真实PDF URL
+    pdf_url = extract_real_pdf_url(viewer_url)
+    if not pdf_url:
+        raise PermanentError("无法从查看器URL中提取PDF链接")
+    
+    # 更真实的浏览器头信息
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Referer': viewer_url,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'same-origin',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0',
+    }
+    
+    # 添加必要的cookies
+    cookies = {
+        '__51vcke__JhsImm1MEoeBpCnP': 'd9d1698f-0544-54d9-97ed-fd7607439670',
+        '__51vuft__JhsImm1MEoeBpCnP': str(int(time.time() * 1000)),
+        'Hm_lvt_7dd17b942bff8da009982725a8ea9474': '1743147609,1743148284',
+        '__51uvsct__JhsImm1MEoeBpCnP': '3'
+    }
+    
+    # 断点续传：已有的 .part 文件开头必须是 PDF，且记录了服务器文件的校验信息，否则丢弃重新下载
+    part_path = save_path + '.part'
+    offset = 0
+    meta = load_part_meta(part_path)
+    if os.path.exists(part_path) and meta and if_range_value(meta):
+        with open(part_path, 'rb') as f:
+            if validate_pdf(f.read(4)):
+                offset = os.path.getsize(part_path)
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        headers['If-Range'] = if_range_value(meta)
+    # 按原始字节下载，断点的偏移才能与服务器上的文件对应
+    headers['Accept-Encoding'] = 'identity'
+    
+    limiter.wait(pdf_url)
+    
+    with session.get(
+        pdf_url,
+        headers=headers,
+        cookies=cookies,
+        stream=True,
+        timeout=60
+    ) as response:
+        if offset and response.status_code == 416:
+            # Content-Range: bytes */总长度 与已下载长度相同时，.part 其实已经完整
+            if response.headers.get('Content-Range') != f'bytes */{offset}' or meta.get('length') not in (None, str(offset)):
+                remove_part(part_path)
+                raise RetryableError("断点续传失败(HTTP 416)，已删除未完成文件")
+            mode = None
+        elif response.status_code == 206 and offset:
+            if not content_range_matches(response.headers.get('Content-Range'), offset, meta):
+                remove_part(part_path)
+                raise RetryableError("服务器上的文件已改变，已删除未完成文件")
+            mode = 'ab'
+        elif response.status_code == 200:
+            offset = 0  # 服务器不支持续传或文件已改变(If-Range 不匹配)，从头开始
+            mode = 'wb'
+        else:
+            message = f"HTTP状态码: {response.status_code}"
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RetryableError(
+                    message,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                    throttled=response.status_code in (429, 503),
+                )
+            raise PermanentError(message)
+        
+        if mode is not None:
+            chunks = read_chunks(response)
+            head = read_head(chunks)
+            
+            # 从头下载时，根据第一块内容立即判断是否为PDF
+            if offset == 0 and not validate_pdf(head):
+                if b'<html' in head[:1024].lower():
+                    raise PermanentError("服务器返回了HTML页面而非PDF文件")
+                raise PermanentError("下载的文件不是有效的PDF格式")
+            
+            if mode == 'wb':
+                remove_part(part_path)
+                save_part_meta(part_path, response.headers)
+            with open(part_path, mode) as f:
+                f.write(head)
+                for chunk in chunks:
+                    f.write(chunk)
+    
+    file_size = os.path.getsize(part_path)
+    if file_size < MIN_PDF_SIZE:
+        remove_part(part_path)
+        raise PermanentError(f"文件过小({file_size}字节)，可能是错误页面")
+    
+    os.replace(part_path, save_path)
+    remove_part(part_path)  # 只剩校验信息
+    return file_size
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_file(src, dst):
+    """把仓库中的文件链接到标题文件名：优先硬链接，不支持时复制"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def link_entry(blob, entry, pdf_url, failed_downloads):
+    """链接一个标题文件，失败时记入 failed_downloads 并返回 False，不影响其它文件"""
+    raw_title, title, _, save_path = entry
+    try:
+        link_file(blob, save_path)
+        return True
+    except OSError as e:
+        print(f"保存失败: {title} - 错误: {e}")
+        failed_downloads.append({'title': raw_title, 'url': pdf_url, 'error': f"保存失败: {e}"})
+        return False
+
+class PdfStore:
+    """
+    按内容去重的PDF仓库
+
+    文件以 SHA-256 命名保存在 STORE_DIR 中，只存一份；标题文件是指向它的链接。
+    索引记录每个真实PDF URL 对应的哈希，已下载过的 URL 不再请求。
+    """
+
+    def __init__(self, output_folder):
+        self.store_dir = os.path.join(output_folder, STORE_DIR)
+        self.index_path = os.path.join(self.store_dir, STORE_INDEX)
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.urls = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, mode='r', encoding='utf-8') as f:
+                self.urls = json.load(f)
+
+    def blob_path(self, sha):
+        return os.path.join(self.store_dir, f"{sha}.pdf")
+
+    def download_path(self, pdf_url):
+        """下载中的临时文件名，由 URL 决定，中断后可以续传"""
+        return os.path.join(self.store_dir, hashlib.sha256(pdf_url.encode('utf-8')).hexdigest() + '.download')
+
+    def lookup(self, pdf_url):
+        """URL 已下载过且文件还在时返回仓库中的路径"""
+        sha = self.urls.get(pdf_url)
+        if sha and os.path.exists(self.blob_path(sha)):
+            return self.blob_path(sha)
+        return None
+
+    def add(self, pdf_url, downloaded_path):
+        """把下载好的文件按哈希放入仓库，内容重复时丢弃新文件"""
+        sha = file_sha256(downloaded_path)
+        blob = self.blob_path(sha)
+        if os.path.exists(blob):
+            os.remove(downloaded_path)
+        else:
+            os.replace(downloaded_path, blob)
+        self.urls[pdf_url] = sha
+        return blob
+
+    def save(self):
+        """原子写入索引"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(self.urls, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+def run_download_queue(session, limiter, store, pending, workers, failed_downloads):
+    """
+    调度下载：可重试的错误按指数退避放回队列，永久错误直接记入 failed_downloads
+
+    服务器限流(429/503)时该站点降速，同时并发数减半；之后每次成功并发数加一，直到 workers。
+    """
+    ready = list(pending)  # 可以立即下载的 URL
+    delayed = []  # (可重试的时间, URL)
+    attempts = {pdf_url: 0 for pdf_url in pending}
+    allowed = workers  # 当前允许的并发数
+    in_flight = {}
+    done_count = 0
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while ready or delayed or in_flight:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                ready.append(heapq.heappop(delayed)[1])
+            
+            while ready and len(in_flight) < allowed:
+                pdf_url = ready.pop(0)
+                viewer_url = pending[pdf_url][0][2]
+                future = executor.submit(download_pdf, session, limiter, viewer_url, store.download_path(pdf_url))
+                in_flight[future] = pdf_url
+            
+            timeout = max(0.0, delayed[0][0] - now) if delayed else None
+            if not in_flight:
+                time.sleep(timeout)
+                continue
+            
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pdf_url = in_flight.pop(future)
+                entries = pending[pdf_url]
+                try:
+                    file_size = future.result()
+                    blob = store.add(pdf_url, store.download_path(pdf_url))
+                except Exception as e:
+                    error = classify_error(e)
+                    if isinstance(error, RetryableError) and attempts[pdf_url] < MAX_RETRIES:
+                        if error.throttled:
+                            limiter.slow_down(pdf_url)
+                            allowed = max(1, allowed // 2)
+                        delay = backoff_delay(attempts[pdf_url], error.retry_after)
+                        attempts[pdf_url] += 1
+                        heapq.heappush(delayed, (time.monotonic() + delay, pdf_url))
+                        print(f"稍后重试({attempts[pdf_url]}/{MAX_RETRIES}, {delay:.1f}s): {pdf_url} - {error}")
+                        continue
+                    
+                    done_count += 1
+                    if isinstance(error, RetryableError):
+                        error = PermanentError(f"重试{MAX_RETRIES}次后仍失败: {error}")
+                    for raw_title, title, _, _ in entries:
+                        print(f"[{done_count}/{len(pending)}] 下载失败: {title} - 错误: {str(error)}")
+                        failed_downloads.append({
+                            'title': raw_title,  # 使用原始标题而不是处理过的标题
+                            'url': pdf_url,
+                            'error': str(error)
+                        })
+                    continue
+                
+                done_count += 1
+                limiter.speed_up(pdf_url)
+                allowed = min(workers, allowed + 1)
+                for entry in entries:
+                    if link_entry(blob, entry, pdf_url, failed_downloads):
+                        print(f"[{done_count}/{len(pending)}] 下载成功: {entry[1]} ({file_size/1024:.1f} KB)")
+
+def download_pdfs_from_csv(csv_path, output_folder=None, workers=WORKERS, rate=REQUESTS_PER_SECOND):
     if output_folder is None:
         output_folder = os.path.splitext(os.path.basename(csv_path))[0]  # 修正：使用basename而不是splename
     
     os.makedirs(output_folder, exist_ok=True)
     failed_downloads = []
+    by_url = {}  # 真实PDF URL -> [(原始标题, 文件名, 查看器URL, 保存路径)]
+    claimed = set()  # 本次已分配的保存路径
     
     with open(csv_path, mode='r', encoding='utf-8') as csv_file:
         csv_reader = csv.DictReader(csv_file)
@@ -43,80 +464,36 @@ def download_pdfs_from_csv(csv_path, output_folder=None):
             title = sanitize_filename(raw_title) + '.pdf'
             save_path = os.path.join(output_folder, title)
             
-            if os.path.exists(save_path):
+            if os.path.exists(save_path) or save_path in claimed:
                 print(f"文件已存在，跳过: {title}")
                 continue
-                
-            print(f"正在处理: {title}")
+            claimed.add(save_path)
             
-            try:
-                # 提取真实PDF URL
-                pdf_url = extract_real_pdf_url(viewer_url)
-                if not pdf_url:
-                    raise Exception("无法从查看器URL中提取PDF链接")
-                
-                # 更真实的浏览器头信息
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Referer': viewer_url,
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-Site': 'same-origin',
-                    'Sec-Fetch-User': '?1',
-                    'Cache-Control': 'max-age=0',
-                }
-                
-                # 添加必要的cookies
-                cookies = {
-                    '__51vcke__JhsImm1MEoeBpCnP': 'd9d1698f-0544-54d9-97ed-fd7607439670',
-                    '__51vuft__JhsImm1MEoeBpCnP': str(int(time.time() * 1000)),
-                    'Hm_lvt_7dd17b942bff8da009982725a8ea9474': '1743147609,1743148284',
-                    '__51uvsct__JhsImm1MEoeBpCnP': '3'
-                }
-                
-                time.sleep(3 + random.random() * 2)
-                
-                session = requests.Session()
-                response = session.get(
-                    pdf_url,
-                    headers=headers,
-                    cookies=cookies,
-                    stream=True,
-                    timeout=60
-                )
-                
-                if response.status_code != 200:
-                    raise Exception(f"HTTP状态码: {response.status_code}")
-                
-                content = response.content
-                
-                if not validate_pdf(content):
-                    if b'<html' in content[:1024].lower():
-                        raise Exception("服务器返回了HTML页面而非PDF文件")
-                    raise Exception("下载的文件不是有效的PDF格式")
-                
-                with open(save_path, 'wb') as f:
-                    f.write(content)
-                    
-                file_size = os.path.getsize(save_path)
-                if file_size < 1024:
-                    os.remove(save_path)
-                    raise Exception(f"文件过小({file_size}字节)，可能是错误页面")
-                
-                print(f"下载成功: {title} ({file_size/1024:.1f} KB)")
-                    
-            except Exception as e:
-                print(f"下载失败: {title} - 错误: {str(e)}")
-                failed_downloads.append({
-                    'title': raw_title,  # 使用原始标题而不是处理过的标题
-                    'url': pdf_url if 'pdf_url' in locals() else viewer_url,
-                    'error': str(e)
-                })
+            pdf_url = extract_real_pdf_url(viewer_url)
+            if not pdf_url:
+                failed_downloads.append({'title': raw_title, 'url': viewer_url, 'error': "无法从查看器URL中提取PDF链接"})
+                continue
+            by_url.setdefault(pdf_url, []).append((raw_title, title, viewer_url, save_path))
+    
+    # 同一个PDF只下载一次，之前下载过的直接链接
+    store = PdfStore(output_folder)
+    pending = {}
+    for pdf_url, entries in by_url.items():
+        blob = store.lookup(pdf_url)
+        if blob:
+            for entry in entries:
+                if link_entry(blob, entry, pdf_url, failed_downloads):
+                    print(f"已在仓库中，链接: {entry[1]}")
+        else:
+            pending[pdf_url] = entries
+    
+    session = create_session(workers)
+    limiter = HostRateLimiter(rate)
+    
+    try:
+        run_download_queue(session, limiter, store, pending, workers, failed_downloads)
+    finally:
+        store.save()
     
     if failed_downloads:
         failed_csv_path = os.path.join(output_folder, 'failed_downloads.csv')
@@ -131,6 +508,8 @@ def download_pdfs_from_csv(csv_path, output_folder=None):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Download PDFs from CSV file')
     parser.add_argument('csv_file', help='Path to the CSV file')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='同时下载的文件数')
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='每个站点平均每秒请求数')
     args = parser.parse_args()
     
-    download_pdfs_from_csv(args.csv_file)
\ No newline at end of file
+    download_pdfs_from_csv(args.csv_file, workers=args.workers, rate=args.rate)
\ No newline at end of file
@@ -1,113 +1,457 @@
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import time
 from urllib.parse import urljoin
+from html.parser import HTMLParser
 import os
+import re
+import csv
+import argparse
+import asyncio
+import signal
+import sys
+
+from http_cache import HttpCache, cached_session
 
 # 常量设置
 BASE_URL = "https://www.yiqifuwu.com"
 START_PAGE = 1
 MAX_ERRORS = 30
 REQUEST_DELAY = 1  # 请求间隔时间(秒)，防止被封
+CONCURRENCY = 8  # 异步模式同时进行的请求数
+REQUESTS_PER_SECOND = 2  # 异步模式平均每秒请求数，防止被封
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 OUTPUT_FILE = 'yiqifuwu_pdf_viewer_urls.csv'
+CSV_FIELDS = ['page_num', 'page_url', 'viewer_url', 'title', 'status']
+SAVE_EVERY = 20  # 恢复模式每抓取多少页写回一次CSV
+FLUSH_ROWS = 50  # 完整抓取模式缓冲多少行写一次文件
+FLUSH_SECONDS = 10  # 完整抓取模式最长多少秒写一次文件
+VIEWER_MARK = 'viewer.html?file='
+PARSER = 'fast'  # 页面解析方式: fast(只扫描需要的标签) / bs4(BeautifulSoup 完整解析)
+
+class StandardPageParser(HTMLParser):
+    """只找 <title> 和查看器 iframe 的轻量解析器，两者都找到后立即停止解析"""
+
+    class Done(Exception):
+        pass
+
+    def __init__(self, need_iframe=True):
+        super().__init__()
+        self.title = None
+        self.viewer_path = None
+        self.need_iframe = need_iframe
+        self.in_title = False
+        self.title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self.in_title = True
+        elif tag == 'iframe' and self.viewer_path is None:
+            src = dict(attrs).get('src')
+            if src and VIEWER_MARK in src:
+                self.viewer_path = src
+                self.check_done()
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            self.title = ''.join(self.title_parts)
+            self.check_done()
+
+    def check_done(self):
+        if self.title is not None and (self.viewer_path is not None or not self.need_iframe):
+            raise self.Done()
+
+# 注释、<script>、<style> 中的文字不是标签，其中的 VIEWER_MARK 要跳过
+NON_TAG_SECTION = re.compile(r'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1|\Z)', re.S | re.I)
+
+def in_non_tag_section(html, pos):
+    """pos 是否在注释、<script> 或 <style> 中（只扫描 pos 之前的部分）"""
+    return any(section.start() < pos < section.end() for section in NON_TAG_SECTION.finditer(html, 0, pos + 1))
+
+def extract_title_and_viewer(html):
+    """
+    快速提取 (标题, 查看器路径)，结果与 extract_title_and_viewer_bs4 相同
 
-def get_pdf_viewer_url(page_num):
-    """从标准页面获取PDF查看器URL和标题"""
-    url = f"{BASE_URL}/standard/{page_num}.html"
+    标题只解析到 </title>；查看器直接定位到包含 VIEWER_MARK 的 iframe 标签再解析该标签，
+    跳过注释和脚本中的文字，页面其余部分不解析。
+    """
+    parser = StandardPageParser(need_iframe=False)
+    title_end = html.find('</title>')
     try:
-        # 发送HTTP请求获取页面内容
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()  # 如果状态码不是200则抛出异常
-        
-        # 解析HTML内容
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 查找包含PDF查看器的iframe标签
-        iframe = soup.find('iframe', src=lambda x: x and 'viewer.html?file=' in x)
-        
-        # 获取页面标题并清理
-        title = soup.title.string if soup.title else ""
-        cleaned_title = title.replace("-宜器服务网", "").strip()
-        
-        if iframe:
-            # 构建完整的URL
-            viewer_path = iframe['src']
-            full_viewer_url = urljoin(BASE_URL, viewer_path)
-            return {
-                'page_num': page_num,
-                'page_url': url,
-                'viewer_url': full_viewer_url,
-                'title': cleaned_title,
-                'status': 'success'
-            }
-        else:
-            return {
-                'page_num': page_num,
-                'page_url': url,
-                'viewer_url': None,
-                'title': cleaned_title,
-                'status': 'no_iframe_found'
-            }
-            
-    except Exception as e:
+        parser.feed(html if title_end < 0 else html[:title_end + len('</title>')])
+        parser.close()
+    except StandardPageParser.Done:
+        pass
+    # 与 BeautifulSoup 的 soup.title.string 一致：没有 <title> 时为 ""，<title> 为空时为 None
+    if parser.title is None and not parser.in_title:
+        title = ""
+    else:
+        title = ''.join(parser.title_parts) or None
+
+    viewer_path = None
+    mark = html.find(VIEWER_MARK)
+    while mark >= 0 and viewer_path is None:
+        tag_start = html.rfind('<', 0, mark)
+        tag_end = html.find('>', mark)
+        if (tag_start >= 0 and tag_end >= 0 and html[tag_start:tag_start + len('<iframe')].lower() == '<iframe'
+                and not in_non_tag_section(html, tag_start)):
+            tag_parser = StandardPageParser()
+            tag_parser.feed(html[tag_start:tag_end + 1])
+            viewer_path = tag_parser.viewer_path
+        mark = html.find(VIEWER_MARK, mark + 1)
+    return title, viewer_path
+
+def extract_title_and_viewer_bs4(html):
+    """用 BeautifulSoup 完整解析页面提取 (标题, 查看器路径)"""
+    # 解析HTML内容
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # 查找包含PDF查看器的iframe标签
+    iframe = soup.find('iframe', src=lambda x: x and VIEWER_MARK in x)
+    
+    # 获取页面标题
+    title = soup.title.string if soup.title else ""
+    return title, iframe['src'] if iframe else None
+
+def parse_standard_page(page_num, url, html, base_url=BASE_URL):
+    """解析标准页面，返回PDF查看器URL和标题"""
+    if PARSER == 'fast':
+        try:
+            title, viewer_path = extract_title_and_viewer(html)
+        except Exception:
+            # 快速解析失败时退回 BeautifulSoup
+            title, viewer_path = extract_title_and_viewer_bs4(html)
+    else:
+        title, viewer_path = extract_title_and_viewer_bs4(html)
+    
+    # 清理标题（<title> 为空时两种解析方式都返回 None）
+    cleaned_title = (title or "").replace("-宜器服务网", "").strip()
+    
+    if viewer_path:
+        # 构建完整的URL
+        full_viewer_url = urljoin(base_url, viewer_path)
+        return {
+            'page_num': page_num,
+            'page_url': url,
+            'viewer_url': full_viewer_url,
+            'title': cleaned_title,
+            'status': 'success'
+        }
+    else:
         return {
             'page_num': page_num,
             'page_url': url,
             'viewer_url': None,
-            'title': "",
-            'status': f'error: {str(e)}'
+            'title': cleaned_title,
+            'status': 'no_iframe_found'
         }
 
-def save_to_csv(data, filename, is_first_page=False):
-    """将数据保存到CSV文件"""
-    df = pd.DataFrame([data])
-    
-    # 如果是第一页且文件不存在，写入header；否则追加数据
-    if is_first_page or not os.path.exists(filename):
-        df.to_csv(filename, index=False, mode='w')
+def error_result(page_num, url, e):
+    """请求或解析失败时的结果"""
+    return {
+        'page_num': page_num,
+        'page_url': url,
+        'viewer_url': None,
+        'title': "",
+        'status': f'error: {str(e)}'
+    }
+
+def get_pdf_viewer_url(page_num, base_url=BASE_URL, session=None):
+    """从标准页面获取PDF查看器URL和标题（给出 session 时复用其连接和缓存）"""
+    url = f"{base_url}/standard/{page_num}.html"
+    try:
+        # 发送HTTP请求获取页面内容
+        response = (session or requests).get(url, headers=HEADERS, timeout=10)
+        response.raise_for_status()  # 如果状态码不是200则抛出异常
+        
+        return parse_standard_page(page_num, url, response.text, base_url)
+            
+    except Exception as e:
+        return error_result(page_num, url, e)
+
+class TokenBucket:
+    """令牌桶限速器：平均每秒 rate 个请求，最多允许 burst 个突发请求"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取一个令牌，没有令牌时等待"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def get_pdf_viewer_url_async(session, limiter, page_num, base_url=BASE_URL, cache=None):
+    """
+    异步版 get_pdf_viewer_url，复用 session 的连接池，返回相同格式的结果
+
+    给出 cache（HttpCache）时有效期内的页面不发请求，其余页面发条件请求，304 时使用缓存的内容。
+    """
+    url = f"{base_url}/standard/{page_num}.html"
+    try:
+        entry = cache.get(url) if cache else None
+        if entry and cache.is_fresh(entry):
+            cache.count('hit')
+            return parse_standard_page(page_num, url, cache.text(entry), base_url)
+
+        await limiter.acquire()
+        headers = cache.conditional_headers(entry) if entry else None
+        async with session.get(url, headers=headers) as response:
+            if entry and response.status == 304:
+                cache.count('not_modified')
+                html = cache.text(cache.refresh(url, entry, response.headers))
+            else:
+                response.raise_for_status()
+                html = await response.text()
+                if cache:
+                    cache.count('miss')
+                    cache.store(url, response.status, response.headers, await response.read())
+        return parse_standard_page(page_num, url, html, base_url)
+    except Exception as e:
+        return error_result(page_num, url, e)
+
+def is_error(page_data):
+    """错误状态(非成功且非无iframe)"""
+    return page_data['status'] != 'success' and page_data['status'] != 'no_iframe_found'
+
+def print_page_result(page_data):
+    """打印当前状态"""
+    if page_data['viewer_url']:
+        print(f"Found viewer URL: {page_data['viewer_url']}")
+        print(f"Title: {page_data['title']}")
     else:
-        df.to_csv(filename, index=False, mode='a', header=False)
+        print(f"No viewer found or error: {page_data['status']}")
 
-def main():
-    error_count = 0
-    current_page = START_PAGE
-    
-    # 创建或清空输出文件
-    if os.path.exists(OUTPUT_FILE):
-        os.remove(OUTPUT_FILE)
-    
-    # 当错误计数小于最大允许错误时继续循环
-    while error_count < MAX_ERRORS:
-        print(f"Processing page {current_page}...")
+class CrawlPlan:
+    """
+    决定下一个要抓取的页码以及何时停止
+
+    先重试 retry_pages，再从 start_page 往后抓新页面。新页面的错误数达到
+    MAX_ERRORS 后停止；consecutive 为 True 时只统计连续错误（遇到成功页面清零）。
+    """
+
+    def __init__(self, start_page=START_PAGE, retry_pages=(), consecutive=False):
+        self.retry_pages = list(retry_pages)
+        self.next_new_page = start_page
+        self.start_page = start_page
+        self.consecutive = consecutive
+        self.error_count = 0
+
+    def next_page(self):
+        """返回下一个页码，没有可抓的页面时返回 None"""
+        if self.retry_pages:
+            return self.retry_pages.pop(0)
+        if self.error_count >= MAX_ERRORS:
+            return None
+        page_num = self.next_new_page
+        self.next_new_page += 1
+        return page_num
+
+    def record(self, page_data):
+        """记录一页的结果，更新错误计数"""
+        if page_data['page_num'] < self.start_page:  # 重试的页面不影响停止条件
+            return
+        if is_error(page_data):
+            self.error_count += 1
+        elif self.consecutive:
+            self.error_count = 0
+
+class CsvAppender:
+    """
+    完整抓取模式：清空输出文件，按页码顺序写入
+
+    行先放在缓冲区，每 FLUSH_ROWS 行或 FLUSH_SECONDS 秒写一次文件，
+    结束或中断时由 save 写出剩余内容。
+    """
+
+    def __init__(self, filename, start_page=START_PAGE):
+        self.filename = filename
+        self.start_page = start_page
+        self.write_page = start_page
+        self.finished = {}  # 已完成但还没轮到写入的页面
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+        # 创建或清空输出文件
+        self.file = open(filename, mode='w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def plan(self):
+        return CrawlPlan(self.start_page)
+
+    def add(self, page_data):
+        self.finished[page_data['page_num']] = page_data
+        while self.write_page in self.finished:
+            self.buffer.append(self.finished.pop(self.write_page))
+            self.write_page += 1
+        if len(self.buffer) >= FLUSH_ROWS or time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.buffer)
+        self.buffer.clear()
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def save(self):
+        # 中断时剩下的乱序页面也写进去
+        self.buffer.extend(self.finished[n] for n in sorted(self.finished))
+        self.finished.clear()
+        self.flush()
+        self.file.close()
+
+class CsvIndex:
+    """
+    恢复/增量模式：读入已有CSV，按页码在内存中更新，定期整体原子写回
+
+    写回时先写临时文件再重命名，中途崩溃也不会损坏已有的索引。
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows = {}
+        self.unsaved = 0
+        if os.path.exists(filename):
+            with open(filename, mode='r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    self.rows[int(row['page_num'])] = row
+
+    def plan(self):
+        """跳过已成功的页面，重试最后一个正常页面之前的错误页面，再从其后继续抓新页面"""
+        ok_pages = [n for n, row in self.rows.items() if not is_error(row)]
+        last_ok = max(ok_pages, default=START_PAGE - 1)
+        retry_pages = sorted(n for n, row in self.rows.items() if is_error(row) and n < last_ok)
+        print(f"Resuming: {len(ok_pages)} pages done, {len(retry_pages)} to retry, new pages from {last_ok + 1}")
+        return CrawlPlan(last_ok + 1, retry_pages, consecutive=True)
+
+    def add(self, page_data):
+        self.rows[page_data['page_num']] = page_data
+        self.unsaved += 1
+        if self.unsaved >= SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        tmp_path = self.filename + '.tmp'
+        with open(tmp_path, mode='w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for page_num in sorted(self.rows):
+                writer.writerow(self.rows[page_num])
+        os.replace(tmp_path, self.filename)
+        self.unsaved = 0
+
+def crawl(plan, sink, base_url=BASE_URL, cache=None):
+    """逐页抓取，每页之间固定延迟；给出 cache（HttpCache）时使用磁盘HTTP缓存"""
+    session = cached_session(cache) if cache else requests.Session()
+    while True:
+        page_num = plan.next_page()
+        if page_num is None:
+            break
+        print(f"Processing page {page_num}...")
         
         # 获取当前页面的数据
-        page_data = get_pdf_viewer_url(current_page)
-        
-        # 如果是错误状态(非成功且非无iframe)，增加错误计数
-        if page_data['status'] != 'success' and page_data['status'] != 'no_iframe_found':
-            error_count += 1
+        page_data = get_pdf_viewer_url(page_num, base_url, session)
+        plan.record(page_data)
         
-        # 立即保存结果到CSV
-        save_to_csv(page_data, OUTPUT_FILE, is_first_page=(current_page == START_PAGE))
+        # 立即保存结果
+        sink.add(page_data)
         
         # 打印当前状态
-        if page_data['viewer_url']:
-            print(f"Found viewer URL: {page_data['viewer_url']}")
-            print(f"Title: {page_data['title']}")
-        else:
-            print(f"No viewer found or error: {page_data['status']}")
-        
-        # 移动到下一页
-        current_page += 1
+        print_page_result(page_data)
         
         # 延迟以防止被封
         time.sleep(REQUEST_DELAY)
+
+async def crawl_async(plan, sink, concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND, base_url=BASE_URL, cache=None):
+    """
+    异步抓取：保持 concurrency 个请求同时进行，令牌桶控制请求速率
+
+    plan 决定停止后不再发起新请求，已发出的请求仍会完成并保存。
+    """
+    import aiohttp  # 只有异步模式需要
+
+    limiter = TokenBucket(rate, burst=concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=10)
+    in_flight = set()
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout) as session:
+        while True:
+            # 补满并发窗口
+            while len(in_flight) < concurrency:
+                page_num = plan.next_page()
+                if page_num is None:
+                    break
+                print(f"Processing page {page_num}...")
+                in_flight.add(asyncio.create_task(
+                    get_pdf_viewer_url_async(session, limiter, page_num, base_url, cache)
+                ))
+            if not in_flight:
+                break
+
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page_data = task.result()
+                plan.record(page_data)
+                sink.add(page_data)
+                print_page_result(page_data)
+
+def main(use_async=False, concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND, base_url=BASE_URL, resume=False,
+         http_cache=False):
+    if resume:
+        sink = CsvIndex(OUTPUT_FILE)
+    else:
+        sink = CsvAppender(OUTPUT_FILE, START_PAGE)
+    plan = sink.plan()
+    cache = HttpCache() if http_cache else None
+
+    try:
+        if use_async:
+            asyncio.run(crawl_async(plan, sink, concurrency, rate, base_url, cache))
+        else:
+            crawl(plan, sink, base_url, cache)
+    finally:
+        # 中断时也保存已抓取的结果
+        sink.save()
+        if cache:
+            print(cache.summary())
+            cache.close()
     
     print(f"Completed. Results saved to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Collect PDF viewer URLs from yiqifuwu standard pages')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='异步并发抓取')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='异步模式同时进行的请求数')
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help='异步模式平均每秒请求数')
+    parser.add_argument('--base-url', default=BASE_URL, help='站点地址（可指向本地测试服务器）')
+    parser.add_argument('--resume', action='store_true', help='在已有CSV基础上继续：跳过成功页面，重试错误页面，抓取新页面')
+    parser.add_argument('--parser', choices=['fast', 'bs4'], default=PARSER, help='页面解析方式')
+    parser.add_argument('--http-cache', action='store_true', help='使用共享的磁盘HTTP缓存，未修改的页面只需一次304请求')
+    args = parser.parse_args()
+
+    # 解析方式和信号处理只在命令行运行时设置，导入本模块调用 crawl 等函数不会改变进程状态
+    PARSER = args.parser
+    # 被 kill 时也走 main 的 finally 保存结果
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+
+    main(use_async=args.use_async, concurrency=args.concurrency, rate=args.rate,
+         base_url=args.base_url, resume=args.resume, http_cache=args.http_cache)
\ No newline at end of file
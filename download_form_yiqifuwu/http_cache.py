@@ -0,0 +1,254 @@
+"""
+几个爬虫共用的磁盘HTTP缓存
+
+缓存过的页面再次请求时带上 If-None-Match/If-Modified-Since，服务器返回 304 时直接使用缓存的内容；
+遵守 Cache-Control：no-store 不缓存，no-cache 每次都验证，max-age（或 Expires）有效期内不发请求。
+缓存总大小超过上限时按最近最少使用(LRU)删除。
+
+只缓存网页等文本内容；PDF、图片等文件由各工具自己保存和去重，流式下载(stream=True)也不经过缓存。
+
+requests 会话用 cached_session / CachingAdapter 接入，其它客户端（如 aiohttp）直接调用 HttpCache 的方法。
+
+本模块只有这一份：download_form_yiqifuwu 中的脚本直接 import，get-url-image 按路径导入；
+两个工具使用同一个缓存目录。
+"""
+import os
+import time
+import json
+import hashlib
+import sqlite3
+import threading
+import email.utils
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'python-code-http')
+MAX_CACHE_BYTES = 512 * 1024 * 1024  # 缓存总大小上限(字节)
+MAX_ENTRY_BYTES = 32 * 1024 * 1024  # 单个响应超过该大小不缓存
+# 不随内容保存的响应头（保存的内容已经解压，逐跳头和 Cookie 不应重放）
+SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'set-cookie'}
+# 只缓存这些类型的内容（Content-Type 的开头）
+CACHEABLE_TYPES = ('text/', 'application/json', 'application/xml', 'application/xhtml+xml')
+# 304 响应中用来更新缓存的响应头
+REFRESH_HEADERS = ('Cache-Control', 'Expires', 'Date', 'ETag', 'Last-Modified')
+
+def parse_cache_control(value):
+    """把 Cache-Control 头解析成 {指令: 值}，没有值的指令对应 True"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') or True
+    return directives
+
+def expires_at(headers, now=None):
+    """根据 Cache-Control/Expires 计算内容过期的时间戳，每次都需要验证时返回 0"""
+    now = time.time() if now is None else now
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-cache' in directives:
+        return 0
+    if 'max-age' in directives:
+        try:
+            return now + int(directives['max-age']) - int(headers.get('Age') or 0)
+        except ValueError:
+            return 0
+    if headers.get('Expires'):
+        try:
+            return email.utils.parsedate_to_datetime(headers['Expires']).timestamp()
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+def is_cacheable(status, headers):
+    """只缓存能够验证（有 ETag/Last-Modified）或仍在有效期内的 200 文本响应"""
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if status != 200 or 'no-store' in directives or headers.get('Vary') == '*':
+        return False
+    if not (headers.get('Content-Type') or '').lower().startswith(CACHEABLE_TYPES):
+        return False
+    return bool(headers.get('ETag') or headers.get('Last-Modified') or expires_at(headers) > time.time())
+
+class HttpCache:
+    """
+    磁盘HTTP缓存：内容按URL的哈希保存为文件，响应头、过期时间和最近使用时间记在 SQLite 索引中
+
+    可以在多个线程中共用。
+    """
+
+    def __init__(self, folder=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(folder, 'index.db'), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(url TEXT PRIMARY KEY, headers TEXT NOT NULL, expires REAL NOT NULL, size INTEGER NOT NULL, '
+            'last_used REAL NOT NULL)'
+        )
+        self.stats = {'hit': 0, 'not_modified': 0, 'miss': 0}
+
+    def body_path(self, url):
+        return os.path.join(self.folder, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def count(self, kind):
+        with self.lock:
+            self.stats[kind] += 1
+
+    def get(self, url):
+        """返回缓存的 {'headers', 'body', 'expires'}，没有缓存时返回 None"""
+        with self.lock:
+            row = self.conn.execute('SELECT headers, expires FROM entries WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self.body_path(url), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                # 内容文件被删掉了，索引也作废
+                with self.conn:
+                    self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE entries SET last_used = ? WHERE url = ?', (time.time(), url))
+        return {'headers': CaseInsensitiveDict(json.loads(row[0])), 'body': body, 'expires': row[1]}
+
+    def is_fresh(self, entry, request_headers=None):
+        """缓存仍在有效期内，且请求没有要求重新验证（Cache-Control: no-cache / max-age=0）"""
+        directives = parse_cache_control((request_headers or {}).get('Cache-Control'))
+        if 'no-cache' in directives or directives.get('max-age') == '0':
+            return False
+        return entry['expires'] > time.time()
+
+    def conditional_headers(self, entry):
+        """重新验证缓存时需要加上的请求头"""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def store(self, url, status, headers, body):
+        """保存可缓存的响应，返回是否保存；超出总大小时删除最久没用过的内容"""
+        if len(body) > MAX_ENTRY_BYTES or not is_cacheable(status, headers):
+            return False
+        saved = {name: value for name, value in headers.items() if name.lower() not in SKIP_HEADERS}
+        self.write(url, saved, body, expires_at(headers))
+        self.evict()
+        return True
+
+    def refresh(self, url, entry, headers):
+        """服务器返回 304：用新的有效期等响应头更新缓存，返回更新后的缓存"""
+        merged = CaseInsensitiveDict(entry['headers'])
+        for name in REFRESH_HEADERS:
+            if headers.get(name):
+                merged[name] = headers[name]
+        entry = {'headers': merged, 'body': entry['body'], 'expires': expires_at(merged)}
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE entries SET headers = ?, expires = ? WHERE url = ?',
+                (json.dumps(dict(merged)), entry['expires'], url),
+            )
+        return entry
+
+    def write(self, url, headers, body, expires):
+        path = self.body_path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        with self.lock:
+            os.replace(tmp_path, path)
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO entries (url, headers, expires, size, last_used) VALUES (?, ?, ?, ?, ?)',
+                    (url, json.dumps(dict(headers)), expires, len(body), time.time()),
+                )
+
+    def evict(self):
+        """按最近最少使用删除，直到总大小不超过 max_bytes"""
+        with self.lock:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self.conn.execute('SELECT url, size FROM entries ORDER BY last_used').fetchall()
+            with self.conn:
+                for url, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+                    try:
+                        os.remove(self.body_path(url))
+                    except OSError:
+                        pass
+                    total -= size
+
+    def text(self, entry):
+        """按响应头中的编码解码缓存的内容"""
+        encoding = get_encoding_from_headers(entry['headers']) or 'utf-8'
+        return entry['body'].decode(encoding, errors='replace')
+
+    def summary(self):
+        return (f"HTTP缓存: 命中 {self.stats['hit']}，未修改(304) {self.stats['not_modified']}，"
+                f"重新下载 {self.stats['miss']}")
+
+    def close(self):
+        self.conn.close()
+
+class CachingAdapter(HTTPAdapter):
+    """
+    带磁盘缓存的 requests 传输适配器，只处理不带 Range、不是流式下载(stream=True)的 GET 请求
+
+    流式下载的调用方要边读边写文件，缓存会把整个响应先读入内存，所以直接交给 HTTPAdapter。
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or 'Range' in request.headers or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry is not None:
+            if self.cache.is_fresh(entry, request.headers):
+                self.cache.count('hit')
+                return self.build_cached_response(request, entry)
+            request.headers.update(self.cache.conditional_headers(entry))
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.count('not_modified')
+            return self.build_cached_response(request, self.cache.refresh(request.url, entry, response.headers))
+
+        if response.status_code == 200:
+            self.cache.count('miss')
+            if is_cacheable(response.status_code, response.headers):
+                self.cache.store(request.url, response.status_code, response.headers, response.content)
+        return response
+
+    def build_cached_response(self, request, entry):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+
+def cached_session(cache, **adapter_kwargs):
+    """创建挂载了 CachingAdapter 的 requests 会话，adapter_kwargs 传给 HTTPAdapter（如连接池大小）"""
+    session = requests.Session()
+    adapter = CachingAdapter(cache, **adapter_kwargs)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
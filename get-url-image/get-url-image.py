@@ -2,33 +2,172 @@ import requests
 from bs4 import BeautifulSoup
 import csv
 import os
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urldefrag
 import re
+import argparse
+import sqlite3
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+import threading
 
-def fetch_webpage_with_selenium(url):
-    """使用Selenium获取动态加载的网页内容"""
+def load_http_cache():
+    """磁盘HTTP缓存模块只有一份（在 download_form_yiqifuwu 中，两个工具共用同一个缓存目录），按路径导入"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'download_form_yiqifuwu', 'http_cache.py')
+    spec = importlib.util.spec_from_file_location('http_cache', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+http_cache = load_http_cache()
+
+CRAWL_DEPTH = 2  # 抓取模式从起始页面往下跟随链接的层数
+CRAWL_MAX_PAGES = 200  # 抓取模式最多抓取的页面数
+CRAWL_WORKERS = 4  # 抓取模式同时请求的页面数
+SELENIUM_POOL_SIZE = 2  # 动态加载模式同时运行的无头浏览器数
+SELENIUM_TIMEOUT = 15  # 等待页面和图片加载完成的最长时间(秒)
+# 页面加载完成且图片都已加载（延迟加载的图片除外）
+PAGE_READY_SCRIPT = (
+    "return document.readyState === 'complete' && "
+    "Array.from(document.images).every(img => img.complete || img.loading === 'lazy');"
+)
+# 这些后缀的链接不是网页，不跟随
+SKIP_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.pdf', '.zip', '.rar', '.mp4', '.mp3', '.exe')
+
+def create_driver():
+    """启动一个无头 Chrome"""
     options = webdriver.ChromeOptions()
     options.add_argument('--headless')  # 无头模式
-    driver = webdriver.Chrome(options=options)
+    return webdriver.Chrome(options=options)
+
+def load_page(driver, url, timeout=SELENIUM_TIMEOUT):
+    """打开页面，等到页面和图片加载完成（最多 timeout 秒）后返回HTML"""
     driver.get(url)
-    time.sleep(5)  # 等待页面加载
-    html = driver.page_source
-    driver.quit()
-    return html
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: d.execute_script(PAGE_READY_SCRIPT))
+    except TimeoutException:
+        print(f"等待页面加载超时，使用当前内容: {url}")
+    return driver.page_source
+
+class DriverPool:
+    """
+    长期运行的无头浏览器池，多个页面复用同一批浏览器
+
+    浏览器按需启动，最多 size 个；出错（包括启动失败）的浏览器会被关闭并让出名额，
+    等待中的线程随即被唤醒，之后按需重新启动。
+    """
+
+    def __init__(self, size=SELENIUM_POOL_SIZE, timeout=SELENIUM_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self.idle = []  # 空闲的浏览器
+        self.drivers = []  # 已启动的全部浏览器
+        self.slots = 0  # 已占用的名额：已启动和正在启动的浏览器数
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        """取一个空闲的浏览器；没有空闲且名额未满时启动新的，否则等待归还或让出名额"""
+        with self.cond:
+            while not self.idle and self.slots >= self.size:
+                self.cond.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.slots += 1
+        try:
+            driver = create_driver()
+        except BaseException:
+            with self.cond:
+                self.slots -= 1
+                self.cond.notify()
+            raise
+        with self.cond:
+            self.drivers.append(driver)
+        return driver
+
+    def release(self, driver):
+        """归还正常的浏览器（池已关闭时直接关闭它）"""
+        with self.cond:
+            if driver in self.drivers:
+                self.idle.append(driver)
+                self.cond.notify()
+                return
+        self.quit(driver)
+
+    def discard(self, driver):
+        """关闭出错的浏览器并让出名额"""
+        with self.cond:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+                self.slots -= 1
+                self.cond.notify()
+        self.quit(driver)
+
+    @staticmethod
+    def quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
 
+    def fetch(self, url):
+        """用池中的浏览器获取动态加载的网页内容，失败时返回 None"""
+        try:
+            driver = self.acquire()
+        except Exception as e:
+            print(f"错误：无法启动浏览器 - {e}")
+            return None
+        ok = False
+        try:
+            html = load_page(driver, url, self.timeout)
+            ok = True
+            return html
+        except Exception as e:
+            # 浏览器或 chromedriver 出错（连接被拒绝等也算），这个浏览器不再使用
+            print(f"错误：浏览器无法获取网页内容 - {e}")
+            return None
+        finally:
+            if ok:
+                self.release(driver)
+            else:
+                self.discard(driver)
 
-def fetch_webpage(url):
-    """获取网页内容"""
+    def close(self):
+        with self.cond:
+            drivers, self.drivers, self.idle = self.drivers, [], []
+            self.slots -= len(drivers)
+            self.cond.notify_all()
+        for driver in drivers:
+            self.quit(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def fetch_webpage_with_selenium(url, pool=None):
+    """使用Selenium获取动态加载的网页内容（给出 pool 时复用池中的浏览器）"""
+    if pool is not None:
+        return pool.fetch(url)
+    driver = create_driver()
+    try:
+        return load_page(driver, url)
+    finally:
+        driver.quit()
+
+
+def fetch_webpage(url, session=None):
+    """获取网页内容（给出 session 时复用其连接）"""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
     }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = (session or requests).get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.text
     except requests.exceptions.RequestException as e:
@@ -47,6 +186,21 @@ def extract_image_links(html, base_url):
             links.append(absolute_url)
     return links
 
+def extract_page_links(html, base_url):
+    """解析HTML并提取与 base_url 同一站点的网页链接（去掉 #锚点）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    domain = urlparse(base_url).netloc
+    links = []
+    for a in soup.find_all('a', href=True):
+        url = urldefrag(urljoin(base_url, a['href'])).url
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or parsed.netloc != domain:
+            continue
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+        links.append(url)
+    return links
+
 def filter_jpg_links(links):
     """改进版过滤逻辑：精确识别含参数的JPG链接"""
     seen = set()
@@ -63,8 +217,82 @@ def filter_jpg_links(links):
                 jpg_links.append(link)
     return jpg_links
 
-def save_to_csv(links, filename='images.csv'):
-    """保存链接到CSV文件，如果文件存在则追加，否则创建新文件"""
+class UrlIndex:
+    """
+    跨运行的图片URL索引（SQLite，URL唯一约束），判断链接是否已经保存过
+
+    CSV只追加索引中没有的新链接；export_csv 可以从索引重新生成完整、无重复的CSV。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, page TEXT)'
+        )
+
+    def add(self, links, page=None):
+        """在一个事务中批量插入，返回之前没有的链接（保持原顺序）"""
+        new_links = []
+        with self.conn:
+            for link in links:
+                cursor = self.conn.execute('INSERT OR IGNORE INTO images (url, page) VALUES (?, ?)', (link, page))
+                if cursor.rowcount:
+                    new_links.append(link)
+        return new_links
+
+    def __contains__(self, url):
+        return self.conn.execute('SELECT 1 FROM images WHERE url = ?', (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM images').fetchone()[0]
+
+    def import_csv(self, filename):
+        """把已有CSV中的链接导入索引"""
+        with open(filename, newline='', encoding='utf-8') as csvfile:
+            links = [row['Image_URL'] for row in csv.DictReader(csvfile)]
+        return len(self.add(links))
+
+    def export_csv(self, filename='images.csv'):
+        """按首次发现的顺序把索引中的全部链接写成CSV（原子替换），供 git_image.py 使用"""
+        tmp_path = filename + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Image_URL'])
+            writer.writerows(self.conn.execute('SELECT url FROM images ORDER BY id'))
+        os.replace(tmp_path, filename)
+        return len(self)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_index(filename='images.csv'):
+    """打开CSV对应的URL索引（images.csv -> images.db），第一次使用时导入CSV中已有的链接"""
+    path = os.path.splitext(filename)[0] + '.db'
+    is_new = not os.path.exists(path)
+    index = UrlIndex(path)
+    if is_new and os.path.isfile(filename):
+        print(f"从 {filename} 导入 {index.import_csv(filename)} 个链接到 {path}")
+    return index
+
+def save_to_csv(links, filename='images.csv', index=None, page=None):
+    """
+    保存链接到CSV文件，如果文件存在则追加，否则创建新文件
+
+    给出 index（UrlIndex）时只追加索引中没有的链接。
+    """
+    if index is not None:
+        links = index.add(links, page)
+        if not links:
+            print(f"没有新的链接需要保存到 {filename}")
+            return
+
     # 检查文件是否存在
     file_exists = os.path.isfile(filename)
 
@@ -80,9 +308,11 @@ def save_to_csv(links, filename='images.csv'):
     
     print(f"成功保存{len(links)}个链接到 {filename}")
 
-def main(url):
-    html = fetch_webpage(url) # 静态加载
-    # html = fetch_webpage_with_selenium(url) # 动态加载
+def main(url, dynamic=False, index=None, cache=None):
+    if dynamic:
+        html = fetch_webpage_with_selenium(url) # 动态加载
+    else:
+        html = fetch_webpage(url, http_cache.cached_session(cache) if cache else None) # 静态加载
     if not html:
         return
     
@@ -90,10 +320,90 @@ def main(url):
     jpg_links = filter_jpg_links(all_links)
     
     if jpg_links:
-        save_to_csv(jpg_links)
+        save_to_csv(jpg_links, index=index, page=url)
     else:
         print("未找到JPG格式的图片链接")
 
+def crawl(seed_url, max_depth=CRAWL_DEPTH, max_pages=CRAWL_MAX_PAGES, workers=CRAWL_WORKERS, filename='images.csv',
+          pool=None, index=None, cache=None):
+    """
+    从 seed_url 开始按广度优先跟随同站点链接，最多 max_depth 层、max_pages 个页面
+
+    多个页面同时请求；每抓完一个页面就把其中新的JPG链接追加到CSV。
+    给出 pool（DriverPool）时用池中的无头浏览器获取动态加载的页面；
+    给出 index（UrlIndex）时跳过之前运行中已经保存过的链接；
+    给出 cache（HttpCache）时静态页面使用磁盘HTTP缓存。
+    """
+    session = http_cache.cached_session(cache) if cache else requests.Session()
+    if pool is not None:
+        fetch = pool.fetch
+    else:
+        fetch = lambda url: fetch_webpage(url, session)
+    visited = {seed_url}
+    frontier = [(seed_url, 0)]  # 待抓取的 (URL, 深度)
+    seen_images = set()
+    in_flight = {}
+    pages = 0  # 已发出请求的页面数
+    done_pages = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while frontier or in_flight:
+            while frontier and len(in_flight) < workers and pages < max_pages:
+                url, depth = frontier.pop(0)
+                in_flight[executor.submit(fetch, url)] = (url, depth)
+                pages += 1
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth = in_flight.pop(future)
+                html = future.result()
+                done_pages += 1
+                print(f"[{done_pages}/{max_pages}] 深度{depth}: {url}")
+                if not html:
+                    continue
+
+                # 只保存之前页面中没出现过的图片
+                jpg_links = [link for link in filter_jpg_links(extract_image_links(html, url)) if link not in seen_images]
+                if jpg_links:
+                    seen_images.update(jpg_links)
+                    save_to_csv(jpg_links, filename, index, url)
+
+                if depth < max_depth:
+                    for link in extract_page_links(html, url):
+                        if link not in visited:
+                            visited.add(link)
+                            frontier.append((link, depth + 1))
+
+    print(f"抓取完成：{pages} 个页面，{len(seen_images)} 个JPG链接")
+
 if __name__ == "__main__":
-    target_url = input("请输入要抓取的网页URL：")
-    main(target_url)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Extract JPG image links from web pages')
+    parser.add_argument('url', nargs='?', help='网页URL（不给出时交互输入）')
+    parser.add_argument('--crawl', action='store_true', help='从该页面开始跟随同站点链接抓取多个页面')
+    parser.add_argument('--depth', type=int, default=CRAWL_DEPTH, help='抓取模式跟随链接的层数')
+    parser.add_argument('--max-pages', type=int, default=CRAWL_MAX_PAGES, help='抓取模式最多抓取的页面数')
+    parser.add_argument('--workers', type=int, default=CRAWL_WORKERS, help='抓取模式同时请求的页面数')
+    parser.add_argument('--selenium', action='store_true', help='用无头浏览器获取动态加载的页面')
+    parser.add_argument('--pool-size', type=int, default=SELENIUM_POOL_SIZE, help='抓取模式同时运行的无头浏览器数')
+    parser.add_argument('--http-cache', action='store_true', help='静态页面使用共享的磁盘HTTP缓存，未修改的页面只需一次304请求')
+    parser.add_argument('--export', action='store_true', help='从URL索引 images.db 重新生成无重复的 images.csv 后退出')
+    args = parser.parse_args()
+
+    cache = http_cache.HttpCache() if args.http_cache else None
+    with open_index('images.csv') as index:
+        if args.export:
+            print(f"已导出 {index.export_csv('images.csv')} 个链接到 images.csv")
+        else:
+            target_url = args.url or input("请输入要抓取的网页URL：")
+            if args.crawl and args.selenium:
+                with DriverPool(args.pool_size) as pool:
+                    crawl(target_url, args.depth, args.max_pages, args.workers, pool=pool, index=index)
+            elif args.crawl:
+                crawl(target_url, args.depth, args.max_pages, args.workers, index=index, cache=cache)
+            else:
+                main(target_url, dynamic=args.selenium, index=index, cache=cache)
+    if cache:
+        print(cache.summary())
+        cache.close()
\ No newline at end of file
@@ -1,8 +1,82 @@
 import csv
 import os
+import hashlib
+import argparse
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 
-def download_images_from_csv(csv_filename):
+WORKERS = 8  # 同时下载的图片数
+CHUNK_SIZE = 64 * 1024  # 流式写入的块大小(字节)
+
+# 设置请求头，模拟浏览器访问
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+class HostSessions:
+    """每个站点一个保持连接的会话，连接池大小与线程数一致"""
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+            return self.sessions[host]
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+
+def assign_image_names(urls):
+    """
+    为每个URL分配文件名：默认取URL中的文件名；
+    与前面的URL重名（或没有文件名）时加上URL哈希后缀，同样的CSV总是得到同样的文件名
+    """
+    names = {}
+    used = set()
+    for url in urls:
+        if url in names:
+            continue
+        image_name = os.path.basename(urlparse(url).path)
+        if not image_name or image_name in used:
+            stem, ext = os.path.splitext(image_name)
+            suffix = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+            image_name = f"{stem}_{suffix}{ext}" if stem else f"{suffix}.jpg"
+        used.add(image_name)
+        names[url] = image_name
+    return names
+
+def download_image(sessions, url, image_path):
+    """流式下载单张图片，先写 .part 文件，完成后再重命名；下载失败时删除 .part 文件"""
+    part_path = image_path + '.part'
+    try:
+        with sessions.get(url).get(url, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Status Code: {response.status_code}")
+            with open(part_path, 'wb') as image_file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    image_file.write(chunk)
+        os.replace(part_path, image_path)
+    except BaseException:
+        # 中断(包括 Ctrl+C)时不留下半个文件
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+def download_images_from_csv(csv_filename, workers=WORKERS):
     # 获取CSV文件所在的目录
     base_dir = os.path.dirname(os.path.abspath(__file__))
     csv_path = os.path.join(base_dir, csv_filename)
@@ -13,12 +87,8 @@ def download_images_from_csv(csv_filename):
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
     
-    # 设置请求头，模拟浏览器访问
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
-    # 读取CSV文件并下载图片
+    # 读取CSV文件中的URL
+    urls = []
     with open(csv_path, mode='r') as csv_file:
         csv_reader = csv.reader(csv_file)
         next(csv_reader)  # 跳过标题行
@@ -28,23 +98,33 @@ def download_images_from_csv(csv_filename):
                 if not url.startswith(('http://', 'https://')):
                     print(f"Skipping invalid URL: {url}")
                     continue
-                
+                urls.append(url)
+    
+    names = assign_image_names(urls)
+    sessions = HostSessions(workers)
+    
+    # 并发下载图片
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(download_image, sessions, url, os.path.join(save_dir, image_name)): (url, image_name)
+                for url, image_name in names.items()
+            }
+            for future in as_completed(futures):
+                url, image_name = futures[future]
                 try:
-                    # 获取图片文件名
-                    image_name = os.path.basename(url).split('?')[0]
-                    image_path = os.path.join(save_dir, image_name)
-                    
-                    # 下载图片
-                    response = requests.get(url, headers=headers, timeout=10)
-                    if response.status_code == 200:
-                        with open(image_path, 'wb') as image_file:
-                            image_file.write(response.content)
-                        print(f"Downloaded: {image_name}")
-                    else:
-                        print(f"Failed to download: {url} (Status Code: {response.status_code})")
+                    future.result()
+                    print(f"Downloaded: {image_name}")
                 except Exception as e:
                     print(f"Error downloading {url}: {e}")
+    finally:
+        sessions.close()
 
 if __name__ == "__main__":
-    csv_filename = input("Enter the CSV filename: ")
-    download_images_from_csv(csv_filename)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Download images listed in a CSV file')
+    parser.add_argument('csv_filename', nargs='?', help='CSV文件名（不给出时交互输入）')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='同时下载的图片数')
+    args = parser.parse_args()
+
+    csv_filename = args.csv_filename or input("Enter the CSV filename: ")
+    download_images_from_csv(csv_filename, workers=args.workers)
\ No newline at end of file
@@ -1,30 +1,178 @@
-import pandas as pd
+import csv
 import os
+import json
+import shutil
+import hashlib
+import argparse
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
-def remove_duplicates(input_filename):
-    # 读取CSV文件
-    # 假设CSV文件的第一列是Image_URL
-    df = pd.read_csv(input_filename)
+# 去重时从URL中去掉的跟踪参数（只去掉已知的跟踪参数：w/h/size/q 等在很多 CDN 上选择不同的图片版本，
+# 有的站点 q 甚至对应完全不同的图片，同一张图的不同尺寸交给 --images --phash 按内容识别）
+TRACKING_PARAMS = {'fbclid', 'gclid', 'spm', 'from', 'share', 'ref'}
+TRACKING_PREFIXES = ('utm_',)
+# 镜像站点 -> 规范站点，按需补充
+HOST_ALIASES = {}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+INDEX_FILE = '.image_index.json'  # 图片文件夹中的哈希索引
+PHASH_THRESHOLD = 5  # 感知哈希汉明距离不超过该值视为同一张图
 
-    # 去重操作，基于Image_URL列
-    df.drop_duplicates(subset=['Image_URL'], keep='first', inplace=True)
+def normalize_url(url):
+    """
+    规范化图片URL：统一为 https、小写站点名、去掉 www. 和默认端口，
+    应用 HOST_ALIASES，去掉跟踪参数并对剩余参数排序，去掉 #锚点
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[len('www.'):]
+    host = HOST_ALIASES.get(host, host)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
 
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit(('https', host, parts.path, urlencode(sorted(query)), ''))
+
+def remove_duplicates(input_filename):
+    """按规范化后的 Image_URL 去重，逐行读写，保留第一次出现的原始URL"""
     # 生成新的文件名
     # 使用os.path.splitext来分割文件名和扩展名
     base_name, ext = os.path.splitext(input_filename)
     output_filename = f"{base_name}-new{ext}"
 
-    # 将去重后的数据写入新的CSV文件
-    df.to_csv(output_filename, index=False)
+    seen = set()
+    total = kept = 0
+    with open(input_filename, mode='r', encoding='utf-8', newline='') as src, \
+            open(output_filename, mode='w', encoding='utf-8', newline='') as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            total += 1
+            key = normalize_url(row['Image_URL'])
+            if key in seen:
+                continue
+            seen.add(key)
+            writer.writerow(row)
+            kept += 1
+
+    print(f"去重后的文件已保存为: {output_filename}（{total} -> {kept} 行）")
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def perceptual_hash(path):
+    """差值哈希(dHash)：缩成 9x8 灰度图，比较相邻像素，得到 64 位整数"""
+    from PIL import Image  # 只有感知哈希需要 Pillow
+
+    with Image.open(path) as img:
+        pixels = img.convert('L').resize((9, 8), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
 
-    print(f"去重后的文件已保存为: {output_filename}")
+def load_index(folder):
+    path = os.path.join(folder, INDEX_FILE)
+    if os.path.exists(path):
+        with open(path, mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_index(folder, index):
+    """原子写入哈希索引"""
+    path = os.path.join(folder, INDEX_FILE)
+    with open(path + '.tmp', mode='w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+def update_index(folder, index, use_phash=False):
+    """只为新增或改动过（大小/修改时间变化）的图片计算哈希"""
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS))
+    fresh = {}
+    for name in names:
+        stat = os.stat(os.path.join(folder, name))
+        entry = index.get(name)
+        if not entry or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                     'sha256': file_sha256(os.path.join(folder, name))}
+        if use_phash and 'phash' not in entry:
+            try:
+                entry['phash'] = perceptual_hash(os.path.join(folder, name))
+            except OSError as e:
+                print(f"无法计算感知哈希: {name} - {e}")
+                entry['phash'] = None
+        fresh[name] = entry
+    return fresh
+
+def find_duplicate_images(index, use_phash=False, threshold=PHASH_THRESHOLD):
+    """返回 {重复文件: 保留的文件}；先按内容哈希，再按感知哈希距离"""
+    duplicates = {}
+    by_sha = {}
+    kept = []
+    for name in sorted(index):
+        original = by_sha.setdefault(index[name]['sha256'], name)
+        if original != name:
+            duplicates[name] = original
+        else:
+            kept.append(name)
+
+    if use_phash:
+        uniques = []  # (感知哈希, 文件名)
+        for name in kept:
+            phash = index[name].get('phash')
+            if phash is None:
+                continue
+            match = next((other for h, other in uniques if bin(h ^ phash).count('1') <= threshold), None)
+            if match:
+                duplicates[name] = match
+            else:
+                uniques.append((phash, name))
+    return duplicates
+
+def remove_duplicate_images(folder, use_phash=False, threshold=PHASH_THRESHOLD):
+    """图片文件夹去重：重复的图片移到 duplicates 子文件夹，哈希索引保存在文件夹中供下次增量使用"""
+    index = update_index(folder, load_index(folder), use_phash)
+    save_index(folder, index)
+
+    duplicates = find_duplicate_images(index, use_phash, threshold)
+    if duplicates:
+        dup_dir = os.path.join(folder, 'duplicates')
+        os.makedirs(dup_dir, exist_ok=True)
+        for name, original in duplicates.items():
+            shutil.move(os.path.join(folder, name), os.path.join(dup_dir, name))
+            del index[name]
+            print(f"重复: {name} == {original}")
+        save_index(folder, index)
+
+    print(f"共 {len(index) + len(duplicates)} 张图片，移出 {len(duplicates)} 张重复图片")
 
 if __name__ == "__main__":
-    # 输入CSV文件名
-    input_filename = input("请输入CSV文件名: ")
+    parser = argparse.ArgumentParser(description='Remove duplicate image URLs or duplicate downloaded images')
+    parser.add_argument('input_filename', nargs='?', help='CSV文件名（不给出且未指定 --images 时交互输入）')
+    parser.add_argument('--images', help='对已下载的图片文件夹按内容去重')
+    parser.add_argument('--phash', action='store_true', help='同时按感知哈希去重（需要 Pillow）')
+    parser.add_argument('--threshold', type=int, default=PHASH_THRESHOLD, help='感知哈希汉明距离阈值')
+    args = parser.parse_args()
 
-    # 检查文件是否存在
-    if os.path.exists(input_filename):
-        remove_duplicates(input_filename)
+    if args.images:
+        remove_duplicate_images(args.images, args.phash, args.threshold)
     else:
-        print(f"文件 {input_filename} 不存在，请检查文件名是否正确。")
\ No newline at end of file
+        # 输入CSV文件名
+        input_filename = args.input_filename or input("请输入CSV文件名: ")
+
+        # 检查文件是否存在
+        if os.path.exists(input_filename):
+            remove_duplicates(input_filename)
+        else:
+            print(f"文件 {input_filename} 不存在，请检查文件名是否正确。")
\ No newline at end of file
@@ -6,6 +6,13 @@ import datetime
 from pathlib import Path
 import sys
 import re
+import hashlib
+import struct
+import argparse
+import glob
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 def get_resource_path(relative_path):
     """ 获取资源文件的绝对路径（无论是否打包） """
@@ -54,23 +61,35 @@ def get_gerber_file_prefix(gerber_folder):
 # 会改变的地址,在exe外部
 BASE_PATH = get_exe_dir()
 
-# 构建路径
-PATH_FINAL = os.path.join(BASE_PATH, r'jlc_gerber')
-gerber_folder = os.path.join(BASE_PATH, r"gerber")
-timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-zip_path = os.path.join(BASE_PATH, f"out_{get_gerber_file_prefix(gerber_folder)}-{timestamp}.zip")
+# 默认的源文件夹（未指定文件夹时使用）
+DEFAULT_GERBER_FOLDER = os.path.join(BASE_PATH, r"gerber")
 
-# 获取当前时间并格式化为YYYY-MM-DD HH:MM:SS
-current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+# 转换缓存（--cache 时使用，exe 旁），保存压缩好的各层
+DEFAULT_CACHE_DIR = os.path.join(BASE_PATH, '.jlc_cache')
+CACHE_VERSION = 1
+MAX_CACHED_LAYERS = 500  # 约几十块板子的层数
 
-def replace_timestamp_with_now(text):
+# 流式复制的块大小(字节)
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# ZIP 压缩方式
+ZIP_COMPRESSION = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+def replace_timestamp_with_now(text, now=None):
     # 定义匹配YYYY-MM-DD HH:MM:SS格式的正则表达式
     pattern = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'
     
     # 检查字符串中是否匹配该模式
     if re.search(pattern, text):
+        # 获取当前时间并格式化为YYYY-MM-DD HH:MM:SS
+        if now is None:
+            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         # 替换所有匹配的时间戳为当前时间
-        replaced_text = re.sub(pattern, current_time, text)
+        replaced_text = re.sub(pattern, now, text)
         return replaced_text
     else:
         return text  # 如果没有找到匹配项，返回原字符串
@@ -113,79 +132,529 @@ def standardize_filename(filename):
     standardized_name = name.lower().replace(' ', '_').replace('-', '_')  # 标准化名字
     return f"{standardized_name}{ext}"  # 拼接名字和后缀
 
-def move_and_rename_files(source_path, destination_path, old_name, new_name):
-    """移动并重命名文件"""
+# 匹配时忽略的配置键（它们是输出信息，不是源文件名特征）
+NON_PATTERN_KEYS = ("jlc_filename", "jlc_header")
+
+def build_layer_matcher(json_data):
+    """
+    将 GerberX2.json 编译为层匹配器，只需编译一次
+
+    所有文件名特征合并为一个正则（按长度降序，先尝试更具体的特征），
+    用前瞻断言找出文件名中出现的全部特征。
+
+    :param json_data: 层配置字典
+    :return: (合并正则, 特征 -> 层名集合, 特征 -> 作为其前缀的更短特征列表)
+    """
+    pattern_layers = {}
+    for layer, config in json_data.items():
+        if not config.get("jlc_filename"):  # 没有 jlc_filename 的层不参与匹配
+            continue
+        for key, value in config.items():
+            if key in NON_PATTERN_KEYS or not isinstance(value, str) or not value:
+                continue
+            pattern_layers.setdefault(value, set()).add(layer)
+
+    patterns = sorted(pattern_layers, key=len, reverse=True)
+    regex = re.compile("(?=(" + "|".join(re.escape(p) for p in patterns) + "))")
+
+    # 同一位置正则只返回最长的特征，被它以前缀形式覆盖的短特征需要补上
+    prefixes = {
+        p: [q for q in patterns if q != p and p.startswith(q)]
+        for p in patterns
+    }
+    return regex, pattern_layers, prefixes
+
+def match_layer_files(file_names, matcher):
+    """
+    一次遍历文件列表，把每个文件映射到对应的层
+
+    文件命中多个层时取匹配特征最长的层；同一层命中多个文件时保留第一个。
+
+    :param file_names: 文件名列表
+    :param matcher: build_layer_matcher 的返回值
+    :return: (层名 -> 文件名, 未匹配文件列表, 多层命中 {文件名: 层名列表}, 重复文件 {层名: 被忽略的文件列表})
+    """
+    regex, pattern_layers, prefixes = matcher
+    layer_files = {}
+    unmatched = []
+    ambiguous = {}
+    duplicates = {}
+
+    for file_name in file_names:
+        standardized_name = standardize_filename(file_name)
+
+        # 收集文件名中出现的全部特征
+        found = set()
+        for m in regex.finditer(standardized_name):
+            found.add(m.group(1))
+            found.update(prefixes[m.group(1)])
+        if not found:
+            unmatched.append(file_name)
+            continue
+
+        layers = set().union(*(pattern_layers[p] for p in found))
+        best = max(found, key=len)
+        layer = sorted(pattern_layers[best])[0]
+        if len(layers) > 1:
+            ambiguous[file_name] = sorted(layers)
+
+        if layer in layer_files:
+            duplicates.setdefault(layer, []).append(file_name)
+        else:
+            layer_files[layer] = file_name
+
+    return layer_files, unmatched, ambiguous, duplicates
+
+def report_layer_matches(unmatched, ambiguous, duplicates, layer_files):
+    """打印匹配异常：未匹配、多层命中、同层重复"""
+    for file_name in unmatched:
+        print(f"Unmatched file: {file_name}")
+    for file_name, layers in ambiguous.items():
+        chosen = next((layer for layer, f in layer_files.items() if f == file_name), None)
+        print(f"Ambiguous file: {file_name} matches {', '.join(layers)} (using {chosen})")
+    for layer, file_names in duplicates.items():
+        print(f"Duplicate files for {layer}: {', '.join(file_names)} (using {layer_files[layer]})")
+
+def build_header(header_lines, now=None):
+    """
+    生成文件头（逐行替换时间戳），返回 UTF-8 字节
+
+    :param header_lines: JSON 中的 jlc_header 行列表
+    :param now: 替换进头部的时间字符串，None 表示当前时间
+    :return: 以换行结尾的头部字节串
+    """
+    processed_header = [replace_timestamp_with_now(line, now) for line in header_lines]
+    return ("\n".join(processed_header) + "\n").encode('utf-8')
+
+def write_with_header(src, dst, header_lines=(), now=None):
+    """先写头部，再把已打开的源文件分块复制到已打开的目标（普通文件或 ZIP 条目）"""
+    if header_lines:
+        dst.write(build_header(header_lines, now))
+    shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+def copy_with_header(source_file, dst, header_lines=(), now=None):
+    """打开源文件并写入已打开的目标，见 write_with_header"""
+    with open(source_file, 'rb') as src:
+        write_with_header(src, dst, header_lines, now)
+
+def move_and_rename_files(source_path, destination_path, old_name, new_name, header_lines=(), now=None):
+    """
+    移动并重命名文件，同时在开头写入头部信息
+
+    单次流式处理：先写头部，再分块复制源文件，每个文件只读一次、写一次，内存占用恒定。
+    """
     source_file = os.path.join(source_path, old_name)
     destination_file = os.path.join(destination_path, new_name)
-    shutil.copy(source_file, destination_file)
+    with open(destination_file, 'wb') as dst:
+        copy_with_header(source_file, dst, header_lines, now)
     print(f"Moved and renamed: {old_name} -> {new_name}")
 
-def add_file_header(file_path, header_lines):
-    """向文件添加头部信息（支持多行）"""
-    # 读取原有内容
-    with open(file_path, 'r', encoding='utf-8') as f:
-        original_content = f.read()
-    
-    # 处理每行头部信息（逐行替换时间戳）
-    processed_header = []
-    for line in header_lines:
-        processed_header.append(replace_timestamp_with_now(line))
-    
-    # 构建新内容（添加换行符）
-    new_content = "\n".join(processed_header) + "\n" + original_content
+def add_file_to_zip(zipf, source_path, old_name, new_name, header_lines=(), now=None):
+    """
+    把重命名并加好头部的文件直接流式写入 ZIP，不经过中间文件夹
+
+    压缩方式和压缩等级沿用 ZipFile 的设置；条目按名字创建，时间为 ZIP 的默认值 1980-01-01。
+    先打开源文件，打不开时不会在 ZIP 中留下只有头部的条目。
 
-    # 写入文件
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-    print(f"Header added to: {file_path}")
+    :param zipf: 以 'w' 模式打开的 ZipFile
+    """
+    source_file = os.path.join(source_path, old_name)
+    with open(source_file, 'rb') as src:
+        # 超过 2GB 的文件需要事先声明 ZIP64
+        size = os.fstat(src.fileno()).st_size
+        with zipf.open(new_name, 'w', force_zip64=size * 1.05 > zipfile.ZIP64_LIMIT) as dst:
+            write_with_header(src, dst, header_lines, now)
+    print(f"Zipped and renamed: {old_name} -> {new_name}")
 
-def zip_folder(folder_path, output_path):
+def zip_folder(folder_path, output_path, compression="deflate", compresslevel=None):
     """打包文件夹为ZIP"""
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(output_path, 'w', ZIP_COMPRESSION[compression], compresslevel=compresslevel) as zipf:
         for root, _, files in os.walk(folder_path):
             for file in files:
                 file_path = os.path.join(root, file)
                 zipf.write(file_path, os.path.relpath(file_path, folder_path))
     print(f"ZIP created: {output_path}")
 
-def main():
-    # 初始化目标文件夹
-    create_folder(PATH_FINAL)
-    clean_folder(PATH_FINAL)
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # 加载 JSON 配置
-    json_data = load_json_data(GERBER_JSON)
+def load_cache_manifest(cache_dir):
+    """读取缓存清单，不存在或版本不符时返回空清单"""
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        try:
+            manifest = load_json_data(manifest_path)
+            if manifest.get('version') == CACHE_VERSION:
+                return manifest
+        except ValueError:
+            print(f"Cache manifest corrupted, rebuilding: {manifest_path}")
+    return {'version': CACHE_VERSION, 'sources': {}, 'layers': {}}
 
-    # 遍历 JSON 数据
-    for layer, config in json_data.items():
-        jlc_filename = config.get("jlc_filename")
-        if not jlc_filename:  # 如果 jlc_filename 为 None，跳过
-            continue
+def save_cache_manifest(cache_dir, manifest):
+    """原子写入缓存清单（临时文件 + 重命名）"""
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+def prune_cache(cache_dir, manifest):
+    """只保留最近用过的 MAX_CACHED_LAYERS 个层"""
+    layers = manifest['layers']
+    keep = sorted(layers, key=lambda k: layers[k]['time'], reverse=True)[:MAX_CACHED_LAYERS]
+    manifest['layers'] = {k: layers[k] for k in keep}
 
-        # 遍历 gerber 文件夹中的文件
-        for file_name in os.listdir(gerber_folder):
-            # 标准化文件名
-            standardized_name = standardize_filename(file_name)
+    for name in os.listdir(os.path.join(cache_dir, 'layers')):
+        if name[:-len('.zip')] not in manifest['layers']:
+            os.remove(os.path.join(cache_dir, 'layers', name))
+
+    # 源文件记录只保留仍然存在的
+    manifest['sources'] = {p: v for p, v in manifest['sources'].items() if os.path.exists(p)}
+
+def source_sha256(path, sources, source_updates):
+    """
+    获取源文件的 SHA-256，大小和修改时间都没变时直接使用清单中的记录，不再读文件
+
+    :param sources: 清单中的源文件记录（只读）
+    :param source_updates: 本次新计算的记录写到这里，由主进程合并
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    entry = sources.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+    sha = file_sha256(path)
+    source_updates[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+    return sha
+
+def write_package(gerber_folder, jobs, zip_path, path_final, compression, compresslevel, now):
+    """
+    把各层改名、加上头部后写入 ZIP（path_final 不为 None 时先写入中间文件夹再打包）
+
+    :return: 成功处理的层数
+    """
+    layers = 0
+    if path_final is not None:
+        # 初始化目标文件夹
+        create_folder(path_final)
+        clean_folder(path_final)
 
-            # 检查标准化后的文件名是否包含某个键值（除去 jlc_filename 和 jlc_header）
+        for file_name, jlc_filename, header_lines in jobs:
             try:
-                if any(
-                    isinstance(value, str) and value in standardized_name  # 确保 value 是字符串
-                    for key, value in config.items()
-                    if key not in ["jlc_filename", "jlc_header"]
-                ):
-                    # 移动并重命名文件
-                    move_and_rename_files(gerber_folder, PATH_FINAL, file_name, jlc_filename)
-
-                    # 在文件开头插入头部信息
-                    file_new_path = os.path.join(PATH_FINAL, jlc_filename)
-                    if os.path.exists(file_new_path):
-                        add_file_header(file_new_path, config["jlc_header"])
+                # 移动并重命名文件，同时在文件开头插入头部信息
+                move_and_rename_files(gerber_folder, path_final, file_name, jlc_filename, header_lines, now)
+                layers += 1
             except Exception as e:
                 print(f"Error processing file {file_name}: {e}")
 
-    # 打包文件
-    zip_folder(PATH_FINAL, zip_path)
+        # 打包文件
+        zip_folder(path_final, zip_path, compression, compresslevel)
+    else:
+        # 直接写入 ZIP
+        with zipfile.ZipFile(zip_path, 'w', ZIP_COMPRESSION[compression], compresslevel=compresslevel) as zipf:
+            for file_name, jlc_filename, header_lines in jobs:
+                try:
+                    add_file_to_zip(zipf, gerber_folder, file_name, jlc_filename, header_lines, now)
+                    layers += 1
+                except Exception as e:
+                    print(f"Error processing file {file_name}: {e}")
+        print(f"ZIP created: {zip_path}")
+    return layers
+
+# ZIP 记录的格式（见 ZIP 规范 APPNOTE 4.3），用于把缓存的层原样拼接成 ZIP
+ZIP_CENTRAL_OFFSET = 42  # 中央目录记录中本地头偏移所在的位置
+ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+ZIP_END_SIGNATURE = b'PK\x05\x06'
+
+def read_layer_member(path):
+    """
+    读出单条目 ZIP（缓存的层）中的条目
+
+    :return: (本地头 + 压缩数据, 中央目录记录)，两者都可以原样写入另一个 ZIP
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    signature, _, _, _, count, cd_size, cd_offset, _ = ZIP_END_RECORD.unpack(data[-ZIP_END_RECORD.size:])
+    if signature != ZIP_END_SIGNATURE or count != 1 or cd_offset + cd_size + ZIP_END_RECORD.size != len(data):
+        raise ValueError(f"not a single-entry zip: {path}")
+    return data[:cd_offset], data[cd_offset:cd_offset + cd_size]
+
+def write_zip_from_members(zip_path, members):
+    """按顺序拼接 read_layer_member 读出的条目，只改写中央目录中的偏移，不重新压缩"""
+    with open(zip_path, 'wb') as out:
+        records = []
+        for local, record in members:
+            offset = out.tell()
+            out.write(local)
+            records.append(record[:ZIP_CENTRAL_OFFSET] + struct.pack('<L', offset) + record[ZIP_CENTRAL_OFFSET + 4:])
+        cd_offset = out.tell()
+        for record in records:
+            out.write(record)
+        cd_size = out.tell() - cd_offset
+        out.write(ZIP_END_RECORD.pack(ZIP_END_SIGNATURE, 0, 0, len(records), len(records), cd_size, cd_offset, 0))
+
+def build_cached_package(gerber_folder, jobs, zip_path, path_final, compression, compresslevel, now, cache):
+    """
+    使用转换缓存生成输出
+
+    每层以 (映射版本, jlc 文件名, 源文件哈希, 压缩参数) 为键，缓存为只含这一层的 ZIP
+    （已加好头部、已压缩）。没变的层直接复用，只处理改动过的层，
+    最后把各层的压缩数据原样拼接成输出 ZIP，不重新压缩；需要中间文件夹时再从 ZIP 中解出。
+    头部时间在第一次处理该层时写入并随缓存保留，所以复用的层中是第一次转换的时间。
+
+    源文件合计接近 ZIP64 的大小限制时不使用缓存，和不用缓存时一样直接写入 ZIP。
+
+    :param cache: 缓存快照 {'dir', 'mapping_version', 'sources', 'layers'}
+    :return: (处理的层数, 复用的层数, 缓存更新 {'sources', 'layers'})
+    """
+    total_size = sum(os.path.getsize(os.path.join(gerber_folder, file_name)) for file_name, _, _ in jobs)
+    if total_size * 1.05 > zipfile.ZIP64_LIMIT:
+        return write_package(gerber_folder, jobs, zip_path, path_final, compression, compresslevel, now), 0, None
+
+    layer_dir = os.path.join(cache['dir'], 'layers')
+    updates = {'sources': {}, 'layers': {}}
+    members = []
+    reused = 0
+    for file_name, jlc_filename, header_lines in jobs:
+        try:
+            sha = source_sha256(os.path.join(gerber_folder, file_name), cache['sources'], updates['sources'])
+            key = hashlib.sha256(
+                json.dumps([cache['mapping_version'], jlc_filename, sha, compression, compresslevel]).encode('utf-8')
+            ).hexdigest()
+            layer_path = os.path.join(layer_dir, f"{key}.zip")
+
+            if key in cache['layers'] and os.path.exists(layer_path):
+                member = read_layer_member(layer_path)
+                reused += 1
+                print(f"Cached: {file_name} -> {jlc_filename}")
+            else:
+                # 先写临时文件再重命名，并行任务写同一个键也不会读到半个文件
+                tmp_path = f"{layer_path}.{os.getpid()}.tmp"
+                try:
+                    with zipfile.ZipFile(tmp_path, 'w', ZIP_COMPRESSION[compression], compresslevel=compresslevel) as zipf:
+                        add_file_to_zip(zipf, gerber_folder, file_name, jlc_filename, header_lines, now)
+                    os.replace(tmp_path, layer_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                member = read_layer_member(layer_path)
+            members.append(member)
+            updates['layers'][key] = {'time': datetime.datetime.now().isoformat()}
+        except Exception as e:
+            print(f"Error processing file {file_name}: {e}")
+
+    write_zip_from_members(zip_path, members)
+    print(f"ZIP created: {zip_path}")
+    if path_final is not None:
+        create_folder(path_final)
+        clean_folder(path_final)
+        with zipfile.ZipFile(zip_path) as zipf:
+            zipf.extractall(path_final)
+    return len(members), reused, updates
+
+def convert_board(gerber_folder, zip_path, path_final=None, compression="deflate", compresslevel=None, now=None, cache=None):
+    """
+    转换单个 Gerber 文件夹并打包，所有路径都由参数给出，可在多个进程中并行执行
+
+    :param gerber_folder: 源 Gerber 文件夹
+    :param zip_path: 输出 ZIP 路径
+    :param path_final: 中间文件夹路径，None 表示直接写入 ZIP
+    :param compression: ZIP 压缩方式，ZIP_COMPRESSION 中的键
+    :param compresslevel: 压缩等级，None 表示使用默认值
+    :param now: 写入文件头的时间字符串，None 表示当前时间
+    :param cache: 缓存快照，None 表示不使用缓存
+    :return: 统计信息字典（层数、未匹配文件、耗时等）
+    """
+    start = time.perf_counter()
+    result = {
+        'gerber_folder': gerber_folder,
+        'zip_path': zip_path,
+        'layers': 0,
+        'unmatched': [],
+        'reused': 0,
+        'cache_updates': None,
+        'seconds': 0.0,
+        'error': None,
+    }
+    try:
+        # 加载 JSON 配置
+        json_data = load_json_data(GERBER_JSON)
+
+        # 一次列出目录，一次遍历完成文件到层的映射
+        matcher = build_layer_matcher(json_data)
+        layer_files, unmatched, ambiguous, duplicates = match_layer_files(
+            sorted(os.listdir(gerber_folder)), matcher
+        )
+        report_layer_matches(unmatched, ambiguous, duplicates, layer_files)
+        result['unmatched'] = unmatched
+
+        # 按 JSON 中的层顺序列出 (源文件名, jlc 文件名, 头部)
+        jobs = [
+            (layer_files[layer], config["jlc_filename"], config["jlc_header"])
+            for layer, config in json_data.items()
+            if layer in layer_files
+        ]
+
+        if cache is not None:
+            result['layers'], result['reused'], result['cache_updates'] = build_cached_package(
+                gerber_folder, jobs, zip_path, path_final, compression, compresslevel, now, cache
+            )
+        else:
+            result['layers'] = write_package(gerber_folder, jobs, zip_path, path_final, compression, compresslevel, now)
+    except Exception as e:
+        print(f"Error processing gerber folder {gerber_folder}: {e}")
+        result['error'] = str(e)
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def expand_gerber_folders(patterns):
+    """
+    展开命令行给出的文件夹（支持通配符，Windows 的命令行不会自动展开）
+
+    :return: (文件夹列表, 错误列表)：不存在的文件夹、一个文件夹都没匹配到的通配符各一条
+    """
+    folders = []
+    errors = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [m for m in sorted(glob.glob(pattern)) if os.path.isdir(m)]
+            if not matches:
+                errors.append(f"no Gerber folder matches '{pattern}'")
+            folders.extend(matches)
+        elif os.path.isdir(pattern):
+            folders.append(pattern)
+        else:
+            errors.append(f"Gerber folder not found: '{pattern}'")
+    return folders, errors
+
+def plan_jobs(gerber_folders, output_dir, keep_folder=False):
+    """
+    为每块板子分配互不冲突的输出路径
+
+    单板时沿用 jlc_gerber 文件夹名；多板时中间文件夹与 ZIP 同名。
+
+    :return: [(gerber_folder, zip_path, path_final)] 列表
+    """
+    timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    jobs = []
+    used = set()
+    for gerber_folder in gerber_folders:
+        stem = f"out_{get_gerber_file_prefix(gerber_folder)}-{timestamp}"
+        name, n = stem, 1
+        while name in used:  # 同前缀的多个变体
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name)
+
+        zip_path = os.path.join(output_dir, f"{name}.zip")
+        path_final = None
+        if keep_folder:
+            path_final = os.path.join(output_dir, 'jlc_gerber' if len(gerber_folders) == 1 else name)
+        jobs.append((gerber_folder, zip_path, path_final))
+    return jobs
+
+def print_summary(results):
+    """打印批量转换汇总表"""
+    print()
+    print(f"{'Gerber folder':<40} {'Layers':>6} {'Cached':>6} {'Unmatched':>9} {'Time(s)':>8}  ZIP")
+    for r in results:
+        zip_name = os.path.basename(r['zip_path']) if not r['error'] else f"ERROR: {r['error']}"
+        print(f"{r['gerber_folder']:<40} {r['layers']:>6} {r['reused']:>6} {len(r['unmatched']):>9} {r['seconds']:>8.2f}  {zip_name}")
+    for r in results:
+        for file_name in r['unmatched']:
+            print(f"Unmatched in {r['gerber_folder']}: {file_name}")
+
+def main(gerber_folders=None, output_dir=None, keep_folder=False, compression="deflate", compresslevel=None, workers=None, cache_dir=None):
+    """
+    转换一块或多块板子的 Gerber 文件并分别打包
+
+    :param gerber_folders: Gerber 文件夹列表，None 表示 exe 旁的 gerber 文件夹
+    :param output_dir: 输出目录，None 表示 exe 所在目录
+    :param keep_folder: 是否生成中间文件夹（默认直接写入 ZIP）
+    :param compression: ZIP 压缩方式，ZIP_COMPRESSION 中的键
+    :param compresslevel: 压缩等级，None 表示使用默认值
+    :param workers: 并行进程数，None 表示 CPU 核数
+    :param cache_dir: 转换缓存目录，None 表示不使用缓存
+    :return: 每块板子的统计信息列表
+    """
+    if not gerber_folders:
+        gerber_folders = [DEFAULT_GERBER_FOLDER]
+    if output_dir is None:
+        output_dir = BASE_PATH
+    create_folder(output_dir)
+
+    # 同一批次使用同一个文件头时间
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    jobs = plan_jobs(gerber_folders, output_dir, keep_folder)
+
+    # 子进程只读取缓存快照，清单由主进程统一合并写入
+    cache = None
+    if cache_dir is not None:
+        create_folder(os.path.join(cache_dir, 'layers'))
+        manifest = load_cache_manifest(cache_dir)
+        cache = {
+            'dir': cache_dir,
+            'mapping_version': file_sha256(GERBER_JSON),
+            'sources': manifest['sources'],
+            'layers': manifest['layers'],
+        }
+
+    if len(jobs) == 1 or workers == 1:
+        results = [
+            convert_board(folder, zip_path, path_final, compression, compresslevel, now, cache)
+            for folder, zip_path, path_final in jobs
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(convert_board, folder, zip_path, path_final, compression, compresslevel, now, cache)
+                for folder, zip_path, path_final in jobs
+            ]
+            results = [future.result() for future in futures]
+
+    if cache is not None:
+        for r in results:
+            if r['cache_updates']:
+                manifest['sources'].update(r['cache_updates']['sources'])
+                manifest['layers'].update(r['cache_updates']['layers'])
+        prune_cache(cache_dir, manifest)
+        save_cache_manifest(cache_dir, manifest)
+
+    if len(results) > 1:
+        print_summary(results)
+    return results
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()  # 打包成 exe 后子进程需要
+
+    parser = argparse.ArgumentParser(description='Convert KiCad/AD Gerber files to a JLC Gerber zip')
+    parser.add_argument('gerber_folders', nargs='*', help='Gerber 文件夹（可多个，支持通配符），默认为 exe 旁的 gerber')
+    parser.add_argument('--output', default=None, help='输出目录，默认为 exe 所在目录')
+    parser.add_argument('--jobs', type=int, default=None, help='并行进程数，默认为 CPU 核数')
+    parser.add_argument('--keep-folder', action='store_true', help='同时生成中间文件夹 jlc_gerber')
+    parser.add_argument('--compression', choices=list(ZIP_COMPRESSION), default='deflate', help='ZIP 压缩方式')
+    parser.add_argument('--level', type=int, default=None, help='压缩等级(deflate: 0-9)')
+    parser.add_argument('--cache', action='store_true',
+                        help='使用转换缓存：没变的层直接复用压缩好的结果，只处理改动过的层（文件头时间为第一次转换该层的时间）')
+    args = parser.parse_args()
+
+    # 批量转换时不能悄悄漏掉打错名字的板子
+    gerber_folders, errors = expand_gerber_folders(args.gerber_folders)
+    if errors:
+        parser.error('; '.join(errors))
+
+    main(
+        gerber_folders=gerber_folders,
+        output_dir=args.output,
+        keep_folder=args.keep_folder,
+        compression=args.compression,
+        compresslevel=args.level,
+        workers=args.jobs,
+        cache_dir=DEFAULT_CACHE_DIR if args.cache else None,
+    )
@@ -1,4 +1,5 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, localcontext
+from power_result import InductanceRange
 
 def calculate_boost_inductance(VIN, VOUT, IOUTmax, FSW, gamma_min=Decimal('0.1'), gamma_max=Decimal('0.3')):
     """
@@ -13,34 +14,63 @@ def calculate_boost_inductance(VIN, VOUT, IOUTmax, FSW, gamma_min=Decimal('0.1')
     gamma_max (Decimal): 最大电流纹波系数(默认0.3)
     
     返回:
-    dict: 包含LMAX(μH)和LMIN(μH)的字典，精度为12位
+    InductanceRange: (lmax, lmin)，单位μH，精度为12位
     """
-    # 设置12位精度
-    getcontext().prec = 12
+    # 设置12位精度（只在本次计算中生效，不修改全局精度）
+    with localcontext() as ctx:
+        ctx.prec = 12
+        
+        # 转换所有输入为Decimal以确保精确计算
+        VIN = Decimal(str(VIN))
+        VOUT = Decimal(str(VOUT))
+        IOUTmax = Decimal(str(IOUTmax))
+        FSW_MHz = Decimal(str(FSW))
+        
+        # 转换频率为Hz (1MHz = 1e6 Hz)
+        FSW_Hz = FSW_MHz * Decimal('1e6')
+        
+        # 计算LMAX (μH)
+        numerator_LMAX = VIN * VIN * (VOUT - VIN)
+        denominator_LMAX = gamma_min * IOUTmax * VOUT * VOUT * FSW_Hz
+        LMAX = (numerator_LMAX / denominator_LMAX) * Decimal('1e6')  # 转换为μH
+        
+        # 计算LMIN (μH)
+        numerator_LMIN = VIN * VIN * (VOUT - VIN)
+        denominator_LMIN = gamma_max * IOUTmax * VOUT * VOUT * FSW_Hz
+        LMIN = (numerator_LMIN / denominator_LMIN) * Decimal('1e6')  # 转换为μH
     
-    # 转换所有输入为Decimal以确保精确计算
-    VIN = Decimal(str(VIN))
-    VOUT = Decimal(str(VOUT))
-    IOUTmax = Decimal(str(IOUTmax))
-    FSW_MHz = Decimal(str(FSW))
-    
-    # 转换频率为Hz (1MHz = 1e6 Hz)
-    FSW_Hz = FSW_MHz * Decimal('1e6')
-    
-    # 计算LMAX (μH)
-    numerator_LMAX = VIN * VIN * (VOUT - VIN)
-    denominator_LMAX = gamma_min * IOUTmax * VOUT * VOUT * FSW_Hz
-    LMAX = (numerator_LMAX / denominator_LMAX) * Decimal('1e6')  # 转换为μH
-    
-    # 计算LMIN (μH)
-    numerator_LMIN = VIN * VIN * (VOUT - VIN)
-    denominator_LMIN = gamma_max * IOUTmax * VOUT * VOUT * FSW_Hz
-    LMIN = (numerator_LMIN / denominator_LMIN) * Decimal('1e6')  # 转换为μH
-    
-    return {
+    # 保留11位小数：在默认精度下量化，12位精度放不下≥10μH的结果
+    return InductanceRange(
         float(LMAX.quantize(Decimal('1.00000000000'))),
         float(LMIN.quantize(Decimal('1.00000000000')))
-    }
+    )
+
+def calculate_boost_inductance_batch(VIN, VOUT, IOUTmax, FSW, gamma_min=0.1, gamma_max=0.3, exact=False):
+    """
+    批量计算Boost升压电路的电感值(LMAX和LMIN)
+    
+    参数:
+    VIN, VOUT, IOUTmax, FSW: 同 calculate_boost_inductance，可以是数字、列表或NumPy数组，按NumPy规则广播
+    gamma_min, gamma_max: 最小/最大电流纹波系数(默认0.1/0.3)
+    exact (bool): False 时用 float64 向量化计算；True 时逐点调用 calculate_boost_inductance(Decimal)，用于核对
+    
+    返回:
+    tuple: (LMAX, LMIN) 两个与广播后形状相同的 float64 数组，单位μH
+    """
+    import numpy as np  # 只有批量计算需要
+
+    VIN, VOUT, IOUTmax, FSW = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (VIN, VOUT, IOUTmax, FSW))
+    )
+    if exact:
+        gammas = (Decimal(str(gamma_min)), Decimal(str(gamma_max)))
+        points = zip(VIN.ravel().tolist(), VOUT.ravel().tolist(), IOUTmax.ravel().tolist(), FSW.ravel().tolist())
+        LMAX, LMIN = np.array([calculate_boost_inductance(*point, *gammas) for point in points]).reshape(-1, 2).T
+        return LMAX.reshape(VIN.shape), LMIN.reshape(VIN.shape)
+
+    # FSW 单位为MHz，V/(A·MHz) 正好是μH
+    base = VIN * VIN * (VOUT - VIN) / (IOUTmax * VOUT * VOUT * FSW)
+    return base / gamma_min, base / gamma_max
 
 # 示例用法
 if __name__ == "__main__":
@@ -55,3 +85,12 @@ if __name__ == "__main__":
     print(f"LMAX: {lmax:.3f} μH")
     print(f"LMIN: {lmin:.3f} μH")
 
+    # 批量计算：输入电压 × 输出电流网格，并与逐点 Decimal 计算核对
+    import numpy as np
+    vins = np.linspace(3, 6.5, 100)[:, None]
+    iouts = np.array([0.5, 1.0, 1.5, 2.0])
+    lmax_batch, lmin_batch = calculate_boost_inductance_batch(vins, vout, iouts, fsw)
+    lmax_exact, lmin_exact = calculate_boost_inductance_batch(vins, vout, iouts, fsw, exact=True)
+    error = max(np.max(np.abs(lmax_batch / lmax_exact - 1)), np.max(np.abs(lmin_batch / lmin_exact - 1)))
+    print(f"批量计算 {lmax_batch.size} 个工作点，与 Decimal 逐点计算的最大相对误差: {error:.2e}")
+
@@ -1,5 +1,41 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, localcontext
 import math
+from power_result import result_type
+
+# SEPIC计算结果：数值字段（Decimal），打印时才按下面的显示名称、单位和格式生成文字
+SepicDesign = result_type('SepicDesign', [
+    ('vin_min', '输入最小电压(VDC)Vin(min)', 'V', '{}'),
+    ('vin_nominal', '额定输入电压(VDC)Vin', 'V', '{}'),
+    ('vin_max', '输入最大电压(VDC)Vin(max)', 'V', '{}'),
+    ('input_current', '输入电流(A)Iin', 'A', '{:.3f}'),
+    ('vout', '输出电压(VDC)Vout', 'V', '{}'),
+    ('iout', '输出电流(A)Iout', 'A', '{}'),
+    ('vd', '输出整流二极管正向压降(VDC)VD', 'V', '{}'),
+    ('low_voltage_duty_cycle', '低压占空比Dmax', '', '{:.9f}'),
+    ('high_voltage_duty_cycle', '高压占空比Dmin', '', '{:.9f}'),
+    ('inductor_ripple_current', '电感纹波电流(A)△IL', 'A', '{:.3f}'),
+    ('fsw_khz', '开关频率(KHz)Fsw', 'kHz', '{}'),
+    ('inductor_value_separate', 'L1=L2感量(uH)L(独立磁芯)', 'uH', '{:.8f}'),
+    ('inductor1_peak_current', 'L1电感峰值电流IL1(PEAK)', 'A', '{:.3f}'),
+    ('inductor2_peak_current', 'L2电感峰值电流IL2(PEAK)', 'A', '{:.3f}'),
+    ('inductor_value_shared', 'L1=L2感量(uH)L(公用磁芯)', 'uH', '{:.8f}'),
+    ('mosfet_peak_current', 'MOSFET IDS(PEAK)(A)', 'A', '{:.8f}'),
+    ('mosfet_rms_current', 'MOSFET IDS(RMS)(A)', 'A', '{:.8f}'),
+    ('mosfet_power_loss', 'MOSFET消耗功率PD(W)', 'W', '{:.8f}'),
+    ('diode_reverse_voltage', '二极管最小反向峰值电压VRD', 'V', '{:.1f}'),
+    ('mosfet_model', 'MOSFET型号', '', '{}'),
+    ('rds_on', 'MOSFET开通内阻RDS(ON)', 'Ω', '{}'),
+    ('qgd', 'MOSFET GD充电QGD', 'C', '{}'),
+    ('igate', 'MOSFET驱动电流IGATE', 'A', '{}'),
+    ('cs_avg_current', '耦合电容的平均电流ICS(A)', 'A', '{:.8f}'),
+    ('cs_ripple_voltage', '耦合电容的纹波电压△VCS(V)', 'V', '{:.8f}'),
+    ('cs_uf', '耦合电容Cs容量', 'uF', '{}'),
+    ('output_cap_current', '输出电容的平均电流ICout(A)', 'A', '{}'),
+    ('output_ripple_voltage', '输出电容的纹波电压Vripple(Vp-p)', 'V', '{}'),
+    ('max_output_esr', '输出电容ESR(Ω)', 'Ω', '≤ {:.8f}'),
+    ('min_output_capacitance', '输出电容容量Cout', 'uF', '≥ {:.8f}'),
+    ('input_cap_rms_current', '输入电容的平均电流Icin(RMS)(A)', 'A', '{:.8f}'),
+], doc='SEPIC转换器的计算结果')
 
 def calculate_sepic_parameters(
     vin_min: Decimal,  # 输入最小电压(VDC)
@@ -14,8 +50,9 @@ def calculate_sepic_parameters(
     rds_on: Decimal = Decimal('0.11'),  # MOSFET开通内阻(Ω)
     qgd: Decimal = Decimal('0.000012'),  # MOSFET GD充电
     igate: Decimal = Decimal('0.2'),  # MOSFET驱动电流(A)
-    output_ripple_voltage: Decimal = Decimal('0.06')  # 输出电容的纹波电压(Vp-p)
-) -> dict:
+    output_ripple_voltage: Decimal = Decimal('0.06'),  # 输出电容的纹波电压(Vp-p)
+    ripple_ratio: Decimal = Decimal('0.4')  # 电感纹波电流占输入电流的比例
+) -> SepicDesign:
     """
     计算SEPIC转换器的各项参数
     
@@ -33,93 +70,233 @@ def calculate_sepic_parameters(
         qgd: MOSFET GD充电 [默认: 0.000012]
         igate: MOSFET驱动电流(A) [默认: 0.2]
         output_ripple_voltage: 输出电容的纹波电压(Vp-p) [默认: 0.06]
+        ripple_ratio: 电感纹波电流占输入电流的比例 [默认: 0.4]
     
     返回:
-        包含所有计算参数的字典，带有明确单位
+        SepicDesign，字段为数值；formatted() 得到 {显示名称: 带单位的文字}
     """
-    # 设置Decimal精度为12
-    getcontext().prec = 12
+    # 设置Decimal精度为12（只在本次计算中生效，不修改全局精度）
+    with localcontext() as ctx:
+        ctx.prec = 12
+        
+        # 计算输入电流
+        input_current = iout * (vout + vd) / vin_min  # 修正公式
+        # input_current = iout * vout / vin_min
     
-    # 计算输入电流
-    input_current = iout * (vout + vd) / vin_min  # 修正公式
-    # input_current = iout * vout / vin_min
+        # 计算占空比
+        low_voltage_duty_cycle = (vout + vd) / (vin_min + vout + vd)
+        high_voltage_duty_cycle = (vout + vd) / (vin_max + vout + vd)
     
-    # 计算占空比
-    low_voltage_duty_cycle = (vout + vd) / (vin_min + vout + vd)
-    high_voltage_duty_cycle = (vout + vd) / (vin_max + vout + vd)
+        # 计算电感纹波电流(默认为输入电流的40%)
+        inductor_ripple_current = input_current * ripple_ratio
     
-    # 计算电感纹波电流(假设为输入电流的40%)
-    inductor_ripple_current = input_current * Decimal('0.4')
+        # 计算独立磁芯电感值(uH)
+        inductor_value_separate = (vin_min * low_voltage_duty_cycle * Decimal('1e3')) / (inductor_ripple_current * fsw_khz) 
     
-    # 计算独立磁芯电感值(uH)
-    inductor_value_separate = (vin_min * low_voltage_duty_cycle * Decimal('1e3')) / (inductor_ripple_current * fsw_khz) 
+        # 计算电感峰值电流
+        inductor1_peak_current = iout * vout * (Decimal('1') + ripple_ratio / Decimal('2')) / vin_min
+        inductor2_peak_current = iout * (Decimal('1') + ripple_ratio / Decimal('2'))
     
-    # 计算电感峰值电流
-    inductor1_peak_current = iout * vout * (Decimal('1') + Decimal('0.4') / Decimal('2')) / vin_min
-    inductor2_peak_current = iout * (Decimal('1') + Decimal('0.4') / Decimal('2'))
+        # 计算共用磁芯电感值(uH)
+        inductor_value_shared = vin_min * low_voltage_duty_cycle * Decimal('1e3') / ( Decimal('2') * inductor_ripple_current * fsw_khz)
     
-    # 计算共用磁芯电感值(uH)
-    inductor_value_shared = vin_min * low_voltage_duty_cycle * Decimal('1e3') / ( Decimal('2') * inductor_ripple_current * fsw_khz)
+        # 计算MOSFET参数
+        mosfet_peak_current = input_current / low_voltage_duty_cycle
+        mosfet_rms_current = input_current / Decimal(math.sqrt(float(low_voltage_duty_cycle)))
     
-    # 计算MOSFET参数
-    mosfet_peak_current = input_current / low_voltage_duty_cycle
-    mosfet_rms_current = input_current / Decimal(math.sqrt(float(low_voltage_duty_cycle)))
+        # 计算MOSFET消耗功率(W)
+        conduction_loss = mosfet_rms_current ** Decimal('2') * rds_on * low_voltage_duty_cycle
+        switching_loss = (vin_min + vout) * mosfet_peak_current * qgd * fsw_khz / (igate)
+        mosfet_power_loss = conduction_loss + switching_loss
     
-    # 计算MOSFET消耗功率(W)
-    conduction_loss = mosfet_rms_current ** Decimal('2') * rds_on * low_voltage_duty_cycle
-    switching_loss = (vin_min + vout) * mosfet_peak_current * qgd * fsw_khz / (igate)
-    mosfet_power_loss = conduction_loss + switching_loss
+        # 计算二极管最小反向峰值电压(V)
+        diode_reverse_voltage = vin_max + vout
     
-    # 计算二极管最小反向峰值电压(V)
-    diode_reverse_voltage = vin_max + vout
+        # 计算耦合电容参数
+        cs_avg_current = iout * Decimal(math.sqrt(float((vout + vd) / vin_min)))
+        # cs_avg_current = iout * Decimal(math.sqrt(float(vout / vin_min)))
+        cs_ripple_voltage = (iout * low_voltage_duty_cycle ) / (cs_uf * fsw_khz)
     
-    # 计算耦合电容参数
-    cs_avg_current = iout * Decimal(math.sqrt(float((vout + vd) / vin_min)))
-    # cs_avg_current = iout * Decimal(math.sqrt(float(vout / vin_min)))
-    cs_ripple_voltage = (iout * low_voltage_duty_cycle ) / (cs_uf * fsw_khz)
+        # 计算输出电容参数
+        max_output_esr = output_ripple_voltage * Decimal('0.5') / (inductor1_peak_current + inductor2_peak_current)
+        min_output_capacitance = (iout * low_voltage_duty_cycle)  / (output_ripple_voltage * fsw_khz * Decimal('0.5'))  # 转换为uF
     
-    # 计算输出电容参数
-    max_output_esr = output_ripple_voltage * Decimal('0.5') / (inductor1_peak_current + inductor2_peak_current)
-    min_output_capacitance = (iout * low_voltage_duty_cycle)  / (output_ripple_voltage * fsw_khz * Decimal('0.5'))  # 转换为uF
+        # 计算输入电容平均电流(A)
+        input_cap_rms_current = inductor_ripple_current / Decimal(math.sqrt(12))
     
-    # 计算输入电容平均电流(A)
-    input_cap_rms_current = inductor_ripple_current / Decimal(math.sqrt(12))
+    return SepicDesign(
+        vin_min=vin_min,
+        vin_nominal=vin_nominal,
+        vin_max=vin_max,
+        input_current=input_current,
+        vout=vout,
+        iout=iout,
+        vd=vd,
+        low_voltage_duty_cycle=low_voltage_duty_cycle,
+        high_voltage_duty_cycle=high_voltage_duty_cycle,
+        inductor_ripple_current=inductor_ripple_current,
+        fsw_khz=fsw_khz,
+        inductor_value_separate=inductor_value_separate,
+        inductor1_peak_current=inductor1_peak_current,
+        inductor2_peak_current=inductor2_peak_current,
+        inductor_value_shared=inductor_value_shared,
+        mosfet_peak_current=mosfet_peak_current,
+        mosfet_rms_current=mosfet_rms_current,
+        mosfet_power_loss=mosfet_power_loss,
+        diode_reverse_voltage=diode_reverse_voltage,
+        mosfet_model=mosfet_model,
+        rds_on=rds_on,
+        qgd=qgd,
+        igate=igate,
+        cs_avg_current=cs_avg_current,
+        cs_ripple_voltage=cs_ripple_voltage,
+        cs_uf=cs_uf,
+        output_cap_current=iout,
+        output_ripple_voltage=output_ripple_voltage,
+        max_output_esr=max_output_esr,
+        min_output_capacitance=min_output_capacitance,
+        input_cap_rms_current=input_cap_rms_current,
+    )
+
+# 批量计算结果的字段（数值，单位同 SepicDesign）
+SEPIC_FIELDS = (
+    'input_current',  # 输入电流(A)
+    'low_voltage_duty_cycle',  # 低压占空比Dmax
+    'high_voltage_duty_cycle',  # 高压占空比Dmin
+    'inductor_ripple_current',  # 电感纹波电流(A)
+    'inductor_value_separate',  # L1=L2感量，独立磁芯(uH)
+    'inductor1_peak_current',  # L1电感峰值电流(A)
+    'inductor2_peak_current',  # L2电感峰值电流(A)
+    'inductor_value_shared',  # L1=L2感量，公用磁芯(uH)
+    'mosfet_peak_current',  # MOSFET IDS(PEAK)(A)
+    'mosfet_rms_current',  # MOSFET IDS(RMS)(A)
+    'conduction_loss',  # MOSFET导通损耗(W)
+    'switching_loss',  # MOSFET开关损耗(W)
+    'mosfet_power_loss',  # MOSFET消耗功率(W)
+    'diode_reverse_voltage',  # 二极管最小反向峰值电压(V)
+    'cs_avg_current',  # 耦合电容的平均电流(A)
+    'cs_ripple_voltage',  # 耦合电容的纹波电压(V)
+    'max_output_esr',  # 输出电容ESR上限(Ω)
+    'min_output_capacitance',  # 输出电容容量下限(uF)
+    'input_cap_rms_current',  # 输入电容的平均电流(A)
+)
+# 扫描时可以给出一组候选值的参数
+SWEEP_PARAMS = ('vin_min', 'vin_max', 'vout', 'iout', 'fsw_khz', 'cs_uf', 'vd', 'rds_on', 'qgd', 'igate',
+                'output_ripple_voltage', 'ripple_ratio')
+
+def calculate_sepic_parameters_batch(
+    vin_min, vin_max, vout, iout, fsw_khz, cs_uf,
+    vd=0.35, rds_on=0.11, qgd=0.000012, igate=0.2, output_ripple_voltage=0.06, ripple_ratio=0.4
+):
+    """
+    批量计算SEPIC转换器的参数，公式与 calculate_sepic_parameters 相同
+    
+    参数:
+        同 calculate_sepic_parameters（不含 vin_nominal 和 mosfet_model），可以是数字、列表或NumPy数组，
+        按NumPy规则广播，用 float64 向量化计算
     
-    # 返回带有明确单位的格式化结果
+    返回:
+        {SEPIC_FIELDS中的字段: float64数组}
+    """
+    import numpy as np  # 只有批量计算需要
+
+    vin_min, vin_max, vout, iout, fsw_khz, cs_uf, vd, rds_on, qgd, igate, output_ripple_voltage, ripple_ratio = (
+        np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (
+            vin_min, vin_max, vout, iout, fsw_khz, cs_uf, vd, rds_on, qgd, igate, output_ripple_voltage, ripple_ratio
+        )))
+    )
+    input_current = iout * (vout + vd) / vin_min
+    low_voltage_duty_cycle = (vout + vd) / (vin_min + vout + vd)
+    inductor_ripple_current = input_current * ripple_ratio
+    inductor_value_separate = vin_min * low_voltage_duty_cycle * 1e3 / (inductor_ripple_current * fsw_khz)
+    inductor1_peak_current = iout * vout * (1 + ripple_ratio / 2) / vin_min
+    inductor2_peak_current = iout * (1 + ripple_ratio / 2)
+    mosfet_peak_current = input_current / low_voltage_duty_cycle
+    mosfet_rms_current = input_current / np.sqrt(low_voltage_duty_cycle)
+    conduction_loss = mosfet_rms_current ** 2 * rds_on * low_voltage_duty_cycle
+    switching_loss = (vin_min + vout) * mosfet_peak_current * qgd * fsw_khz / igate
     return {
-        '输入最小电压(VDC)Vin(min)': f"{vin_min} V",
-        '额定输入电压(VDC)Vin': f"{vin_nominal} V",
-        '输入最大电压(VDC)Vin(max)': f"{vin_max} V",
-        '输入电流(A)Iin': f"{input_current:.3f} A",
-        '输出电压(VDC)Vout': f"{vout} V",
-        '输出电流(A)Iout': f"{iout} A",
-        '输出整流二极管正向压降(VDC)VD': f"{vd} V",
-        '低压占空比Dmax': f"{low_voltage_duty_cycle:.9f}",
-        '高压占空比Dmin': f"{high_voltage_duty_cycle:.9f}",
-        '电感纹波电流(A)△IL': f"{inductor_ripple_current:.3f} A",
-        '开关频率(KHz)Fsw': f"{fsw_khz} kHz",
-        'L1=L2感量(uH)L(独立磁芯)': f"{inductor_value_separate:.8f} uH",
-        'L1电感峰值电流IL1(PEAK)': f"{inductor1_peak_current:.3f} A",
-        'L2电感峰值电流IL2(PEAK)': f"{inductor2_peak_current:.3f} A",
-        'L1=L2感量(uH)L(公用磁芯)': f"{inductor_value_shared:.8f} uH",
-        'MOSFET IDS(PEAK)(A)': f"{mosfet_peak_current:.8f} A",
-        'MOSFET IDS(RMS)(A)': f"{mosfet_rms_current:.8f} A",
-        'MOSFET消耗功率PD(W)': f"{mosfet_power_loss:.8f} W",
-        '二极管最小反向峰值电压VRD': f"{diode_reverse_voltage:.1f} V",
-        'MOSFET型号': mosfet_model,
-        'MOSFET开通内阻RDS(ON)': f"{rds_on} Ω",
-        'MOSFET GD充电QGD': f"{qgd} C",
-        'MOSFET驱动电流IGATE': f"{igate} A",
-        '耦合电容的平均电流ICS(A)': f"{cs_avg_current:.8f} A",
-        '耦合电容的纹波电压△VCS(V)': f"{cs_ripple_voltage:.8f} V",
-        '耦合电容Cs容量': f"{cs_uf} uF",
-        '输出电容的平均电流ICout(A)': f"{iout} A",
-        '输出电容的纹波电压Vripple(Vp-p)': f"{output_ripple_voltage} V",
-        '输出电容ESR(Ω)': f"≤ {max_output_esr:.8f} Ω",
-        '输出电容容量Cout': f"≥ {min_output_capacitance:.8f} uF",
-        '输入电容的平均电流Icin(RMS)(A)': f"{input_cap_rms_current:.8f} A"
+        'input_current': input_current,
+        'low_voltage_duty_cycle': low_voltage_duty_cycle,
+        'high_voltage_duty_cycle': (vout + vd) / (vin_max + vout + vd),
+        'inductor_ripple_current': inductor_ripple_current,
+        'inductor_value_separate': inductor_value_separate,
+        'inductor1_peak_current': inductor1_peak_current,
+        'inductor2_peak_current': inductor2_peak_current,
+        'inductor_value_shared': inductor_value_separate / 2,
+        'mosfet_peak_current': mosfet_peak_current,
+        'mosfet_rms_current': mosfet_rms_current,
+        'conduction_loss': conduction_loss,
+        'switching_loss': switching_loss,
+        'mosfet_power_loss': conduction_loss + switching_loss,
+        'diode_reverse_voltage': vin_max + vout,
+        'cs_avg_current': iout * np.sqrt((vout + vd) / vin_min),
+        'cs_ripple_voltage': iout * low_voltage_duty_cycle / (cs_uf * fsw_khz),
+        'max_output_esr': output_ripple_voltage * 0.5 / (inductor1_peak_current + inductor2_peak_current),
+        'min_output_capacitance': iout * low_voltage_duty_cycle / (output_ripple_voltage * fsw_khz * 0.5),
+        'input_cap_rms_current': inductor_ripple_current / np.sqrt(12),
     }
 
+def sweep_sepic_designs(
+    vin_min, vin_max, vout, iout, fsw_khz, cs_uf,
+    vd=0.35, rds_on=0.11, qgd=0.000012, igate=0.2, output_ripple_voltage=0.06, ripple_ratio=0.4
+):
+    """
+    SEPIC设计空间扫描：每个参数可以是单个值或一组候选值，对所有组合（笛卡尔积）一次向量化计算
+    
+    例如 fsw_khz=np.linspace(100, 1000, 50), rds_on=[0.05, 0.11, 0.2] 会得到 150 个候选设计。
+    
+    返回:
+        NumPy结构化数组，每行一个设计，字段为 SWEEP_PARAMS 中的输入参数加上 SEPIC_FIELDS 中的计算结果，
+        可以用 designs[designs['cs_ripple_voltage'] < 0.5] 这样的条件筛选
+    """
+    import numpy as np  # 只有批量计算需要
+
+    values = [vin_min, vin_max, vout, iout, fsw_khz, cs_uf, vd, rds_on, qgd, igate, output_ripple_voltage, ripple_ratio]
+    grids = np.meshgrid(*(np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in values), indexing='ij')
+    inputs = dict(zip(SWEEP_PARAMS, (grid.ravel() for grid in grids)))
+    results = calculate_sepic_parameters_batch(**inputs)
+
+    designs = np.empty(len(inputs['fsw_khz']), dtype=[(name, np.float64) for name in SWEEP_PARAMS + SEPIC_FIELDS])
+    for name, column in {**inputs, **results}.items():
+        designs[name] = column
+    return designs
+
+def pareto_front(designs, objectives=('mosfet_power_loss', 'inductor_value_separate')):
+    """
+    返回不被其它设计支配的设计（所有 objectives 都越小越好），按第一个目标从小到大排序
+    
+    两个目标时排序后一次扫描完成；更多目标时逐个与已保留的设计比较。
+    """
+    import numpy as np  # 只有批量计算需要
+
+    order = np.lexsort(tuple(designs[name] for name in reversed(objectives)))
+    costs = np.column_stack([designs[name][order] for name in objectives])
+    if len(objectives) == 2:
+        # 按第一个目标排好序后，第二个目标比之前所有设计都小的才不被支配
+        best_before = np.minimum.accumulate(np.concatenate(([np.inf], costs[:-1, 1])))
+        keep = costs[:, 1] < best_before
+    else:
+        keep = np.zeros(len(order), dtype=bool)
+        kept = np.empty((0, len(objectives)))
+        for i, cost in enumerate(costs):
+            if not np.any(np.all(kept <= cost, axis=1)):
+                keep[i] = True
+                kept = np.vstack([kept, cost])
+    return designs[order[keep]]
+
+def top_k_designs(designs, k=10, objectives=('mosfet_power_loss', 'inductor_value_separate'), weights=None):
+    """
+    按加权得分选出最好的 k 个设计：每个目标先除以其最小值归一化，再按 weights（默认相等）加权求和，得分越小越好
+    """
+    import numpy as np  # 只有批量计算需要
+
+    weights = np.ones(len(objectives)) if weights is None else np.asarray(weights, dtype=np.float64)
+    score = sum(w * designs[name] / designs[name].min() for w, name in zip(weights, objectives))
+    k = min(k, len(designs))
+    best = np.argpartition(score, k - 1)[:k]
+    return designs[best[np.argsort(score[best])]]
+
 
 # 示例用法
 if __name__ == "__main__":
@@ -135,5 +312,25 @@ if __name__ == "__main__":
     )
     
     # 打印结果
-    for key, value in params.items():
-        print(f"{key.ljust(35)}: {value}")
\ No newline at end of file
+    for key, value in params.formatted().items():
+        print(f"{key.ljust(35)}: {value}")
+
+    # 设计空间扫描：开关频率 × 耦合电容 × 纹波比例 × MOSFET(RDS(ON), QGD)
+    import time
+    import numpy as np
+    start = time.perf_counter()
+    designs = sweep_sepic_designs(
+        vin_min=5, vin_max=8.4, vout=12, iout=0.5,
+        fsw_khz=np.linspace(100, 1000, 37),
+        cs_uf=[4.7, 10, 22],
+        ripple_ratio=np.linspace(0.2, 0.6, 9),
+        rds_on=[0.05, 0.11, 0.2],
+        qgd=[0.000004, 0.000008, 0.000012],
+    )
+    designs = designs[designs['cs_ripple_voltage'] <= 0.1]  # 耦合电容纹波不超过0.1V
+    front = pareto_front(designs)
+    print(f"\n扫描 {len(designs)} 个满足约束的设计，用时 {time.perf_counter() - start:.3f} s，Pareto最优 {len(front)} 个:")
+    print(f"{'Fsw(kHz)':>9} {'Cs(uF)':>7} {'纹波比例':>6} {'RDS(ON)':>8} {'QGD(C)':>9} {'L(uH)':>9} {'PD(W)':>9}")
+    for row in top_k_designs(front, k=10):
+        print(f"{row['fsw_khz']:9.1f} {row['cs_uf']:7.1f} {row['ripple_ratio']:10.2f} {row['rds_on']:8.2f} "
+              f"{row['qgd']:9.1e} {row['inductor_value_separate']:9.3f} {row['mosfet_power_loss']:9.4f}")
\ No newline at end of file
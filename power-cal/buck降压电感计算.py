@@ -1,4 +1,8 @@
-from decimal import Decimal, getcontext
+from decimal import Decimal, localcontext
+from power_result import InductanceRange
+
+GAMMA_MAX = 0.4 # 最大纹波系数
+GAMMA_MIN = 0.2 # 最小纹波系数
 
 def calculate_buck_inductance(
     vin, vout, iout_max, fsw 
@@ -12,34 +16,59 @@ def calculate_buck_inductance(
         iout_max: 最大输出电流(A)
         fsw: 开关频率(MHz) 
     返回:
-        (Lmax, Lmin) 单位μH
+        InductanceRange(lmax, lmin) 单位μH
     """
-    # 设置计算精度
-    getcontext().prec = 10 # 计算精度(小数位数)
-    gamma_max = Decimal(str(0.4)) # 最大纹波系数
-    gamma_min = Decimal(str(0.2)) # 最小纹波系数
-    
-    # 转换为Decimal类型
-    vout = Decimal(str(vout))
-    vin = Decimal(str(vin))
-    iout_max = Decimal(str(iout_max))
-    fsw_mhz = Decimal(str(fsw))
-    
-    # 将MHz转换为Hz
-    fsw_hz = fsw_mhz * Decimal('1e6')
-    
-    # 计算占空比相关项 (1 - Vout/Vin)
-    duty_term = (Decimal('1') - vout / vin)
+    # 设置计算精度（只在本次计算中生效，不修改全局精度）
+    with localcontext() as ctx:
+        ctx.prec = 10 # 计算精度(小数位数)
+        gamma_max = Decimal(str(GAMMA_MAX)) # 最大纹波系数
+        gamma_min = Decimal(str(GAMMA_MIN)) # 最小纹波系数
+        
+        # 转换为Decimal类型
+        vout = Decimal(str(vout))
+        vin = Decimal(str(vin))
+        iout_max = Decimal(str(iout_max))
+        fsw_mhz = Decimal(str(fsw))
+        
+        # 将MHz转换为Hz
+        fsw_hz = fsw_mhz * Decimal('1e6')
+        
+        # 计算占空比相关项 (1 - Vout/Vin)
+        duty_term = (Decimal('1') - vout / vin)
+        
+        # 计算Lmax和Lmin
+        lmax = (vout * duty_term) / (gamma_min * iout_max * fsw_hz)
+        lmin = (vout * duty_term) / (gamma_max * iout_max * fsw_hz)
+        
+        # 转换为μH
+        lmax_uh = lmax * Decimal('1e6')
+        lmin_uh = lmin * Decimal('1e6')
     
-    # 计算Lmax和Lmin
-    lmax = (vout * duty_term) / (gamma_min * iout_max * fsw_hz)
-    lmin = (vout * duty_term) / (gamma_max * iout_max * fsw_hz)
-    
-    # 转换为μH
-    lmax_uh = lmax * Decimal('1e6')
-    lmin_uh = lmin * Decimal('1e6')
+    return InductanceRange(float(lmax_uh), float(lmin_uh))
+
+def calculate_buck_inductance_batch(vin, vout, iout_max, fsw, exact=False):
+    """
+    批量计算Buck电路的Lmax和Lmin电感值
     
-    return float(lmax_uh), float(lmin_uh)
+    参数:
+        vin, vout, iout_max, fsw: 同 calculate_buck_inductance，可以是数字、列表或NumPy数组，按NumPy规则广播
+        exact: False 时用 float64 向量化计算；True 时逐点调用 calculate_buck_inductance(Decimal)，用于核对
+    返回:
+        (Lmax, Lmin) 两个与广播后形状相同的 float64 数组，单位μH
+    """
+    import numpy as np  # 只有批量计算需要
+
+    vin, vout, iout_max, fsw = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (vin, vout, iout_max, fsw))
+    )
+    if exact:
+        points = zip(vin.ravel().tolist(), vout.ravel().tolist(), iout_max.ravel().tolist(), fsw.ravel().tolist())
+        lmax, lmin = np.array([calculate_buck_inductance(*point) for point in points]).reshape(-1, 2).T
+        return lmax.reshape(vin.shape), lmin.reshape(vin.shape)
+
+    # fsw 单位为MHz，V/(A·MHz) 正好是μH
+    base = vout * (1 - vout / vin) / (iout_max * fsw)
+    return base / GAMMA_MIN, base / GAMMA_MAX
 
 if __name__ == "__main__":
     vin = 12.0       # 输入电压(V)
@@ -52,4 +81,13 @@ if __name__ == "__main__":
     )
     
     print(f"LMAX: {lmax:.3f} μH")
-    print(f"LMIN: {lmin:.3f} μH")
\ No newline at end of file
+    print(f"LMIN: {lmin:.3f} μH")
+
+    # 批量计算：输入电压 × 开关频率网格，并与逐点 Decimal 计算核对
+    import numpy as np
+    vins = np.linspace(5, 24, 100)[:, None]
+    fsws = np.array([0.5, 1.0, 2.0, 2.4])
+    lmax_batch, lmin_batch = calculate_buck_inductance_batch(vins, vout, iout_max, fsws)
+    lmax_exact, lmin_exact = calculate_buck_inductance_batch(vins, vout, iout_max, fsws, exact=True)
+    error = max(np.max(np.abs(lmax_batch / lmax_exact - 1)), np.max(np.abs(lmin_batch / lmin_exact - 1)))
+    print(f"批量计算 {lmax_batch.size} 个工作点，与 Decimal 逐点计算的最大相对误差: {error:.2e}")
\ No newline at end of file
@@ -0,0 +1,168 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from buck降压电感计算 import calculate_buck_inductance_batch, GAMMA_MIN
+from BOOST升压电感计算 import calculate_boost_inductance_batch
+from SEPIC主要参数设计 import calculate_sepic_parameters_batch
+
+BATCH_SIZE = 200_000  # 每批抽样数：限制单批中间数组的大小，也是多进程分配的单位；各批的指标都保留下来算百分位数，总内存仍随抽样数增长
+PARALLEL_SAMPLES = 2_000_000  # 抽样数达到该值时默认用多进程
+PERCENTILES = (0.1, 1, 5, 50, 95, 99, 99.9)
+
+def uniform(low, high):
+    """[low, high] 内的均匀分布"""
+    return ('uniform', low, high)
+
+def normal(mean, sigma):
+    """正态分布"""
+    return ('normal', mean, sigma)
+
+def tolerance(nominal, relative):
+    """标称值 ± relative 的均匀分布，如 tolerance(10, 0.2) 表示 10 ±20%"""
+    return uniform(nominal * (1 - relative), nominal * (1 + relative))
+
+def sample(spec, rng, size):
+    """按分布抽样 size 个值；spec 是数字时为固定值"""
+    if isinstance(spec, tuple):
+        kind, a, b = spec
+        if kind == 'uniform':
+            return rng.uniform(a, b, size)
+        if kind == 'normal':
+            return rng.normal(a, b, size)
+        raise ValueError(f"未知的分布: {kind}")
+    return np.full(size, float(spec))
+
+def buck_model(vin, vout, iout, fsw, l_uh, rds_on):
+    """
+    Buck：实际电感 l_uh(μH) 下的纹波和MOSFET导通损耗，fsw 单位MHz
+
+    calculate_buck_inductance 的公式 L = Vout(1-Vout/Vin)/(γ·Iout·Fsw) 反过来得到实际纹波系数 γ。
+    """
+    lmax, _ = calculate_buck_inductance_batch(vin, vout, iout, fsw)
+    ripple_ratio = lmax * GAMMA_MIN / l_uh
+    ripple_current = ripple_ratio * iout
+    duty = vout / vin
+    return {
+        'ripple_ratio': ripple_ratio,
+        'ripple_current': ripple_current,
+        'peak_current': iout + ripple_current / 2,
+        'mosfet_loss': duty * (iout ** 2 + ripple_current ** 2 / 12) * rds_on,
+    }
+
+def boost_model(vin, vout, iout, fsw, l_uh, rds_on):
+    """
+    Boost：实际电感 l_uh(μH) 下的纹波和MOSFET导通损耗，fsw 单位MHz
+
+    calculate_boost_inductance 的公式 L = Vin²(Vout-Vin)/(γ·Iout·Vout²·Fsw) 反过来得到实际纹波系数 γ（相对输入电流）。
+    """
+    base, _ = calculate_boost_inductance_batch(vin, vout, iout, fsw, gamma_min=1.0)
+    ripple_ratio = base / l_uh
+    input_current = iout * vout / vin
+    ripple_current = ripple_ratio * input_current
+    duty = 1 - vin / vout
+    return {
+        'ripple_ratio': ripple_ratio,
+        'ripple_current': ripple_current,
+        'peak_current': input_current + ripple_current / 2,
+        'mosfet_loss': duty * (input_current ** 2 + ripple_current ** 2 / 12) * rds_on,
+    }
+
+def sepic_model(vin, vin_max, vout, iout, fsw_khz, cs_uf, l_uh, vd, rds_on, qgd, igate, output_ripple_voltage=0.06):
+    """
+    SEPIC：实际电感 l_uh(μH，独立磁芯) 和输入电压 vin 下的纹波、峰值电流和MOSFET损耗
+
+    由 L = Vin·D·1e3/(ΔIL·Fsw) 得到实际纹波比例后，交给 calculate_sepic_parameters_batch 计算。
+    """
+    duty = (vout + vd) / (vin + vout + vd)
+    input_current = iout * (vout + vd) / vin
+    ripple_ratio = vin * duty * 1e3 / (l_uh * fsw_khz * input_current)
+    results = calculate_sepic_parameters_batch(
+        vin, vin_max, vout, iout, fsw_khz, cs_uf, vd, rds_on, qgd, igate, output_ripple_voltage, ripple_ratio
+    )
+    return {
+        'ripple_ratio': ripple_ratio,
+        'ripple_current': results['inductor_ripple_current'],
+        'peak_current': np.maximum(results['inductor1_peak_current'], results['inductor2_peak_current']),
+        'mosfet_peak_current': results['mosfet_peak_current'],
+        'mosfet_loss': results['mosfet_power_loss'],
+        'cs_ripple_voltage': results['cs_ripple_voltage'],
+    }
+
+MODELS = {'buck': buck_model, 'boost': boost_model, 'sepic': sepic_model}
+
+def run_batch(model, params, seed, size):
+    """抽样并计算一批，返回 (指标数组, 每个指标最大时的参数)"""
+    rng = np.random.default_rng(seed)
+    values = {name: sample(spec, rng, size) for name, spec in params.items()}
+    metrics = MODELS[model](**values)
+    worst = {}
+    for name, column in metrics.items():
+        i = int(np.argmax(column))
+        worst[name] = {param: float(value[i]) for param, value in values.items()}
+    return metrics, worst
+
+def run_monte_carlo(model, params, samples=1_000_000, seed=0, workers=None):
+    """
+    蒙特卡洛容差分析
+
+    参数:
+        model: 'buck' / 'boost' / 'sepic'，参数见对应的 *_model 函数
+        params: {参数名: 数字或分布(uniform/normal/tolerance)}
+        samples: 抽样数
+        seed: 随机种子；每批使用由它派生的独立种子，结果与进程数无关
+        workers: 进程数，默认抽样数达到 PARALLEL_SAMPLES 时用全部CPU，否则单进程
+    返回:
+        {指标: {'mean', 'std', 'min', 'p0.1', ..., 'max', 'worst_case': 指标最大时的参数}}
+    """
+    sizes = [min(BATCH_SIZE, samples - start) for start in range(0, samples, BATCH_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is None:
+        workers = os.cpu_count() if samples >= PARALLEL_SAMPLES else 1
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(run_batch, [model] * len(sizes), [params] * len(sizes), seeds, sizes))
+    else:
+        batches = [run_batch(model, params, s, size) for s, size in zip(seeds, sizes)]
+
+    report = {}
+    for name in batches[0][0]:
+        column = np.concatenate([metrics[name] for metrics, _ in batches])
+        stats = {'mean': float(column.mean()), 'std': float(column.std()), 'min': float(column.min())}
+        for p, value in zip(PERCENTILES, np.percentile(column, PERCENTILES)):
+            stats[f"p{p:g}"] = float(value)
+        stats['max'] = float(column.max())
+        worst_batch = max(range(len(batches)), key=lambda b: batches[b][0][name].max())
+        stats['worst_case'] = batches[worst_batch][1][name]
+        report[name] = stats
+    return report
+
+def format_report(report):
+    """把 run_monte_carlo 的结果排成文字表格"""
+    columns = ['mean', 'min'] + [f"p{p:g}" for p in PERCENTILES] + ['max']
+    lines = [f"{'':<20}" + ''.join(f"{column:>11}" for column in columns)]
+    for name, stats in report.items():
+        lines.append(f"{name:<20}" + ''.join(f"{stats[column]:>11.5g}" for column in columns))
+    return '\n'.join(lines)
+
+# 示例用法
+if __name__ == "__main__":
+    import time
+
+    # 电感 ±20%，输入电压在范围内变化，二极管压降离散，RDS(ON) 随温度最多升高 60%
+    cases = {
+        'buck': dict(vin=uniform(10.8, 13.2), vout=3.3, iout=2.0, fsw=tolerance(1.0, 0.05),
+                     l_uh=tolerance(4.7, 0.2), rds_on=uniform(0.03, 0.048)),
+        'boost': dict(vin=uniform(4.5, 5.5), vout=7, iout=1.5, fsw=tolerance(2.4, 0.05),
+                      l_uh=tolerance(2.2, 0.2), rds_on=uniform(0.03, 0.048)),
+        'sepic': dict(vin=uniform(5, 8.4), vin_max=8.4, vout=12, iout=0.5, fsw_khz=tolerance(400, 0.05),
+                      cs_uf=tolerance(22, 0.2), l_uh=tolerance(22, 0.2), vd=normal(0.35, 0.03),
+                      rds_on=uniform(0.11, 0.176), qgd=tolerance(0.000012, 0.1), igate=tolerance(0.2, 0.1)),
+    }
+    for model, params in cases.items():
+        start = time.perf_counter()
+        report = run_monte_carlo(model, params, samples=4_000_000, seed=1)
+        print(f"\n{model}: 4000000 次抽样，用时 {time.perf_counter() - start:.2f} s")
+        print(format_report(report))
+        worst = report['mosfet_loss']['worst_case']
+        print("MOSFET损耗最大时: " + ', '.join(f"{name}={value:.4g}" for name, value in worst.items()))
@@ -0,0 +1,191 @@
+import os
+import csv
+import bisect
+from decimal import Decimal
+from functools import lru_cache
+from power_result import result_type
+
+# 虚构的示例零件表（型号和参数都不是真实器件），只用于演示和基准测试；实际选型用 --catalog 指定自己的零件表目录
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parts_example')
+INDUCTOR_CSV = 'inductors.csv'  # 零件表目录中的文件名
+MOSFET_CSV = 'mosfets.csv'
+CURRENT_MARGIN = 1.2  # 电感饱和电流、MOSFET额定电流相对峰值电流的余量
+VOLTAGE_MARGIN = 1.25  # MOSFET耐压相对最大VDS的余量
+
+Inductor = result_type('Inductor', [
+    ('part_number', '型号', '', '{}'),
+    ('inductance_uh', '感量', 'uH', '{}'),
+    ('isat_a', '饱和电流', 'A', '{}'),
+    ('irms_a', '温升电流', 'A', '{}'),
+    ('dcr_mohm', '直流电阻', 'mΩ', '{}'),
+    ('package', '封装', '', '{}'),
+], doc='目录中的电感')
+
+Mosfet = result_type('Mosfet', [
+    ('part_number', '型号', '', '{}'),
+    ('vds_v', '耐压VDS', 'V', '{}'),
+    ('id_a', '额定电流ID', 'A', '{}'),
+    ('rds_on_ohm', '开通内阻RDS(ON)', 'Ω', '{}'),
+    ('qgd_nc', 'GD充电QGD', 'nC', '{}'),
+    ('package', '封装', '', '{}'),
+], doc='目录中的MOSFET')
+
+TEXT_FIELDS = ('part_number', 'package')
+
+def load_parts(path, part_type, key):
+    """读入CSV零件表（列名与 part_type 字段相同），数值列转为 float，按 key 从小到大排序"""
+    with open(path, newline='', encoding='utf-8') as f:
+        parts = [
+            part_type(**{name: row[name] if name in TEXT_FIELDS else float(row[name]) for name in part_type._fields})
+            for row in csv.DictReader(f)
+        ]
+    parts.sort(key=lambda part: getattr(part, key))
+    return parts
+
+class PartsCatalog:
+    """
+    本地电感/MOSFET选型目录
+
+    零件表只读入一次：电感按感量、MOSFET按耐压排序，用 bisect 做范围查询。
+    电流要求换算成饱和电流/额定电流档位的下标，查询结果按 (下标...) 记忆，
+    设计扫描中大量相近的查询落在同一组下标上，直接返回缓存的结果。
+    """
+
+    def __init__(self, inductor_csv, mosfet_csv):
+        self.inductors = load_parts(inductor_csv, Inductor, 'inductance_uh')
+        self.inductances = [part.inductance_uh for part in self.inductors]
+        self.isat_levels = sorted({part.isat_a for part in self.inductors})
+        self.mosfets = load_parts(mosfet_csv, Mosfet, 'vds_v')
+        self.vds_ratings = [part.vds_v for part in self.mosfets]
+        self.id_levels = sorted({part.id_a for part in self.mosfets})
+
+        # 每个目录单独记忆
+        self.select_inductors = lru_cache(maxsize=None)(self.select_inductors)
+        self.select_mosfets = lru_cache(maxsize=None)(self.select_mosfets)
+
+    def find_inductors(self, lmin_uh, lmax_uh=None, peak_current_a=0.0, limit=5):
+        """
+        感量在 [lmin_uh, lmax_uh] 内、饱和电流不小于 peak_current_a × CURRENT_MARGIN 的电感，按直流电阻从小到大
+
+        不给 lmax_uh 时取满足电流要求、不小于 lmin_uh 的最近一档标准感量。
+        """
+        lo = bisect.bisect_left(self.inductances, lmin_uh)
+        hi = None if lmax_uh is None else bisect.bisect_right(self.inductances, lmax_uh)
+        level = bisect.bisect_left(self.isat_levels, peak_current_a * CURRENT_MARGIN)
+        return self.select_inductors(lo, hi, level, limit)
+
+    def select_inductors(self, lo, hi, level, limit):
+        if level >= len(self.isat_levels):
+            return ()
+        candidates = [part for part in self.inductors[lo:hi] if part.isat_a >= self.isat_levels[level]]
+        if hi is None and candidates:
+            candidates = [part for part in candidates if part.inductance_uh == candidates[0].inductance_uh]
+        return tuple(sorted(candidates, key=lambda part: part.dcr_mohm)[:limit])
+
+    def find_mosfets(self, vds_v, peak_current_a, limit=5):
+        """
+        耐压不小于 vds_v × VOLTAGE_MARGIN、额定电流不小于 peak_current_a × CURRENT_MARGIN 的MOSFET
+
+        先选耐压最低的一档，同档内按 RDS(ON) × QGD 从小到大。
+        """
+        lo = bisect.bisect_left(self.vds_ratings, vds_v * VOLTAGE_MARGIN)
+        level = bisect.bisect_left(self.id_levels, peak_current_a * CURRENT_MARGIN)
+        return self.select_mosfets(lo, level, limit)
+
+    def select_mosfets(self, lo, level, limit):
+        if level >= len(self.id_levels):
+            return ()
+        candidates = [part for part in self.mosfets[lo:] if part.id_a >= self.id_levels[level]]
+        return tuple(sorted(candidates, key=lambda part: (part.vds_v, part.rds_on_ohm * part.qgd_nc))[:limit])
+
+    def cache_info(self):
+        """(命中次数, 未命中次数)"""
+        infos = (self.select_inductors.cache_info(), self.select_mosfets.cache_info())
+        return sum(info.hits for info in infos), sum(info.misses for info in infos)
+
+def load_catalog(directory):
+    """读入目录 directory 下的 inductors.csv 和 mosfets.csv"""
+    return PartsCatalog(os.path.join(directory, INDUCTOR_CSV), os.path.join(directory, MOSFET_CSV))
+
+def design_value(design, name):
+    """从 SepicDesign 或 sweep_sepic_designs 结果的一行中取出数值"""
+    return float(getattr(design, name) if hasattr(design, '_fields') else design[name])
+
+def select_sepic_parts(design, catalog, limit=5):
+    """
+    为SEPIC设计选择电感和MOSFET
+
+    电感：不小于独立磁芯感量的最近一档，饱和电流按 L1/L2 峰值电流中较大者；
+    MOSFET：耐压按二极管最小反向峰值电压(Vin(max)+Vout)，电流按 MOSFET IDS(PEAK)。
+
+    参数:
+        catalog: PartsCatalog，例如 load_catalog(零件表目录)
+
+    返回:
+        (电感元组, MOSFET元组)
+    """
+    peak_current = max(design_value(design, 'inductor1_peak_current'), design_value(design, 'inductor2_peak_current'))
+    inductors = catalog.find_inductors(design_value(design, 'inductor_value_separate'), None, peak_current, limit)
+    mosfets = catalog.find_mosfets(
+        design_value(design, 'diode_reverse_voltage'), design_value(design, 'mosfet_peak_current'), limit
+    )
+    return inductors, mosfets
+
+def mosfet_sepic_parameters(mosfet):
+    """
+    把目录中的MOSFET换成 calculate_sepic_parameters 的参数
+
+    calculate_sepic_parameters 的开关频率单位为kHz，qgd 相应按 nC × 1e-6 传入（默认值 0.000012 即 12nC）。
+    """
+    return {
+        'mosfet_model': mosfet.part_number,
+        'rds_on': Decimal(str(mosfet.rds_on_ohm)),
+        'qgd': Decimal(str(mosfet.qgd_nc)) * Decimal('1e-6'),
+    }
+
+# 示例用法
+if __name__ == "__main__":
+    import time
+    import argparse
+    import numpy as np
+    from buck降压电感计算 import calculate_buck_inductance, GAMMA_MAX
+    from SEPIC主要参数设计 import calculate_sepic_parameters, sweep_sepic_designs
+
+    parser = argparse.ArgumentParser(description='按计算结果从零件表中选择电感和MOSFET')
+    parser.add_argument('--catalog', required=True,
+                        help=f'零件表目录（含 {INDUCTOR_CSV} 和 {MOSFET_CSV}）；虚构的示例数据在 {EXAMPLE_DIR}')
+    args = parser.parse_args()
+    catalog = load_catalog(args.catalog)
+
+    # Buck：感量在 [LMIN, LMAX] 内，峰值电流 = IOUT × (1 + γmax/2)
+    lmax, lmin = calculate_buck_inductance(12.0, 3.3, 2.0, 1.0)
+    print(f"Buck LMIN~LMAX: {lmin:.3f}~{lmax:.3f} μH")
+    for part in catalog.find_inductors(lmin, lmax, 2.0 * (1 + GAMMA_MAX / 2)):
+        print(f"  {part.part_number:<14} {part.format('inductance_uh'):>9} {part.format('isat_a'):>8} {part.format('dcr_mohm'):>10}")
+
+    # SEPIC：按计算结果选型，再用选中的MOSFET重新计算损耗
+    design = calculate_sepic_parameters(
+        vin_min=Decimal('5'), vin_nominal=Decimal('7.4'), vin_max=Decimal('8.4'),
+        vout=Decimal('12'), iout=Decimal('0.5'), fsw_khz=Decimal('400'), cs_uf=Decimal('22')
+    )
+    inductors, mosfets = select_sepic_parts(design, catalog)
+    print(f"\nSEPIC 电感: {inductors[0].part_number if inductors else '无'}，"
+          f"MOSFET: {', '.join(part.part_number for part in mosfets) or '无'}")
+    if mosfets:
+        chosen = calculate_sepic_parameters(
+            vin_min=Decimal('5'), vin_nominal=Decimal('7.4'), vin_max=Decimal('8.4'),
+            vout=Decimal('12'), iout=Decimal('0.5'), fsw_khz=Decimal('400'), cs_uf=Decimal('22'),
+            **mosfet_sepic_parameters(mosfets[0])
+        )
+        print(f"使用 {mosfets[0].part_number}: {chosen.format('mosfet_power_loss')}")
+
+    # 设计扫描：为每个候选设计选型
+    designs = sweep_sepic_designs(
+        vin_min=5, vin_max=8.4, vout=12, iout=np.linspace(0.2, 1.0, 9),
+        fsw_khz=np.linspace(100, 1000, 91), cs_uf=22, ripple_ratio=np.linspace(0.2, 0.6, 9),
+    )
+    start = time.perf_counter()
+    selected = [select_sepic_parts(row, catalog) for row in designs]
+    hits, misses = catalog.cache_info()
+    print(f"\n为 {len(designs)} 个设计选型用时 {time.perf_counter() - start:.3f} s（缓存命中 {hits}，未命中 {misses}），"
+          f"{sum(1 for inductors, mosfets in selected if inductors and mosfets)} 个设计有合适的零件")
@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+class CalcResult:
+    """
+    计算结果的公共方法，由 result_type 生成的 NamedTuple 子类继承
+
+    字段保存原始数值，可以直接解包、按名称访问或参与运算；
+    只有调用 format/formatted 或打印时才生成带单位的文字。
+    """
+    __slots__ = ()
+    SPECS = {}  # 字段名 -> (显示名称, 单位, 格式模板)
+
+    def format(self, name):
+        """把一个字段格式化为带单位的文字"""
+        _, unit, template = self.SPECS[name]
+        text = template.format(getattr(self, name))
+        return f"{text} {unit}" if unit else text
+
+    def formatted(self):
+        """{显示名称: 带单位的文字}，按字段顺序"""
+        return {self.SPECS[name][0]: self.format(name) for name in self._fields}
+
+    def units(self):
+        """{字段名: 单位}"""
+        return {name: self.SPECS[name][1] for name in self._fields}
+
+    def __str__(self):
+        return '\n'.join(f"{label}: {text}" for label, text in self.formatted().items())
+
+def result_type(name, fields, doc=None):
+    """
+    创建计算结果类型：带 __slots__ 的 NamedTuple，另外记录每个字段的显示名称、单位和格式
+
+    参数:
+        name: 类型名
+        fields: [(字段名, 显示名称, 单位, 格式模板)]，格式模板如 '{:.3f}'，单位为空时不显示
+        doc: 类型说明
+    """
+    base = namedtuple(name, [field[0] for field in fields])
+    namespace = {
+        '__slots__': (),
+        '__doc__': doc or base.__doc__,
+        'SPECS': {field: (label, unit, template) for field, label, unit, template in fields},
+    }
+    return type(name, (base, CalcResult), namespace)
+
+# Buck/Boost 电感计算结果
+InductanceRange = result_type('InductanceRange', [
+    ('lmax', 'LMAX', 'μH', '{:.3f}'),
+    ('lmin', 'LMIN', 'μH', '{:.3f}'),
+], doc='电感取值范围(LMAX, LMIN)，单位μH')
@@ -0,0 +1,13 @@
+"""
+测试共用设置：各工具都是直接运行的脚本，这里把它们所在的目录加入 sys.path，
+测试中可以像脚本之间互相导入那样直接 import（文件名不是合法模块名的脚本用 importlib 按路径导入）
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for folder in ('download_form_yiqifuwu', 'get-url-image', 'power-cal'):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,370 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+
+import pytest
+
+import download_form_csv as downloader
+
+VIEWER_URL = 'https://example.com/statics/js/pdf/web/viewer.html?file=/uploadfile/file/1.pdf'
+OLD_PDF = b'%PDF-1.4 old ' + b'a' * 4000
+NEW_PDF = b'%PDF-1.4 new ' + b'b' * 5000
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None, error=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+        if self.error is not None:
+            raise self.error
+
+class FakeServer:
+    """按 Range/If-Range 返回 body 的替身会话；ignore_if_range 模拟不支持 If-Range 的服务器"""
+
+    def __init__(self, body, etag='"v1"', ignore_if_range=False, error=None):
+        self.body = body
+        self.etag = etag
+        self.ignore_if_range = ignore_if_range
+        self.error = error
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers))
+        full_headers = {'ETag': self.etag, 'Content-Length': str(len(self.body))}
+        range_header = headers.get('Range')
+        if range_header and (self.ignore_if_range or headers.get('If-Range') == self.etag):
+            start = int(range_header[len('bytes='):-1])
+            return FakeResponse(206, self.body[start:], {
+                'ETag': self.etag,
+                'Content-Range': f'bytes {start}-{len(self.body) - 1}/{len(self.body)}',
+            }, self.error)
+        return FakeResponse(200, self.body, full_headers, self.error)
+
+class NoWait:
+    def wait(self, url):
+        pass
+
+def start_download(tmp_path, body, etag):
+    """模拟一次在中途断开的下载，留下 .part 和它的校验信息"""
+    save_path = str(tmp_path / 'file.download')
+    server = FakeServer(body, etag, error=downloader.requests.exceptions.ChunkedEncodingError('connection broken'))
+    with pytest.raises(Exception):
+        downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path)
+    with open(save_path + '.part', 'r+b') as f:
+        f.truncate(2000)
+    return save_path
+
+def test_resume_appends_when_file_unchanged(tmp_path):
+    save_path = start_download(tmp_path, OLD_PDF, '"v1"')
+    server = FakeServer(OLD_PDF, '"v1"')
+
+    assert downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path) == len(OLD_PDF)
+
+    assert server.requests[0]['Range'] == 'bytes=2000-'
+    assert server.requests[0]['If-Range'] == '"v1"'
+    with open(save_path, 'rb') as f:
+        assert f.read() == OLD_PDF
+    assert not os.path.exists(save_path + '.part')
+    assert not os.path.exists(save_path + '.part.json')
+
+def test_resume_restarts_when_file_changed(tmp_path):
+    save_path = start_download(tmp_path, OLD_PDF, '"v1"')
+    server = FakeServer(NEW_PDF, '"v2"')
+
+    downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path)
+
+    with open(save_path, 'rb') as f:
+        assert f.read() == NEW_PDF
+
+def test_resume_rejects_different_total_length(tmp_path):
+    save_path = start_download(tmp_path, OLD_PDF, '"v1"')
+    server = FakeServer(NEW_PDF, '"v1"', ignore_if_range=True)
+
+    with pytest.raises(downloader.RetryableError):
+        downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path)
+
+    assert not os.path.exists(save_path + '.part')
+    assert not os.path.exists(save_path + '.part.json')
+
+def test_part_without_validator_is_downloaded_again(tmp_path):
+    save_path = str(tmp_path / 'file.download')
+    with open(save_path + '.part', 'wb') as f:
+        f.write(OLD_PDF[:2000])
+    server = FakeServer(NEW_PDF, '"v2"', ignore_if_range=True)
+
+    downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path)
+
+    assert 'Range' not in server.requests[0]
+    with open(save_path, 'rb') as f:
+        assert f.read() == NEW_PDF
+
+@pytest.mark.parametrize('error', [
+    downloader.requests.exceptions.ChunkedEncodingError('connection broken'),
+    downloader.requests.exceptions.ContentDecodingError('truncated gzip'),
+    ConnectionResetError('reset by peer'),
+])
+def test_interrupted_body_is_retryable_and_keeps_part(tmp_path, error):
+    save_path = str(tmp_path / 'file.download')
+    server = FakeServer(OLD_PDF, '"v1"', error=error)
+
+    with pytest.raises(downloader.RetryableError) as info:
+        downloader.download_pdf(server, NoWait(), VIEWER_URL, save_path)
+
+    assert isinstance(downloader.classify_error(info.value), downloader.RetryableError)
+    assert os.path.getsize(save_path + '.part') == len(OLD_PDF)
+
+def test_classify_error():
+    assert isinstance(downloader.classify_error(downloader.ProtocolError('eof')), downloader.RetryableError)
+    assert isinstance(downloader.classify_error(downloader.requests.Timeout()), downloader.RetryableError)
+    assert isinstance(downloader.classify_error(ValueError('bad')), downloader.PermanentError)
+
+def test_failed_link_is_recorded_and_queue_continues(tmp_path, monkeypatch):
+    output = tmp_path / 'out'
+    csv_path = tmp_path / 'urls.csv'
+    csv_path.write_text(
+        'page_num,page_url,viewer_url,title,status\n'
+        f'1,p1,{VIEWER_URL},first,success\n'
+        f'2,p2,{VIEWER_URL.replace("1.pdf", "2.pdf")},second,success\n',
+        encoding='utf-8',
+    )
+    monkeypatch.setattr(downloader, 'create_session', lambda workers: FakeServer(OLD_PDF))
+    real_link = downloader.link_file
+
+    def link_file(src, dst):
+        if dst.endswith('first.pdf'):
+            raise PermissionError('read-only')
+        real_link(src, dst)
+
+    monkeypatch.setattr(downloader, 'link_file', link_file)
+
+    downloader.download_pdfs_from_csv(str(csv_path), str(output), workers=2, rate=1000)
+
+    assert (output / 'second.pdf').read_bytes() == OLD_PDF
+    failed = (output / 'failed_downloads.csv').read_text(encoding='utf-8')
+    assert 'first' in failed and 'read-only' in failed and 'second' not in failed
+
+class ScriptedSession:
+    """按 URL 依次返回预设状态码的替身会话，预设用完后返回 PDF；requests 记录请求过的 URL"""
+
+    def __init__(self, script=None, body=OLD_PDF):
+        self.script = {url: list(statuses) for url, statuses in (script or {}).items()}
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        statuses = self.script.get(url)
+        if statuses:
+            status, response_headers = statuses.pop(0)
+            return FakeResponse(status, b'<html>busy</html>', response_headers)
+        return FakeResponse(200, self.body, {'ETag': '"v1"', 'Content-Length': str(len(self.body))})
+
+class RecordingLimiter:
+    def __init__(self):
+        self.slowed = []
+        self.sped_up = []
+
+    def wait(self, url):
+        pass
+
+    def slow_down(self, url):
+        self.slowed.append(url)
+
+    def speed_up(self, url):
+        self.sped_up.append(url)
+
+def viewer_url(n):
+    return VIEWER_URL.replace('1.pdf', f'{n}.pdf')
+
+def pdf_url(n):
+    return downloader.extract_real_pdf_url(viewer_url(n))
+
+def make_pending(tmp_path, count):
+    output = tmp_path / 'out'
+    output.mkdir(exist_ok=True)
+    return {
+        pdf_url(n): [(f'title {n}', f'title {n}.pdf', viewer_url(n), str(output / f'title {n}.pdf'))]
+        for n in range(1, count + 1)
+    }, downloader.PdfStore(str(output))
+
+@pytest.fixture
+def backoff_calls(monkeypatch):
+    """不真正等待的退避，记录每次调用的 (attempt, retry_after)"""
+    calls = []
+
+    def backoff_delay(attempt, retry_after=None):
+        calls.append((attempt, retry_after))
+        return 0
+
+    monkeypatch.setattr(downloader, 'backoff_delay', backoff_delay)
+    return calls
+
+def test_throttled_download_is_retried_then_succeeds(tmp_path, backoff_calls):
+    pending, store = make_pending(tmp_path, 1)
+    session = ScriptedSession({pdf_url(1): [(429, {'Retry-After': '7'})]})
+    limiter = RecordingLimiter()
+    failed = []
+
+    downloader.run_download_queue(session, limiter, store, pending, 2, failed)
+
+    assert failed == []
+    assert session.requests == [pdf_url(1), pdf_url(1)]
+    assert backoff_calls == [(0, 7.0)]
+    assert limiter.slowed == [pdf_url(1)]
+    assert limiter.sped_up == [pdf_url(1)]
+    assert (tmp_path / 'out' / 'title 1.pdf').read_bytes() == OLD_PDF
+
+def test_retries_stop_after_max_retries(tmp_path, backoff_calls):
+    pending, store = make_pending(tmp_path, 1)
+    session = ScriptedSession({pdf_url(1): [(503, {})] * 100})
+    limiter = RecordingLimiter()
+    failed = []
+
+    downloader.run_download_queue(session, limiter, store, pending, 2, failed)
+
+    assert len(session.requests) == downloader.MAX_RETRIES + 1
+    assert backoff_calls == [(attempt, None) for attempt in range(downloader.MAX_RETRIES)]
+    assert len(limiter.slowed) == downloader.MAX_RETRIES
+    assert limiter.sped_up == []
+    assert len(failed) == 1
+    assert failed[0]['title'] == 'title 1' and failed[0]['url'] == pdf_url(1)
+    assert f'重试{downloader.MAX_RETRIES}次后仍失败' in failed[0]['error']
+    assert not (tmp_path / 'out' / 'title 1.pdf').exists()
+
+def test_server_error_without_throttling_does_not_slow_down(tmp_path, backoff_calls):
+    pending, store = make_pending(tmp_path, 1)
+    session = ScriptedSession({pdf_url(1): [(500, {})]})
+    limiter = RecordingLimiter()
+    failed = []
+
+    downloader.run_download_queue(session, limiter, store, pending, 2, failed)
+
+    assert failed == []
+    assert backoff_calls == [(0, None)]
+    assert limiter.slowed == []
+
+def test_throttling_halves_concurrency_and_successes_restore_it(tmp_path, backoff_calls, monkeypatch):
+    # 每轮等本轮提交的下载全部完成，提交的数量就是当时允许的并发数
+    batches = []
+
+    def wait_all(futures, timeout=None, return_when=None):
+        batches.append(len(futures))
+        return concurrent.futures.wait(futures, timeout=timeout)
+
+    monkeypatch.setattr(downloader, 'wait', wait_all)
+    pending, store = make_pending(tmp_path, 12)
+    session = ScriptedSession({pdf_url(n): [(429, {})] for n in range(1, 5)})
+    failed = []
+
+    downloader.run_download_queue(session, RecordingLimiter(), store, pending, 4, failed)
+
+    # 第一轮4个都被限流：4 -> 2 -> 1 -> 1；之后每次成功加一，最多回到4
+    assert batches == [4, 1, 2, 4, 4, 1]
+    assert failed == []
+    assert len(session.requests) == 16
+
+def test_backoff_delay_uses_retry_after_as_lower_bound(monkeypatch):
+    monkeypatch.setattr(downloader.random, 'uniform', lambda low, high: high)
+    assert downloader.backoff_delay(0, retry_after=7.0) == 7.0
+    assert downloader.backoff_delay(3, retry_after=1.0) == downloader.BACKOFF_BASE * 2 ** 3
+    assert downloader.backoff_delay(20) == downloader.BACKOFF_MAX
+    monkeypatch.setattr(downloader.random, 'uniform', lambda low, high: low)
+    assert downloader.backoff_delay(5, retry_after=30.0) == 30.0
+
+def test_only_permanent_failures_reach_failed_csv(tmp_path, backoff_calls, monkeypatch):
+    output = tmp_path / 'out'
+    csv_path = tmp_path / 'urls.csv'
+    csv_path.write_text(
+        'page_num,page_url,viewer_url,title,status\n'
+        f'1,p1,{viewer_url(1)},throttled,success\n'
+        f'2,p2,{viewer_url(2)},missing,success\n'
+        f'3,p3,{viewer_url(3)},flaky,success\n',
+        encoding='utf-8',
+    )
+    session = ScriptedSession({
+        pdf_url(1): [(429, {'Retry-After': '1'}), (503, {})],
+        pdf_url(2): [(404, {})],
+        pdf_url(3): [(502, {})],
+    })
+    monkeypatch.setattr(downloader, 'create_session', lambda workers: session)
+
+    downloader.download_pdfs_from_csv(str(csv_path), str(output), workers=2, rate=1000)
+
+    assert (output / 'throttled.pdf').read_bytes() == OLD_PDF
+    assert (output / 'flaky.pdf').read_bytes() == OLD_PDF
+    assert session.requests.count(pdf_url(2)) == 1
+    failed = (output / 'failed_downloads.csv').read_text(encoding='utf-8').splitlines()
+    assert len(failed) == 2
+    assert failed[1].startswith('missing,') and 'HTTP状态码: 404' in failed[1]
+
+def write_rows(csv_path, rows):
+    csv_path.write_text(
+        'page_num,page_url,viewer_url,title,status\n'
+        + ''.join(f'{n},p{n},{url},{title},success\n' for n, (title, url) in enumerate(rows, 1)),
+        encoding='utf-8',
+    )
+
+def run_with_server(monkeypatch, csv_path, output, server):
+    monkeypatch.setattr(downloader, 'create_session', lambda workers: server)
+    downloader.download_pdfs_from_csv(str(csv_path), str(output), workers=2, rate=1000)
+
+def store_blobs(output):
+    return sorted(name for name in os.listdir(output / downloader.STORE_DIR) if name.endswith('.pdf'))
+
+def test_same_pdf_url_is_fetched_once_for_two_titles(tmp_path, monkeypatch):
+    output = tmp_path / 'out'
+    csv_path = tmp_path / 'urls.csv'
+    write_rows(csv_path, [('first', VIEWER_URL), ('second', VIEWER_URL + '#page=2')])
+    server = FakeServer(OLD_PDF)
+
+    run_with_server(monkeypatch, csv_path, output, server)
+
+    assert len(server.requests) == 1
+    assert os.path.samefile(output / 'first.pdf', output / 'second.pdf')
+    assert (output / 'first.pdf').read_bytes() == OLD_PDF
+    assert len(store_blobs(output)) == 1
+
+def test_rerun_skips_urls_in_store_index(tmp_path, monkeypatch):
+    output = tmp_path / 'out'
+    csv_path = tmp_path / 'urls.csv'
+    write_rows(csv_path, [('first', VIEWER_URL)])
+    run_with_server(monkeypatch, csv_path, output, FakeServer(OLD_PDF))
+    index = json.loads((output / downloader.STORE_DIR / downloader.STORE_INDEX).read_text(encoding='utf-8'))
+    assert list(index) == [downloader.extract_real_pdf_url(VIEWER_URL)]
+
+    # 换一个标题再跑一次：URL 已在索引中，直接从仓库链接
+    write_rows(csv_path, [('renamed', VIEWER_URL)])
+    server = FakeServer(NEW_PDF)
+    run_with_server(monkeypatch, csv_path, output, server)
+
+    assert server.requests == []
+    assert os.path.samefile(output / 'first.pdf', output / 'renamed.pdf')
+    assert (output / 'renamed.pdf').read_bytes() == OLD_PDF
+
+def test_identical_content_from_different_urls_shares_one_blob(tmp_path, monkeypatch):
+    output = tmp_path / 'out'
+    csv_path = tmp_path / 'urls.csv'
+    other_url = VIEWER_URL.replace('1.pdf', 'copy.pdf')
+    write_rows(csv_path, [('first', VIEWER_URL), ('copy', other_url)])
+    server = FakeServer(OLD_PDF)
+
+    run_with_server(monkeypatch, csv_path, output, server)
+
+    assert len(server.requests) == 2
+    assert store_blobs(output) == [hashlib.sha256(OLD_PDF).hexdigest() + '.pdf']
+    assert os.path.samefile(output / 'first.pdf', output / 'copy.pdf')
+    index = json.loads((output / downloader.STORE_DIR / downloader.STORE_INDEX).read_text(encoding='utf-8'))
+    assert len(index) == 2 and len(set(index.values())) == 1
+    assert not [name for name in os.listdir(output / downloader.STORE_DIR) if name.endswith('.download')]
@@ -0,0 +1,237 @@
+import asyncio
+import csv
+import os
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import download_form_yiqifuwu as crawler
+
+STANDARD_PAGE = (
+    '<html><head><title>GB/T {n}-2020 示例标准-宜器服务网</title></head><body>'
+    '<iframe src="/statics/js/pdf/web/viewer.html?file=/uploadfile/file/{n}.pdf"></iframe></body></html>'
+)
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, page_data):
+        self.rows.append(page_data)
+
+async def serve_and_crawl(handler, plan, concurrency):
+    """启动本地 aiohttp 服务器，用 crawl_async 抓取，返回 (写入的结果, 服务器收到的页码)"""
+    requested = []
+
+    async def standard_page(request):
+        n = int(request.match_info['n'])
+        requested.append(n)
+        return handler(n)
+
+    app = web.Application()
+    app.router.add_get('/standard/{n}.html', standard_page)
+    server = TestServer(app)
+    await server.start_server()
+    sink = ListSink()
+    try:
+        await crawler.crawl_async(plan, sink, concurrency, rate=1000, base_url=str(server.make_url('')).rstrip('/'))
+    finally:
+        await server.close()
+    return sink.rows, requested
+
+def test_token_bucket_paces_requests_after_burst():
+    async def take(bucket, n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    async def run():
+        burst = await take(crawler.TokenBucket(rate=20, burst=5), 5)
+        paced = await take(crawler.TokenBucket(rate=20, burst=1), 6)  # 第一个令牌现成，之后每 50ms 一个
+        return burst, paced
+
+    burst, paced = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.23 <= paced < 0.5
+
+def test_token_bucket_shared_by_concurrent_tasks():
+    async def run():
+        bucket = crawler.TokenBucket(rate=50, burst=1)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+        return time.monotonic() - start
+
+    assert 0.18 <= asyncio.run(run()) < 0.5
+
+def test_crawl_async_stops_after_max_errors(monkeypatch):
+    monkeypatch.setattr(crawler, 'MAX_ERRORS', 5)
+    concurrency = 3
+    plan = crawler.CrawlPlan(1)
+
+    rows, requested = asyncio.run(serve_and_crawl(lambda n: web.Response(status=500), plan, concurrency))
+
+    assert plan.error_count >= 5
+    # 达到上限后不再发新请求，只有已经发出的请求会完成
+    assert len(requested) < 5 + concurrency
+    assert sorted(row['page_num'] for row in rows) == sorted(requested)
+    assert all(row['status'].startswith('error') for row in rows)
+
+def test_crawl_async_saves_pages_before_errors(monkeypatch):
+    monkeypatch.setattr(crawler, 'MAX_ERRORS', 3)
+
+    def handler(n):
+        if n <= 10:
+            return web.Response(text=STANDARD_PAGE.format(n=n), content_type='text/html')
+        return web.Response(status=404)
+
+    rows, requested = asyncio.run(serve_and_crawl(handler, crawler.CrawlPlan(1), concurrency=4))
+
+    found = {row['page_num']: row for row in rows if row['status'] == 'success'}
+    assert sorted(found) == list(range(1, 11))
+    assert found[7]['title'] == 'GB/T 7-2020 示例标准'
+    assert found[7]['viewer_url'].endswith('viewer.html?file=/uploadfile/file/7.pdf')
+    assert 3 <= len(requested) - 10 < 3 + 4
+
+VIEWER = '/statics/js/pdf/web/viewer.html?file=/uploadfile/file/{}.pdf'
+PARSER_EDGE_CASES = {
+    'plain': STANDARD_PAGE.format(n=1),
+    'commented iframe': (
+        f'<title>t</title><!-- <iframe src="{VIEWER.format("commented")}"> --><iframe src="{VIEWER.format("real")}">'
+    ),
+    'iframe in script string': (
+        f'<title>t</title><script>var s = \'<iframe src="{VIEWER.format("script")}">\';</script>'
+        f'<iframe src="{VIEWER.format("real")}">'
+    ),
+    'uppercase script': f'<TITLE>t</TITLE><SCRIPT>x="<IFRAME SRC=\'{VIEWER.format("script")}\'>"</SCRIPT>',
+    'mixed case script': (
+        f'<title>t</title><Script>x="<iframe src=\'{VIEWER.format("script")}\'>"</SCRIPT><iframe src="{VIEWER.format(7)}">'
+    ),
+    'iframe after closed script': f'<title>t</title><script src="a.js"></script><IFRAME SRC=\'{VIEWER.format(2)}\'>',
+    'iframe in style': f'<title>t</title><style>/* <iframe src="{VIEWER.format("style")}"> */</style>',
+    'mark in link': f'<title>t</title><a href="{VIEWER.format("link")}">pdf</a><iframe src="{VIEWER.format(3)}">',
+    'mark in other attribute': f'<title>t</title><iframe data-src="{VIEWER.format(4)}" src="/blank.html">',
+    'no iframe': '<title>GB/T 1-2020</title><p>没有文件</p>',
+    'empty title': f'<title></title><iframe src="{VIEWER.format(5)}">',
+    'no title': f'<iframe src="{VIEWER.format(6)}">',
+    'title entities': '<title>GB/T 1 &amp; 2 &lt;试行&gt;</title>',
+}
+
+@pytest.mark.parametrize('html', PARSER_EDGE_CASES.values(), ids=PARSER_EDGE_CASES.keys())
+def test_fast_parser_matches_bs4(html):
+    assert crawler.extract_title_and_viewer(html) == crawler.extract_title_and_viewer_bs4(html)
+
+def test_commented_iframe_is_skipped():
+    title, viewer_path = crawler.extract_title_and_viewer(PARSER_EDGE_CASES['commented iframe'])
+
+    assert viewer_path == VIEWER.format('real')
+
+def test_empty_title_is_saved_as_blank():
+    page = crawler.parse_standard_page(5, 'https://example.com/standard/5.html', PARSER_EDGE_CASES['empty title'])
+
+    assert (page['title'], page['status']) == ('', 'success')
+
+def page(n, status='success'):
+    viewer_url = f'https://example.com{VIEWER.format(n)}' if status == 'success' else None
+    return {'page_num': n, 'page_url': f'https://example.com/standard/{n}.html', 'viewer_url': viewer_url,
+            'title': f'GB/T {n}', 'status': status}
+
+def write_csv(path, pages):
+    sink = crawler.CsvAppender(str(path))
+    for page_data in pages:
+        sink.add(page_data)
+    sink.save()
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return [(int(row['page_num']), row['status']) for row in csv.DictReader(f)]
+
+def take(plan, count):
+    pages = []
+    while len(pages) < count and (n := plan.next_page()) is not None:
+        pages.append(n)
+    return pages
+
+def test_resume_plan_skips_done_and_retries_earlier_errors(tmp_path):
+    path = tmp_path / 'urls.csv'
+    write_csv(path, [page(1), page(2, 'error: 502'), page(3, 'no_iframe_found'), page(4),
+                     page(5, 'error: timeout'), page(6, 'error: timeout')])
+    plan = crawler.CsvIndex(str(path)).plan()
+
+    # 2 在最后一个正常页面 4 之前，重试；5、6 之后的页面按新页面重新抓
+    assert plan.retry_pages == [2]
+    assert take(plan, 4) == [2, 5, 6, 7]
+
+def test_resume_plan_without_csv_starts_from_first_page(tmp_path):
+    plan = crawler.CsvIndex(str(tmp_path / 'missing.csv')).plan()
+
+    assert take(plan, 2) == [crawler.START_PAGE, crawler.START_PAGE + 1]
+
+def test_resume_plan_stops_after_consecutive_errors(monkeypatch):
+    monkeypatch.setattr(crawler, 'MAX_ERRORS', 3)
+    plan = crawler.CrawlPlan(start_page=10, retry_pages=[4], consecutive=True)
+    results = {4: 'error: 502', 10: 'error: 502', 11: 'error: 502', 12: 'success', 13: 'error: 502',
+               14: 'error: 502', 15: 'error: 502'}
+    crawled = []
+    while (n := plan.next_page()) is not None:
+        crawled.append(n)
+        plan.record(page(n, results[n]))
+
+    # 重试页面的错误不计数，成功页面把连续错误清零
+    assert crawled == [4, 10, 11, 12, 13, 14, 15]
+
+def test_index_updates_rows_and_saves_atomically(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, 'SAVE_EVERY', 2)
+    path = tmp_path / 'urls.csv'
+    write_csv(path, [page(1), page(2, 'error: 502')])
+    index = crawler.CsvIndex(str(path))
+
+    index.add(page(3))
+    assert read_csv(path) == [(1, 'success'), (2, 'error: 502')]  # 还没到 SAVE_EVERY
+    index.add(page(2))
+    assert read_csv(path) == [(1, 'success'), (2, 'success'), (3, 'success')]
+    assert os.listdir(tmp_path) == ['urls.csv']
+
+    # 写临时文件中途出错时，原有的索引保持不变
+    index.add({**page(4), 'unexpected': 'field'})
+    with pytest.raises(ValueError):
+        index.save()
+    assert read_csv(path) == [(1, 'success'), (2, 'success'), (3, 'success')]
+
+def test_appender_writes_out_of_order_results_in_page_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, 'FLUSH_ROWS', 3)
+    path = tmp_path / 'urls.csv'
+    sink = crawler.CsvAppender(str(path))
+
+    for n in (2, 3, 5):
+        sink.add(page(n))
+    assert read_csv(path) == []  # 页面 1 还没完成，后面的都不能写
+    sink.add(page(1))
+    assert read_csv(path) == [(1, 'success'), (2, 'success'), (3, 'success')]  # 满 FLUSH_ROWS 行写一次
+    sink.add(page(4))
+    assert len(read_csv(path)) == 3  # 4、5 还在缓冲区
+    sink.save()
+    assert read_csv(path) == [(n, 'success') for n in range(1, 6)]
+
+def test_appender_flushes_after_flush_seconds(tmp_path):
+    path = tmp_path / 'urls.csv'
+    sink = crawler.CsvAppender(str(path))
+    sink.add(page(1))
+    assert read_csv(path) == []
+
+    sink.last_flush -= crawler.FLUSH_SECONDS
+    sink.add(page(2))
+    assert read_csv(path) == [(1, 'success'), (2, 'success')]
+    sink.save()
+
+def test_appender_save_writes_leftover_pages_on_interrupt(tmp_path):
+    path = tmp_path / 'urls.csv'
+    sink = crawler.CsvAppender(str(path))
+    for n in (1, 4, 3, 6):
+        sink.add(page(n))
+    sink.save()  # 中断时 2、5 没有结果
+
+    assert read_csv(path) == [(1, 'success'), (3, 'success'), (4, 'success'), (6, 'success')]
+    assert sink.file.closed
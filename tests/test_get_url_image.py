@@ -0,0 +1,267 @@
+import csv
+import importlib.util
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import ROOT
+
+def load_get_url_image():
+    """get-url-image.py 的文件名不是合法模块名，按路径导入"""
+    path = os.path.join(ROOT, 'get-url-image', 'get-url-image.py')
+    spec = importlib.util.spec_from_file_location('get_url_image', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+get_url_image = load_get_url_image()
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+class FakeBrowser:
+    """代替 create_driver/load_page：记录启动的浏览器，按 behaviour(driver, url) 返回页面或抛出异常"""
+
+    def __init__(self, behaviour=None, start_error=None):
+        self.behaviour = behaviour or (lambda driver, url: f'<html>{url}</html>')
+        self.start_error = start_error
+        self.started = []
+        self.lock = threading.Lock()
+
+    def create_driver(self):
+        if self.start_error is not None:
+            raise self.start_error
+        with self.lock:
+            driver = FakeDriver(len(self.started))
+            self.started.append(driver)
+        return driver
+
+    def load_page(self, driver, url, timeout):
+        return self.behaviour(driver, url)
+
+@pytest.fixture
+def browser(monkeypatch):
+    def install(**kwargs):
+        fake = FakeBrowser(**kwargs)
+        monkeypatch.setattr(get_url_image, 'create_driver', fake.create_driver)
+        monkeypatch.setattr(get_url_image, 'load_page', fake.load_page)
+        return fake
+    return install
+
+def run_threads(target, count, timeout=5):
+    """并发运行 count 次 target，返回各次的结果（抛出的异常也作为结果）；超时未结束视为卡死"""
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+        assert not thread.is_alive(), 'worker hung'
+    return results
+
+def test_pool_reuses_drivers(browser):
+    fake = browser()
+    with get_url_image.DriverPool(size=2) as pool:
+        pages = [pool.fetch(f'https://example.com/{n}') for n in range(5)]
+
+    assert pages == [f'<html>https://example.com/{n}</html>' for n in range(5)]
+    assert len(fake.started) == 1
+    assert fake.started[0].quit_called
+
+def test_pool_never_exceeds_size(browser):
+    active = []
+    peak = []
+    lock = threading.Lock()
+    gate = threading.Barrier(2, timeout=5)
+
+    def behaviour(driver, url):
+        with lock:
+            active.append(driver)
+            peak.append(len(active))
+        gate.wait()
+        with lock:
+            active.remove(driver)
+        return url
+
+    fake = browser(behaviour=behaviour)
+    with get_url_image.DriverPool(size=2) as pool:
+        results = run_threads(lambda i: pool.fetch(str(i)), 8)
+
+    assert sorted(results) == sorted(str(i) for i in range(8))
+    assert len(fake.started) == 2
+    assert max(peak) == 2
+
+def test_start_failure_does_not_hang_or_leak(browser):
+    browser(start_error=RuntimeError('chromedriver not found'))
+    with get_url_image.DriverPool(size=2) as pool:
+        assert run_threads(lambda i: pool.fetch(str(i)), 6) == [None] * 6
+        assert pool.slots == 0
+
+def test_failing_drivers_wake_waiting_workers(browser):
+    def behaviour(driver, url):
+        raise ConnectionRefusedError('chromedriver died')
+
+    fake = browser(behaviour=behaviour)
+    with get_url_image.DriverPool(size=1) as pool:
+        assert run_threads(lambda i: pool.fetch(str(i)), 5) == [None] * 5
+        assert pool.slots == 0
+
+    assert len(fake.started) == 5
+    assert all(driver.quit_called for driver in fake.started)
+
+def test_broken_driver_is_replaced(browser):
+    def behaviour(driver, url):
+        if driver.number == 0:
+            raise ConnectionRefusedError('chromedriver died')
+        return url
+
+    fake = browser(behaviour=behaviour)
+    with get_url_image.DriverPool(size=1) as pool:
+        assert pool.fetch('a') is None
+        assert pool.fetch('b') == 'b'
+        assert pool.fetch('c') == 'c'
+
+    assert len(fake.started) == 2
+    assert fake.started[0].quit_called
+
+def test_http_cache_has_a_single_source():
+    # 两个工具写同一个缓存目录，必须使用同一份 http_cache.py
+    assert not os.path.exists(os.path.join(ROOT, 'get-url-image', 'http_cache.py'))
+    assert os.path.samefile(get_url_image.http_cache.__file__,
+                            os.path.join(ROOT, 'download_form_yiqifuwu', 'http_cache.py'))
+
+def csv_links(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row['Image_URL'] for row in csv.DictReader(f)]
+
+def test_index_skips_links_saved_in_earlier_runs(tmp_path):
+    filename = str(tmp_path / 'images.csv')
+    with get_url_image.open_index(filename) as index:
+        get_url_image.save_to_csv(['https://a.com/1.jpg', 'https://a.com/2.jpg'], filename, index, 'https://a.com/')
+
+    with get_url_image.open_index(filename) as index:
+        assert 'https://a.com/1.jpg' in index
+        get_url_image.save_to_csv(['https://a.com/2.jpg', 'https://a.com/3.jpg', 'https://a.com/1.jpg'],
+                                  filename, index, 'https://a.com/other')
+        get_url_image.save_to_csv(['https://a.com/3.jpg'], filename, index)
+        assert len(index) == 3
+
+    assert csv_links(filename) == ['https://a.com/1.jpg', 'https://a.com/2.jpg', 'https://a.com/3.jpg']
+
+def test_open_index_imports_existing_csv_only_once(tmp_path):
+    filename = str(tmp_path / 'images.csv')
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        f.write('Image_URL\nhttps://a.com/1.jpg\nhttps://a.com/2.jpg\nhttps://a.com/1.jpg\n')
+
+    with get_url_image.open_index(filename) as index:
+        assert len(index) == 2
+        assert 'https://a.com/2.jpg' in index
+        assert get_url_image.save_to_csv(['https://a.com/1.jpg'], filename, index) is None
+    assert os.path.exists(str(tmp_path / 'images.db'))
+
+    # 索引已存在时不再导入CSV，之后手工加入CSV的行不会进入索引
+    with open(filename, 'a', newline='', encoding='utf-8') as f:
+        f.write('https://a.com/manual.jpg\n')
+    with get_url_image.open_index(filename) as index:
+        assert len(index) == 2
+        assert 'https://a.com/manual.jpg' not in index
+
+def test_export_csv_keeps_first_seen_order(tmp_path):
+    filename = str(tmp_path / 'images.csv')
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        f.write('Image_URL\nhttps://c.com/z.jpg\nhttps://a.com/y.jpg\nhttps://c.com/z.jpg\n')
+
+    with get_url_image.open_index(filename) as index:
+        assert index.add(['https://b.com/x.jpg', 'https://a.com/y.jpg', 'https://a.com/w.jpg']) == [
+            'https://b.com/x.jpg', 'https://a.com/w.jpg']
+        assert index.export_csv(filename) == 4
+
+    assert csv_links(filename) == ['https://c.com/z.jpg', 'https://a.com/y.jpg', 'https://b.com/x.jpg', 'https://a.com/w.jpg']
+    assert not os.path.exists(filename + '.tmp')
+
+# 深度：/ -> /a、/b -> /c、/d -> /e
+SITE = {
+    '/': '<a href="/a">a</a><a href="/b#top">b</a><a href="/a#again">a</a><a href="/photo.jpg">jpg</a>'
+         '<a href="http://localhost:{port}/other">other host</a><a href="mailto:x@example.com">mail</a>',
+    '/a': '<img src="/img/1.jpg"><a href="/">home</a><a href="/c">c</a>',
+    '/b': '<img src="/img/1.jpg"><img data-src="/img/2.jpg"><a href="/a">a</a><a href="/d">d</a>',
+    '/c': '<img src="/img/3.jpg"><a href="/e">e</a>',
+    '/d': '<a href="/missing">missing</a>',
+    '/e': '<img src="/img/4.jpg">',
+}
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.headers.get('Host').split(':')[0], self.path))
+        page = SITE.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page.format(port=self.server.server_address[1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def crawl_site(site, tmp_path, **kwargs):
+    seed = f'http://127.0.0.1:{site.server_address[1]}/'
+    filename = str(tmp_path / 'images.csv')
+    get_url_image.crawl(seed, filename=filename, workers=2, **kwargs)
+    links = csv_links(filename) if os.path.exists(filename) else []
+    return sorted(site.requests), [link[len(seed) - 1:] for link in links]
+
+def test_crawl_follows_same_site_links_up_to_depth(site, tmp_path):
+    requests, images = crawl_site(site, tmp_path, max_depth=2)
+
+    # 每个页面只请求一次；/e 在第3层，其它站点、图片和 mailto 链接不跟随
+    assert requests == [('127.0.0.1', path) for path in ['/', '/a', '/b', '/c', '/d']]
+    assert sorted(images) == ['/img/1.jpg', '/img/2.jpg', '/img/3.jpg']
+
+def test_crawl_depth_zero_fetches_only_seed(site, tmp_path):
+    requests, images = crawl_site(site, tmp_path, max_depth=0)
+
+    assert requests == [('127.0.0.1', '/')]
+    assert images == []
+
+def test_crawl_stops_at_max_pages(site, tmp_path):
+    requests, images = crawl_site(site, tmp_path, max_depth=5, max_pages=3)
+
+    assert requests == [('127.0.0.1', path) for path in ['/', '/a', '/b']]
+    assert sorted(images) == ['/img/1.jpg', '/img/2.jpg']
+
+def test_crawl_skips_links_already_in_index(site, tmp_path):
+    with get_url_image.open_index(str(tmp_path / 'images.csv')) as index:
+        index.add([f'http://127.0.0.1:{site.server_address[1]}/img/1.jpg'])
+        requests, images = crawl_site(site, tmp_path, max_depth=3, index=index)
+
+    assert ('127.0.0.1', '/e') in requests and ('127.0.0.1', '/missing') in requests
+    assert len(requests) == len(set(requests))
+    assert sorted(images) == ['/img/2.jpg', '/img/3.jpg', '/img/4.jpg']
@@ -0,0 +1,81 @@
+import hashlib
+
+import pytest
+import requests
+
+import git_image
+
+class FakeResponse:
+    def __init__(self, status_code, chunks, error=None):
+        self.status_code = status_code
+        self.chunks = chunks
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield from self.chunks
+        if self.error is not None:
+            raise self.error
+
+class FakeSessions:
+    """代替 HostSessions：所有站点共用一个返回固定响应的会话"""
+
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self if not kwargs else self.response
+
+def download(tmp_path, response):
+    git_image.download_image(FakeSessions(response), 'https://example.com/a.jpg', str(tmp_path / 'a.jpg'))
+
+def test_download_image_renames_part_when_complete(tmp_path):
+    download(tmp_path, FakeResponse(200, [b'abc', b'def']))
+
+    assert (tmp_path / 'a.jpg').read_bytes() == b'abcdef'
+    assert not (tmp_path / 'a.jpg.part').exists()
+
+def test_download_image_removes_part_on_error(tmp_path):
+    error = requests.exceptions.ChunkedEncodingError('connection broken')
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        download(tmp_path, FakeResponse(200, [b'abc'], error))
+
+    assert list(tmp_path.iterdir()) == []
+
+def test_download_image_bad_status_leaves_nothing(tmp_path):
+    with pytest.raises(Exception, match='404'):
+        download(tmp_path, FakeResponse(404, []))
+
+    assert list(tmp_path.iterdir()) == []
+
+def url_hash(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+
+def test_same_basename_on_two_hosts_gets_distinct_names():
+    first, second = 'https://a.com/img/photo.jpg', 'https://b.com/photo.jpg?w=800'
+
+    names = git_image.assign_image_names([first, second, first])
+
+    assert names == {first: 'photo.jpg', second: f'photo_{url_hash(second)}.jpg'}
+
+def test_url_without_basename_is_named_by_hash():
+    urls = ['https://a.com/', 'https://a.com/image/?id=3', 'https://b.com']
+
+    names = git_image.assign_image_names(urls)
+
+    assert names == {url: f'{url_hash(url)}.jpg' for url in urls}
+    assert len(set(names.values())) == 3
+
+def test_names_are_stable_across_runs():
+    urls = ['https://a.com/1.jpg', 'https://b.com/1.jpg', 'https://c.com/', 'https://c.com/1.jpg', 'https://a.com/2.jpg']
+
+    first_run = git_image.assign_image_names(urls)
+
+    assert git_image.assign_image_names(list(urls)) == first_run
+    assert first_run['https://a.com/1.jpg'] == '1.jpg'
+    assert len(set(first_run.values())) == len(urls)
@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import HttpCache, cached_session
+
+PAGES = {
+    '/page.html': ('text/html; charset=utf-8', '<html>页面</html>'.encode('utf-8')),
+    '/file.pdf': ('application/pdf', b'%PDF-1.4 ' + b'x' * 4096),
+}
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content_type, body = PAGES[self.path]
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache'))
+    yield cache
+    cache.close()
+
+def url(server, path):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+def test_page_is_revalidated_with_etag(server, cache):
+    session = cached_session(cache)
+    first = session.get(url(server, '/page.html'))
+    second = session.get(url(server, '/page.html'))
+
+    assert first.text == second.text == '<html>页面</html>'
+    assert getattr(second, 'from_cache', False)
+    assert server.requests == [('/page.html', None), ('/page.html', '"v1"')]
+    assert cache.stats == {'hit': 0, 'not_modified': 1, 'miss': 1}
+
+def test_streamed_download_bypasses_cache(server, cache):
+    session = cached_session(cache)
+    for _ in range(2):
+        with session.get(url(server, '/file.pdf'), stream=True) as response:
+            body = b''.join(response.iter_content(1024))
+        assert body == PAGES['/file.pdf'][1]
+
+    assert server.requests == [('/file.pdf', None), ('/file.pdf', None)]
+    assert cache.get(url(server, '/file.pdf')) is None
+
+def test_non_text_body_is_not_stored(server, cache):
+    session = cached_session(cache)
+    session.get(url(server, '/file.pdf'))
+
+    assert cache.get(url(server, '/file.pdf')) is None
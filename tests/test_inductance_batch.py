@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from buck降压电感计算 import calculate_buck_inductance, calculate_buck_inductance_batch
+from BOOST升压电感计算 import calculate_boost_inductance, calculate_boost_inductance_batch
+
+# Decimal 逐点计算精度为 10/12 位，float64 向量化结果应在此范围内一致
+RTOL = 1e-8
+
+def test_buck_batch_matches_exact():
+    vin = np.linspace(4, 48, 45)[:, None]
+    fsw = np.array([0.1, 0.3, 1.0, 2.4])
+    lmax, lmin = calculate_buck_inductance_batch(vin, 3.3, 0.5, fsw)
+    lmax_exact, lmin_exact = calculate_buck_inductance_batch(vin, 3.3, 0.5, fsw, exact=True)
+
+    assert lmax.shape == lmin.shape == (45, 4)
+    assert lmax.max() > 100  # 覆盖 ≥10μH 的结果
+    np.testing.assert_allclose(lmax, lmax_exact, rtol=RTOL)
+    np.testing.assert_allclose(lmin, lmin_exact, rtol=RTOL)
+
+def test_boost_batch_matches_exact():
+    vin = np.linspace(2.5, 11, 35)[:, None]
+    iout = np.array([0.1, 0.5, 1.5, 3.0])
+    lmax, lmin = calculate_boost_inductance_batch(vin, 12, iout, 0.5)
+    lmax_exact, lmin_exact = calculate_boost_inductance_batch(vin, 12, iout, 0.5, exact=True)
+
+    assert lmax.shape == lmin.shape == (35, 4)
+    assert lmax.max() > 100
+    np.testing.assert_allclose(lmax, lmax_exact, rtol=RTOL)
+    np.testing.assert_allclose(lmin, lmin_exact, rtol=RTOL)
+
+@pytest.mark.parametrize('vin, vout, iout, fsw', [
+    (5, 12, 0.5, 1),      # LMAX ≈ 24.3μH
+    (9, 24, 0.2, 0.3),    # LMAX ≈ 586μH
+    (3.3, 5, 0.1, 0.1),   # LMAX ≈ 7405μH
+])
+def test_boost_scalar_handles_large_inductance(vin, vout, iout, fsw):
+    lmax, lmin = calculate_boost_inductance(vin, vout, iout, fsw)
+    expected = vin * vin * (vout - vin) / (iout * vout * vout * fsw)
+
+    assert lmax == pytest.approx(expected / 0.1, rel=RTOL)
+    assert lmin == pytest.approx(expected / 0.3, rel=RTOL)
+
+def test_buck_scalar_matches_formula():
+    lmax, lmin = calculate_buck_inductance(12, 3.3, 2, 1)
+    base = 3.3 * (1 - 3.3 / 12) / (2 * 1)
+
+    assert lmax == pytest.approx(base / 0.2, rel=RTOL)
+    assert lmin == pytest.approx(base / 0.4, rel=RTOL)
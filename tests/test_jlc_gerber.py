@@ -0,0 +1,216 @@
+import datetime
+import importlib.util
+import os
+import types
+import zipfile
+
+import pytest
+
+from conftest import ROOT
+
+def load_jlc():
+    """2jlc.py 的文件名不是合法模块名，按路径导入"""
+    path = os.path.join(ROOT, 'kicad_ad2jlc_gerber', '2jlc.py')
+    spec = importlib.util.spec_from_file_location('jlc', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+jlc = load_jlc()
+
+KICAD_FILES = {
+    'board-F_Cu.gtl': 'Gerber_TopLayer.GTL',
+    'board-B_Cu.gbl': 'Gerber_BottomLayer.GBL',
+    'board-F_Mask.gts': 'Gerber_TopSolderMaskLayer.GTS',
+    'board-Edge_Cuts.gm1': 'Gerber_BoardOutlineLayer.GKO',
+    'board-PTH.drl': 'Drill_PTH_Through.DRL',
+}
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 1, 2, 3, 4, 5)
+
+@pytest.fixture(autouse=True)
+def fixed_clock(monkeypatch):
+    """固定文件头时间和输出文件名中的时间，两次转换的结果可以逐字节比较"""
+    monkeypatch.setattr(jlc, 'datetime', types.SimpleNamespace(datetime=FixedDatetime))
+
+def make_board(folder, files=KICAD_FILES, lines=2000):
+    folder.mkdir(parents=True, exist_ok=True)
+    for n, file_name in enumerate(files):
+        (folder / file_name).write_text(''.join(f'X{n}{i:05d}Y{i * 7:05d}D01*\n' for i in range(lines)))
+    return folder
+
+def convert(folders, output, **kwargs):
+    return jlc.main([str(folder) for folder in folders], str(output), workers=1, **kwargs)
+
+def zip_contents(path):
+    with zipfile.ZipFile(path) as zipf:
+        assert zipf.testzip() is None
+        return {name: zipf.read(name) for name in zipf.namelist()}
+
+def test_cache_reuses_unchanged_layers(tmp_path):
+    board = make_board(tmp_path / 'gerber')
+    cache_dir = str(tmp_path / 'cache')
+    plain, = convert([board], tmp_path / 'plain')
+    cold, = convert([board], tmp_path / 'cold', cache_dir=cache_dir)
+    warm, = convert([board], tmp_path / 'warm', cache_dir=cache_dir)
+
+    assert (cold['layers'], cold['reused']) == (5, 0)
+    assert (warm['layers'], warm['reused']) == (5, 5)
+    assert zip_contents(cold['zip_path']) == zip_contents(plain['zip_path'])
+    with open(cold['zip_path'], 'rb') as a, open(warm['zip_path'], 'rb') as b:
+        assert a.read() == b.read()
+
+def test_cache_reprocesses_only_changed_layer(tmp_path):
+    board = make_board(tmp_path / 'gerber')
+    cache_dir = str(tmp_path / 'cache')
+    convert([board], tmp_path / 'cold', cache_dir=cache_dir)
+    with open(board / 'board-B_Cu.gbl', 'a') as f:
+        f.write('M02*\n')
+    result, = convert([board], tmp_path / 'changed', cache_dir=cache_dir, keep_folder=True)
+
+    assert (result['layers'], result['reused']) == (5, 4)
+    contents = zip_contents(result['zip_path'])
+    assert contents['Gerber_BottomLayer.GBL'].endswith(b'D01*\nM02*\n')
+    assert (tmp_path / 'changed' / 'jlc_gerber' / 'Gerber_BottomLayer.GBL').read_bytes() == contents['Gerber_BottomLayer.GBL']
+
+def test_cache_key_includes_compression(tmp_path):
+    board = make_board(tmp_path / 'gerber')
+    cache_dir = str(tmp_path / 'cache')
+    convert([board], tmp_path / 'deflate', cache_dir=cache_dir)
+    stored, = convert([board], tmp_path / 'stored', cache_dir=cache_dir, compression='stored')
+
+    assert stored['reused'] == 0
+    with zipfile.ZipFile(stored['zip_path']) as zipf:
+        assert {info.compress_type for info in zipf.infolist()} == {zipfile.ZIP_STORED}
+
+def test_prune_keeps_recent_layers(tmp_path, monkeypatch):
+    monkeypatch.setattr(jlc, 'MAX_CACHED_LAYERS', 3)
+    board = make_board(tmp_path / 'gerber')
+    cache_dir = tmp_path / 'cache'
+    convert([board], tmp_path / 'out', cache_dir=str(cache_dir))
+
+    manifest = jlc.load_cache_manifest(str(cache_dir))
+    assert len(manifest['layers']) == 3
+    assert sorted(os.listdir(cache_dir / 'layers')) == sorted(f'{key}.zip' for key in manifest['layers'])
+
+# KiCad（Protel 扩展名 / .gbr）、AD 和 RS-274X 导出的真实文件名
+KICAD_PROTEL = {
+    'proj-F_Cu.gtl': 'top_layer', 'proj-B_Cu.gbl': 'bottom_layer', 'proj-In1_Cu.g2': 'inner_layer_1',
+    'proj-In2_Cu.g3': 'inner_layer_2', 'proj-F_Silkscreen.gto': 'top_silkscreen',
+    'proj-B_Silkscreen.gbo': 'bottom_silkscreen', 'proj-F_Paste.gtp': 'top_paste', 'proj-B_Paste.gbp': 'bottom_paste',
+    'proj-F_Mask.gts': 'top_mask', 'proj-B_Mask.gbs': 'bottom_mask', 'proj-Edge_Cuts.gm1': 'edge_cuts',
+    'proj-PTH.drl': 'plated_through_hole', 'proj-NPTH.drl': 'non_plated_through_hole',
+}
+KICAD_GBR = {
+    'proj-F_Cu.gbr': 'top_layer', 'proj-In3_Cu.gbr': 'inner_layer_3', 'proj-Edge_Cuts.gbr': 'edge_cuts',
+    'proj-PTH-drl.gbr': 'plated_through_hole', 'proj-NPTH-drl.gbr': 'non_plated_through_hole',
+}
+AD = {
+    'board.GTL': 'top_layer', 'board.GBL': 'bottom_layer', 'board.G1': 'inner_layer_1', 'board.GTO': 'top_silkscreen',
+    'board.GKO': 'edge_cuts', 'board.GBR2': 'plated_through_hole', 'board.GBR1': 'non_plated_through_hole',
+}
+RS274X = {
+    'board-Copper_Signal_Top.gbr': 'top_layer', 'board-Copper_Signal_Bot.gbr': 'bottom_layer',
+    'board-Legend_Top.gbr': 'top_silkscreen', 'board-Soldermask_Bot.gbr': 'bottom_mask',
+    'board-Mechanical_1.gbr': 'edge_cuts', 'board-PTH_Drill.gbr': 'plated_through_hole',
+}
+
+@pytest.fixture(scope='module')
+def matcher():
+    return jlc.build_layer_matcher(jlc.load_json_data(jlc.GERBER_JSON))
+
+@pytest.mark.parametrize('files', [KICAD_PROTEL, KICAD_GBR, AD, RS274X], ids=['kicad', 'kicad-gbr', 'ad', 'rs274x'])
+def test_match_real_exports(matcher, files):
+    layer_files, unmatched, ambiguous, duplicates = jlc.match_layer_files(sorted(files), matcher)
+
+    assert layer_files == {layer: file_name for file_name, layer in files.items()}
+    assert (unmatched, ambiguous, duplicates) == ([], {}, {})
+
+def test_unmatched_files_are_reported(matcher):
+    files = ['proj-F_Cu.gtl', 'proj-job.gbrjob', 'proj-F_Courtyard.gbr', 'readme.txt']
+    layer_files, unmatched, _, _ = jlc.match_layer_files(files, matcher)
+
+    assert layer_files == {'top_layer': 'proj-F_Cu.gtl'}
+    assert unmatched == ['proj-job.gbrjob', 'proj-F_Courtyard.gbr', 'readme.txt']
+
+def test_longest_feature_wins(matcher, capsys):
+    # KiCad 顶层文件又加了 AD 的底层扩展名：'_f_cu.gtl' 比 'GBL' 长，按顶层处理并报告
+    layer_files, _, ambiguous, _ = jlc.match_layer_files(['proj-F_Cu.gtl.GBL'], matcher)
+    jlc.report_layer_matches([], ambiguous, {}, layer_files)
+
+    assert layer_files == {'top_layer': 'proj-F_Cu.gtl.GBL'}
+    assert ambiguous == {'proj-F_Cu.gtl.GBL': ['bottom_layer', 'top_layer']}
+    assert 'proj-F_Cu.gtl.GBL matches bottom_layer, top_layer (using top_layer)' in capsys.readouterr().out
+
+def test_duplicate_files_keep_first(matcher, capsys):
+    files = ['proj-F_Cu.gbr', 'proj-F_Cu.gtl', 'board.GTL']
+    layer_files, _, _, duplicates = jlc.match_layer_files(files, matcher)
+    jlc.report_layer_matches([], {}, duplicates, layer_files)
+
+    assert layer_files == {'top_layer': 'proj-F_Cu.gbr'}
+    assert duplicates == {'top_layer': ['proj-F_Cu.gtl', 'board.GTL']}
+    assert 'Duplicate files for top_layer: proj-F_Cu.gtl, board.GTL (using proj-F_Cu.gbr)' in capsys.readouterr().out
+
+def test_shorter_prefix_feature_is_backfilled():
+    # 真实配置中没有互为前缀的特征；KiCad 的钻孔图 '-PTH-drl_map.gbr' 若单独配置一层，
+    # '_pth_drl' 是 '_pth_drl_map.gbr' 的前缀，同一位置正则只返回后者
+    matcher = jlc.build_layer_matcher({
+        'plated_through_hole': {'jlc_filename': 'Drill_PTH_Through.DRL', 'kicad': '_pth_drl'},
+        'drill_map': {'jlc_filename': 'Drill_Map.GBR', 'kicad': '_pth_drl_map.gbr'},
+        'unused': {'jlc_filename': '', 'kicad': '_pth'},
+    })
+    layer_files, _, ambiguous, _ = jlc.match_layer_files(['proj-PTH-drl_map.gbr', 'proj-PTH-drl.gbr'], matcher)
+
+    assert matcher[2]['_pth_drl_map.gbr'] == ['_pth_drl']
+    assert layer_files == {'drill_map': 'proj-PTH-drl_map.gbr', 'plated_through_hole': 'proj-PTH-drl.gbr'}
+    assert ambiguous == {'proj-PTH-drl_map.gbr': ['drill_map', 'plated_through_hole']}
+
+def test_expand_reports_missing_folders_and_empty_globs(tmp_path, monkeypatch):
+    for name in ('board_a', 'board_b'):
+        (tmp_path / 'boards' / name).mkdir(parents=True)
+    (tmp_path / 'boards' / 'notes.txt').write_text('')
+    monkeypatch.chdir(tmp_path)
+
+    folders, errors = jlc.expand_gerber_folders(['boards/*', 'typo_folder', 'other/*', 'boards/notes.txt'])
+
+    assert folders == [os.path.join('boards', 'board_a'), os.path.join('boards', 'board_b')]
+    assert errors == [
+        "Gerber folder not found: 'typo_folder'",
+        "no Gerber folder matches 'other/*'",
+        "Gerber folder not found: 'boards/notes.txt'",
+    ]
+
+def test_plan_jobs_gives_variants_unique_names(tmp_path):
+    folders = [str(make_board(tmp_path / name, {'proj-F_Cu.gtl': None}, lines=1)) for name in ('a', 'b', 'c')]
+    single, = jlc.plan_jobs(folders[:1], 'out', keep_folder=True)
+    jobs = jlc.plan_jobs(folders, 'out', keep_folder=True)
+
+    assert single == (folders[0], os.path.join('out', 'out_proj-20250102030405.zip'), os.path.join('out', 'jlc_gerber'))
+    assert [os.path.basename(zip_path) for _, zip_path, _ in jobs] == [
+        'out_proj-20250102030405.zip', 'out_proj-20250102030405_2.zip', 'out_proj-20250102030405_3.zip',
+    ]
+    assert [path_final for _, _, path_final in jobs] == [zip_path[:-len('.zip')] for _, zip_path, _ in jobs]
+    assert jlc.plan_jobs(folders, 'out')[0][2] is None
+
+def test_main_summary_and_cache_merge(tmp_path, capsys):
+    first = make_board(tmp_path / 'first')
+    second = make_board(tmp_path / 'second', {'board.GTL': None, 'board.GKO': None, 'notes.txt': None}, lines=300)
+    cache_dir = tmp_path / 'cache'
+    results = convert([first, second], tmp_path / 'out', cache_dir=str(cache_dir))
+    out = capsys.readouterr().out
+
+    assert [(r['layers'], r['unmatched'], r['error']) for r in results] == [(5, [], None), (2, ['notes.txt'], None)]
+    assert f"Unmatched in {second}: notes.txt" in out
+    for r in results:
+        assert os.path.basename(r['zip_path']) in out
+
+    # 两块板子的缓存更新都合并进清单
+    manifest = jlc.load_cache_manifest(str(cache_dir))
+    assert len(manifest['layers']) == 7
+    assert sorted(manifest['sources']) == sorted(
+        str(folder / name) for folder in (first, second) for name in os.listdir(folder) if name != 'notes.txt'
+    )
+    assert [r['reused'] for r in convert([first, second], tmp_path / 'again', cache_dir=str(cache_dir))] == [5, 2]
@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+import monte_carlo
+from monte_carlo import normal, run_monte_carlo, tolerance, uniform
+
+SEPIC = dict(vin=uniform(5, 8.4), vin_max=8.4, vout=12, iout=0.5, fsw_khz=tolerance(400, 0.05),
+             cs_uf=tolerance(22, 0.2), l_uh=tolerance(22, 0.2), vd=normal(0.35, 0.03),
+             rds_on=uniform(0.11, 0.176), qgd=tolerance(0.000012, 0.1), igate=tolerance(0.2, 0.1))
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # 小批量，少量抽样也分成多批，多进程才会真正启用
+    monkeypatch.setattr(monte_carlo, 'BATCH_SIZE', 1000)
+
+def test_report_is_independent_of_worker_count(small_batches):
+    serial = run_monte_carlo('sepic', SEPIC, samples=5500, seed=7, workers=1)
+    parallel = run_monte_carlo('sepic', SEPIC, samples=5500, seed=7, workers=2)
+
+    assert serial == parallel
+
+def test_seed_makes_runs_reproducible(small_batches):
+    first = run_monte_carlo('sepic', SEPIC, samples=3000, seed=1, workers=1)
+
+    assert run_monte_carlo('sepic', SEPIC, samples=3000, seed=1, workers=1) == first
+    assert run_monte_carlo('sepic', SEPIC, samples=3000, seed=2, workers=1) != first
+
+def constant(report, name):
+    """参数都是固定值时，每个指标的所有统计量都等于同一个数"""
+    stats = report[name]
+    assert stats['min'] == pytest.approx(stats['max'], rel=1e-12)
+    return stats['mean']
+
+def test_buck_nominal_matches_closed_form():
+    vin, vout, iout, fsw, l_uh, rds_on = 12.0, 3.3, 2.0, 1.0, 4.7, 0.03
+    report = run_monte_carlo('buck', dict(vin=vin, vout=vout, iout=iout, fsw=fsw, l_uh=l_uh, rds_on=rds_on), samples=10)
+    ripple = vout * (1 - vout / vin) / (l_uh * fsw)  # ΔI = Vout(1-D)/(L·Fsw)，μH·MHz
+
+    assert constant(report, 'ripple_current') == pytest.approx(ripple, rel=1e-9)
+    assert constant(report, 'peak_current') == pytest.approx(iout + ripple / 2, rel=1e-9)
+    assert constant(report, 'mosfet_loss') == pytest.approx(vout / vin * (iout ** 2 + ripple ** 2 / 12) * rds_on, rel=1e-9)
+
+def test_boost_nominal_matches_closed_form():
+    vin, vout, iout, fsw, l_uh, rds_on = 5.0, 7.0, 1.5, 2.4, 2.2, 0.03
+    report = run_monte_carlo('boost', dict(vin=vin, vout=vout, iout=iout, fsw=fsw, l_uh=l_uh, rds_on=rds_on), samples=10)
+    duty = 1 - vin / vout
+    input_current = iout / (1 - duty)
+    ripple = vin * duty / (l_uh * fsw)
+
+    assert constant(report, 'ripple_ratio') == pytest.approx(ripple / input_current, rel=1e-9)
+    assert constant(report, 'peak_current') == pytest.approx(input_current + ripple / 2, rel=1e-9)
+    assert constant(report, 'mosfet_loss') == pytest.approx(
+        duty * (input_current ** 2 + ripple ** 2 / 12) * rds_on, rel=1e-9)
+
+def test_sepic_nominal_matches_closed_form():
+    vin, vin_max, vout, iout, fsw_khz, cs_uf, l_uh, vd, rds_on, qgd, igate = (
+        5.0, 8.4, 12.0, 0.5, 400.0, 22.0, 22.0, 0.35, 0.11, 0.000012, 0.2)
+    report = run_monte_carlo('sepic', dict(vin=vin, vin_max=vin_max, vout=vout, iout=iout, fsw_khz=fsw_khz,
+                                           cs_uf=cs_uf, l_uh=l_uh, vd=vd, rds_on=rds_on, qgd=qgd, igate=igate),
+                             samples=10)
+    duty = (vout + vd) / (vin + vout + vd)
+    input_current = iout * (vout + vd) / vin
+    ripple = vin * duty * 1e3 / (l_uh * fsw_khz)  # ΔIL = Vin·D/(L·Fsw)，μH·kHz
+    ripple_ratio = ripple / input_current
+    mosfet_peak = input_current / duty
+    loss = (input_current / math.sqrt(duty)) ** 2 * rds_on * duty + (vin + vout) * mosfet_peak * qgd * fsw_khz / igate
+
+    assert constant(report, 'ripple_current') == pytest.approx(ripple, rel=1e-9)
+    assert constant(report, 'peak_current') == pytest.approx(iout * vout * (1 + ripple_ratio / 2) / vin, rel=1e-9)
+    assert constant(report, 'mosfet_peak_current') == pytest.approx(mosfet_peak, rel=1e-9)
+    assert constant(report, 'mosfet_loss') == pytest.approx(loss, rel=1e-9)
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from parts_catalog import EXAMPLE_DIR, load_catalog, select_sepic_parts
+from SEPIC主要参数设计 import calculate_sepic_parameters
+
+DESIGN = calculate_sepic_parameters(vin_min=Decimal('5'), vin_nominal=Decimal('7.4'), vin_max=Decimal('8.4'),
+                                    vout=Decimal('12'), iout=Decimal('0.5'), fsw_khz=Decimal('400'),
+                                    cs_uf=Decimal('22'))
+
+def write_catalog(directory):
+    (directory / 'inductors.csv').write_text(
+        'part_number,inductance_uh,isat_a,irms_a,dcr_mohm,package\n'
+        'L-22-BIG,22,5.0,4.0,30,1265\n'
+        'L-22-SMALL,22,0.5,0.4,200,4030\n'
+        'L-47,47,5.0,4.0,60,1265\n', encoding='utf-8')
+    (directory / 'mosfets.csv').write_text(
+        'part_number,vds_v,id_a,rds_on_ohm,qgd_nc,package\n'
+        'Q-20V,20,10,0.01,2,SOP-8\n'
+        'Q-30V,30,10,0.02,2,SOP-8\n', encoding='utf-8')
+
+def test_select_from_given_catalog(tmp_path):
+    write_catalog(tmp_path)
+    inductors, mosfets = select_sepic_parts(DESIGN, load_catalog(str(tmp_path)))
+
+    # 需要 ≥ 约18μH、饱和电流足够的电感；二极管反向电压 20.4V × 1.25 需要 30V MOSFET
+    assert [part.part_number for part in inductors] == ['L-22-BIG']
+    assert [part.part_number for part in mosfets] == ['Q-30V']
+
+def test_example_catalog_loads():
+    catalog = load_catalog(EXAMPLE_DIR)
+
+    assert catalog.inductors and catalog.mosfets
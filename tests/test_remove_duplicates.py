@@ -0,0 +1,20 @@
+from remove_duplicates import normalize_url
+
+def test_tracking_params_are_removed():
+    a = normalize_url('http://www.example.com/a.jpg?utm_source=x&id=3&spm=1.2&from=timeline&share=1&ref=home#top')
+    b = normalize_url('https://example.com/a.jpg?id=3')
+    assert a == b == 'https://example.com/a.jpg?id=3'
+
+def test_query_order_does_not_matter():
+    assert normalize_url('https://example.com/a.jpg?b=2&a=1') == normalize_url('https://example.com/a.jpg?a=1&b=2')
+
+def test_rendition_params_are_kept():
+    urls = [
+        'https://cdn.example.com/a.jpg?w=200&h=100',
+        'https://cdn.example.com/a.jpg?w=800&h=400',
+        'https://cdn.example.com/a.jpg?size=large',
+        'https://cdn.example.com/a.jpg?q=90',
+        'https://cdn.example.com/image.jpg?q=cat',
+        'https://cdn.example.com/image.jpg?q=dog',
+    ]
+    assert len({normalize_url(url) for url in urls}) == len(urls)
@@ -0,0 +1,67 @@
+import decimal
+from decimal import Decimal
+
+import pytest
+
+from SEPIC主要参数设计 import (SEPIC_FIELDS, SWEEP_PARAMS, calculate_sepic_parameters, pareto_front,
+                           sweep_sepic_designs, top_k_designs)
+
+ARGS = dict(vin_min=Decimal('5'), vin_nominal=Decimal('7.4'), vin_max=Decimal('8.4'), vout=Decimal('12'),
+            iout=Decimal('0.5'), fsw_khz=Decimal('400'), cs_uf=Decimal('22'))
+
+def test_global_decimal_context_is_untouched():
+    with decimal.localcontext() as ctx:
+        ctx.prec = 50
+        design = calculate_sepic_parameters(**ARGS)
+
+        assert decimal.getcontext().prec == 50
+        # 计算本身仍按12位精度
+        assert len(design.input_current.as_tuple().digits) <= 12
+
+SWEEP = dict(vin_min=[4.5, 5], vin_max=8.4, vout=[12, 15], iout=[0.3, 0.8], fsw_khz=[200, 450, 800], cs_uf=[4.7, 22],
+             ripple_ratio=[0.2, 0.4, 0.6], rds_on=[0.05, 0.11], qgd=[0.000004, 0.000012])
+
+@pytest.fixture(scope='module')
+def designs():
+    return sweep_sepic_designs(**SWEEP)
+
+def test_sweep_matches_exact(designs):
+    assert len(designs) == 2 * 2 * 2 * 3 * 2 * 3 * 2 * 2
+    for row in designs[::37]:
+        args = {name: Decimal(repr(float(row[name]))) for name in SWEEP_PARAMS}
+        exact = calculate_sepic_parameters(vin_nominal=args['vin_min'], **args)
+        for field in SEPIC_FIELDS:
+            if field in exact._fields:
+                assert float(row[field]) == pytest.approx(float(getattr(exact, field)), rel=1e-9), field
+        assert row['conduction_loss'] + row['switching_loss'] == pytest.approx(row['mosfet_power_loss'], rel=1e-12)
+
+def non_dominated(designs, objectives):
+    """逐对比较的参考实现：不被任何设计支配（全部不差且至少一个更好）的目标值组合"""
+    costs = [tuple(float(row[name]) for name in objectives) for row in designs]
+    return {
+        cost for cost in costs
+        if not any(all(o <= c for o, c in zip(other, cost)) and other != cost for other in costs)
+    }
+
+@pytest.mark.parametrize('objectives', [
+    ('mosfet_power_loss', 'inductor_value_separate'),
+    ('mosfet_power_loss', 'inductor_value_separate', 'input_cap_rms_current'),
+])
+def test_pareto_front_matches_brute_force(designs, objectives):
+    front = pareto_front(designs, objectives)
+    costs = [tuple(float(row[name]) for name in objectives) for row in front]
+
+    # cs_uf 不影响前两个目标，完全相同的目标值组合只保留一个
+    assert sorted(costs) == sorted(non_dominated(designs, objectives))
+    assert list(front[objectives[0]]) == sorted(front[objectives[0]])
+
+def test_top_k_orders_by_weighted_score(designs):
+    objectives = ('mosfet_power_loss', 'inductor_value_separate')
+    weights = (2.0, 1.0)
+    score = sum(w * designs[name] / designs[name].min() for w, name in zip(weights, objectives))
+    best = top_k_designs(designs, k=10, objectives=objectives, weights=weights)
+    best_score = sum(w * best[name] / designs[name].min() for w, name in zip(weights, objectives))
+
+    assert list(best_score) == sorted(best_score)
+    assert best_score[-1] <= sorted(score)[9]
+    assert len(top_k_designs(designs[:5], k=10)) == 5